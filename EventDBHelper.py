@@ -1,222 +1,410 @@
 import sqlite3
 import json
-from typing import Dict, Any, Optional, List, Tuple
-from datetime import datetime, timedelta
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional, List, Tuple
+from datetime import date, datetime, timedelta
+
+BUSY_TIMEOUT_MS = 5000  # Wait this long for another writer before raising "database is locked"
+CACHE_SIZE_KIB = 16384  # Page cache per connection (negative cache_size means KiB)
+CACHED_STATEMENTS = 256  # Prepared statements kept per connection
+EVENT_CHANGES_KEPT = 1000  # Rows of event_changes kept when the tables are (re)created
+
+# Columns of a discovery row: the get_all_events columns plus the viewer's status
+DISCOVERY_COLUMNS = """
+    e.event_id, e.event_name, e.start_date, e.end_date, e.start_time, e.end_time,
+    e.location, e.description, e.visibility, e.event_type,
+    e.image_source, e.image_path, e.ai_theme, e.event_code,
+    e.created_at, e.updated_at,
+    ef.enable_group_chat, ef.enable_minigames,
+    e.interest_tags,
+    e.host_id,
+    ep.status
+"""
+
+
+class DiscoveryQuery:
+    """
+    Filters of the /events discovery page, pushed down to SQL.
+
+    Every filter is optional. The clause always restricts to public events so
+    the events(visibility, start_date) index drives the scan; the date range
+    keeps events overlapping [start, end] (events without valid dates never
+    match) and the text search matches the name, description, location,
+    theme and tags case-insensitively.
+    """
+
+    SEARCH_FIELDS = ("e.event_name", "e.description", "e.location", "e.ai_theme", "e.interest_tags")
+
+    def __init__(
+        self,
+        event_type: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        text: Optional[str] = None,
+    ):
+        self.event_type = event_type if event_type in ("online", "physical") else None
+        self.start = start
+        self.end = end
+        self.text = (text or "").strip() or None
+
+    def where(self) -> Tuple[str, List[Any]]:
+        clauses = ["e.visibility = 'public'"]
+        params: List[Any] = []
+        if self.event_type:
+            clauses.append("e.event_type = ?")
+            params.append(self.event_type)
+        if self.start:
+            clauses.append("e.end_on >= ?")
+            params.append(self.start.strftime("%Y-%m-%d"))
+        if self.end:
+            clauses.append("e.start_on <= ?")
+            params.append(self.end.strftime("%Y-%m-%d"))
+        if self.text:
+            escaped = self.text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            clauses.append(
+                "(" + " OR ".join(f"{field} LIKE ? ESCAPE '\\'" for field in self.SEARCH_FIELDS) + ")"
+            )
+            params.extend([f"%{escaped}%"] * len(self.SEARCH_FIELDS))
+        return " AND ".join(clauses), params
 
 
 class DatabaseHelper:
     # Setup - Initializes the database helper
     def __init__(self, db_name: str = "events.db"):
         self.db_name = db_name
+        # One connection per thread (per greenlet under eventlet's monkey patching)
+        self._local = threading.local()
         self.create_events_tables()
 
-    # Helper - Creates a database connection
-    def _get_conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_name)
+    # Helper - Opens and tunes a new connection
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode: transactions are started explicitly by transaction()
+        conn = sqlite3.connect(
+            self.db_name,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
         conn.execute("PRAGMA foreign_keys = ON")
         return conn
 
+    # Helper - Returns this thread's connection, opening it on first use
+    def _get_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    # Helper - Runs a block in one transaction on this thread's connection
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Commits when the outermost block exits and rolls back if it raises.
+        Nested blocks (e.g. helper methods called inside a transaction) join
+        the enclosing transaction instead of committing on their own.
+        """
+        conn = self._get_conn()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        # IMMEDIATE takes the write lock up front so busy_timeout applies
+        # instead of failing on a read-to-write upgrade
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+        finally:
+            self._local.depth = 0
+
+    # Helper - Closes this thread's connection (it is reopened on next use)
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            conn.close()
+
     # C - Creates database tables and handles schema migrations
     def create_events_tables(self) -> None:
-        conn = self._get_conn()
-        cur = conn.cursor()
+        with self.transaction() as conn:
+            cur = conn.cursor()
 
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS event_users (
-                user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                role TEXT NOT NULL CHECK (role IN ('admin', 'user')),
-                interests TEXT
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS event_users (
+                    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    role TEXT NOT NULL CHECK (role IN ('admin', 'user')),
+                    interests TEXT
+                )
+                """
             )
-            """
-        )
 
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS events (
-                event_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_name TEXT NOT NULL,
-                start_date TEXT NOT NULL,
-                end_date TEXT NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT NOT NULL,
-                location TEXT NOT NULL,
-                description TEXT NOT NULL,
-                visibility TEXT NOT NULL CHECK (visibility IN ('private','public')),
-                event_type TEXT NOT NULL CHECK (event_type IN ('physical','online')),
-                image_source TEXT NOT NULL CHECK (image_source IN ('upload','ai')),
-                image_path TEXT,
-                ai_theme TEXT,
-                event_code TEXT UNIQUE,
-                host_id INTEGER,
-                created_by INTEGER,
-                created_at TEXT DEFAULT (datetime('now')),
-                updated_at TEXT,
-                FOREIGN KEY (host_id) REFERENCES event_users(user_id) ON DELETE SET NULL
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS events (
+                    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    event_name TEXT NOT NULL,
+                    start_date TEXT NOT NULL,
+                    end_date TEXT NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT NOT NULL,
+                    location TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    visibility TEXT NOT NULL CHECK (visibility IN ('private','public')),
+                    event_type TEXT NOT NULL CHECK (event_type IN ('physical','online')),
+                    image_source TEXT NOT NULL CHECK (image_source IN ('upload','ai')),
+                    image_path TEXT,
+                    ai_theme TEXT,
+                    event_code TEXT UNIQUE,
+                    host_id INTEGER,
+                    created_by INTEGER,
+                    created_at TEXT DEFAULT (datetime('now')),
+                    updated_at TEXT,
+                    FOREIGN KEY (host_id) REFERENCES event_users(user_id) ON DELETE SET NULL
+                )
+                """
             )
-            """
-        )
 
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS event_features (
-                event_id INTEGER PRIMARY KEY,
-                enable_group_chat INTEGER NOT NULL DEFAULT 0 CHECK (enable_group_chat IN (0,1)),
-                enable_minigames INTEGER NOT NULL DEFAULT 0 CHECK (enable_minigames IN (0,1)),
-                FOREIGN KEY (event_id) REFERENCES events(event_id) ON DELETE CASCADE
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS event_features (
+                    event_id INTEGER PRIMARY KEY,
+                    enable_group_chat INTEGER NOT NULL DEFAULT 0 CHECK (enable_group_chat IN (0,1)),
+                    enable_minigames INTEGER NOT NULL DEFAULT 0 CHECK (enable_minigames IN (0,1)),
+                    FOREIGN KEY (event_id) REFERENCES events(event_id) ON DELETE CASCADE
+                )
+                """
             )
-            """
-        )
 
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS event_participants (
-                participant_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                joined_at TEXT DEFAULT (datetime('now')),
-                FOREIGN KEY (event_id) REFERENCES events(event_id) ON DELETE CASCADE,
-                FOREIGN KEY (user_id) REFERENCES event_users(user_id) ON DELETE CASCADE,
-                UNIQUE(event_id, user_id)
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS event_participants (
+                    participant_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    event_id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    joined_at TEXT DEFAULT (datetime('now')),
+                    FOREIGN KEY (event_id) REFERENCES events(event_id) ON DELETE CASCADE,
+                    FOREIGN KEY (user_id) REFERENCES event_users(user_id) ON DELETE CASCADE,
+                    UNIQUE(event_id, user_id)
+                )
+                """
             )
-            """
-        )
 
-        # Pre-populate users if empty
-        cur.execute("SELECT count(*) FROM event_users")
-        if cur.fetchone()[0] == 0:
-            cur.execute("INSERT INTO event_users (name, role, interests) VALUES ('Ethan Low', 'admin', 'tech, coding, music')")
-            cur.execute("INSERT INTO event_users (name, role, interests) VALUES ('Grandma Annie', 'user', 'gardening, cooking, bingo')")
-
-        # Migration: Check if columns exist and add if missing
-        # Check users.interests
-        cur.execute("PRAGMA table_info(event_users)")
-        columns = [info[1] for info in cur.fetchall()]
-        if "interests" not in columns:
-            cur.execute("ALTER TABLE event_users ADD COLUMN interests TEXT")
-            cur.execute("UPDATE event_users SET interests = 'tech, coding, music' WHERE name = 'Ethan Low'")
-            cur.execute("UPDATE event_users SET interests = 'gardening, cooking, bingo' WHERE name = 'Grandma Annie'")
-
-        # Check events.event_code
-        cur.execute("PRAGMA table_info(events)")
-        event_columns = [info[1] for info in cur.fetchall()]
-        if "private_code" in event_columns and "event_code" not in event_columns:
-            # SQLite >= 3.25 supports RENAME COLUMN
-            try:
-                cur.execute("ALTER TABLE events RENAME COLUMN private_code TO event_code")
-            except Exception:
-                # Fallback for older SQLite (not expected but good practice)
-                pass
+            # Pre-populate users if empty
+            cur.execute("SELECT count(*) FROM event_users")
+            if cur.fetchone()[0] == 0:
+                cur.execute("INSERT INTO event_users (name, role, interests) VALUES ('Ethan Low', 'admin', 'tech, coding, music')")
+                cur.execute("INSERT INTO event_users (name, role, interests) VALUES ('Grandma Annie', 'user', 'gardening, cooking, bingo')")
+
+            # Migration: Check if columns exist and add if missing
+            # Check users.interests
+            cur.execute("PRAGMA table_info(event_users)")
+            columns = [info[1] for info in cur.fetchall()]
+            if "interests" not in columns:
+                cur.execute("ALTER TABLE event_users ADD COLUMN interests TEXT")
+                cur.execute("UPDATE event_users SET interests = 'tech, coding, music' WHERE name = 'Ethan Low'")
+                cur.execute("UPDATE event_users SET interests = 'gardening, cooking, bingo' WHERE name = 'Grandma Annie'")
+
+            # Check events.event_code
+            cur.execute("PRAGMA table_info(events)")
+            event_columns = [info[1] for info in cur.fetchall()]
+            if "private_code" in event_columns and "event_code" not in event_columns:
+                # SQLite >= 3.25 supports RENAME COLUMN
+                try:
+                    cur.execute("ALTER TABLE events RENAME COLUMN private_code TO event_code")
+                except Exception:
+                    # Fallback for older SQLite (not expected but good practice)
+                    pass
         
-        # If event_code was just renamed or exists, ensure public events have codes
-        if "event_code" in event_columns or "private_code" in event_columns:
-             # After ensuring the event_code column exists (either via rename or fallback), update all public events with null event_code values to use the KK-{event_id} format.
-             cur.execute("SELECT event_id FROM events WHERE event_code IS NULL")
-             rows = cur.fetchall()
-             for r in rows:
-                 eid = r[0]
-                 code = f"KK-{eid}"
-                 cur.execute("UPDATE events SET event_code = ? WHERE event_id = ?", (code, eid))
-
-        # Check interest_tags
-        if "interest_tags" not in event_columns:
-            cur.execute("ALTER TABLE events ADD COLUMN interest_tags TEXT")
-
-        # Check event_participants.status
-        cur.execute("PRAGMA table_info(event_participants)")
-        part_columns = [info[1] for info in cur.fetchall()]
-        if "status" not in part_columns:
-            cur.execute("ALTER TABLE event_participants ADD COLUMN status TEXT DEFAULT 'going'")
-
-        # Check events.host_id
-        if "host_id" not in event_columns:
-            cur.execute("ALTER TABLE events ADD COLUMN host_id INTEGER REFERENCES event_users(user_id) ON DELETE SET NULL")
-
-        # Check events.created_by
-        if "created_by" not in event_columns:
-            cur.execute("ALTER TABLE events ADD COLUMN created_by INTEGER")
-
-        conn.commit()
-        conn.close()
+            # If event_code was just renamed or exists, ensure public events have codes
+            if "event_code" in event_columns or "private_code" in event_columns:
+                 # After ensuring the event_code column exists (either via rename or fallback), update all public events with null event_code values to use the KK-{event_id} format.
+                 cur.execute("SELECT event_id FROM events WHERE event_code IS NULL")
+                 rows = cur.fetchall()
+                 for r in rows:
+                     eid = r[0]
+                     code = f"KK-{eid}"
+                     cur.execute("UPDATE events SET event_code = ? WHERE event_id = ?", (code, eid))
+
+            # Check interest_tags
+            if "interest_tags" not in event_columns:
+                cur.execute("ALTER TABLE events ADD COLUMN interest_tags TEXT")
+
+            # Check event_participants.status
+            cur.execute("PRAGMA table_info(event_participants)")
+            part_columns = [info[1] for info in cur.fetchall()]
+            if "status" not in part_columns:
+                cur.execute("ALTER TABLE event_participants ADD COLUMN status TEXT DEFAULT 'going'")
+
+            # Check events.host_id
+            if "host_id" not in event_columns:
+                cur.execute("ALTER TABLE events ADD COLUMN host_id INTEGER REFERENCES event_users(user_id) ON DELETE SET NULL")
+
+            # Check events.created_by
+            if "created_by" not in event_columns:
+                cur.execute("ALTER TABLE events ADD COLUMN created_by INTEGER")
+
+            # Normalized dates for range queries: 'YYYY-MM-DD', or NULL when the stored text is not a date
+            # (generated columns are only listed by table_xinfo)
+            cur.execute("PRAGMA table_xinfo(events)")
+            all_event_columns = [info[1] for info in cur.fetchall()]
+            if "start_on" not in all_event_columns:
+                cur.execute("ALTER TABLE events ADD COLUMN start_on TEXT GENERATED ALWAYS AS (date(start_date)) VIRTUAL")
+            if "end_on" not in all_event_columns:
+                cur.execute("ALTER TABLE events ADD COLUMN end_on TEXT GENERATED ALWAYS AS (date(end_date)) VIRTUAL")
+
+            # Discovery page: public events in date order
+            cur.execute("CREATE INDEX IF NOT EXISTS ix_events_visibility_start ON events (visibility, start_date, created_at)")
+            # Host dashboard queries
+            cur.execute("CREATE INDEX IF NOT EXISTS ix_events_host_start ON events (host_id, start_on)")
+            # Participant lookups: per viewer, and per event by status and join time
+            cur.execute("CREATE INDEX IF NOT EXISTS ix_event_participants_user_status ON event_participants (user_id, status)")
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS ix_event_participants_event_status_joined "
+                "ON event_participants (event_id, status, joined_at)"
+            )
+            # (event_id, user_id) is covered by the UNIQUE constraint unless the table predates it
+            if not self._has_index_on(cur, "event_participants", ["event_id", "user_id"]):
+                cur.execute("CREATE INDEX IF NOT EXISTS ix_event_participants_event_user ON event_participants (event_id, user_id)")
+
+            # Change log of events whose match fields changed, read by event_matching.InterestMatcher
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS event_changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    event_id INTEGER NOT NULL
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS trg_events_insert_change AFTER INSERT ON events
+                BEGIN
+                    INSERT INTO event_changes (event_id) VALUES (NEW.event_id);
+                END
+                """
+            )
+            cur.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS trg_events_update_change AFTER UPDATE OF description, interest_tags ON events
+                BEGIN
+                    INSERT INTO event_changes (event_id) VALUES (NEW.event_id);
+                END
+                """
+            )
+            cur.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS trg_events_delete_change AFTER DELETE ON events
+                BEGIN
+                    INSERT INTO event_changes (event_id) VALUES (OLD.event_id);
+                END
+                """
+            )
+            # Keep the log short; readers that fall behind the kept range reload everything
+            cur.execute(
+                "DELETE FROM event_changes WHERE seq <= (SELECT MAX(seq) FROM event_changes) - ?",
+                (EVENT_CHANGES_KEPT,),
+            )
+
+    # Helper - Checks whether some index on a table starts with the given columns
+    @staticmethod
+    def _has_index_on(cur: sqlite3.Cursor, table: str, columns: List[str]) -> bool:
+        cur.execute(f"PRAGMA index_list({table})")
+        for index in [r[1] for r in cur.fetchall()]:
+            cur.execute(f"PRAGMA index_info({index})")
+            indexed = [r[2] for r in sorted(cur.fetchall())]
+            if indexed[: len(columns)] == columns:
+                return True
+        return False
 
     # D - Deletes an AI session and all associated messages and patches from the database
     def delete_ai_session(self, session_id: int) -> None:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM ai_event_patches WHERE session_id = ?", (session_id,))
-        cur.execute("DELETE FROM ai_event_messages WHERE session_id = ?", (session_id,))
-        cur.execute("DELETE FROM ai_event_sessions WHERE session_id = ?", (session_id,))
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM ai_event_patches WHERE session_id = ?", (session_id,))
+            cur.execute("DELETE FROM ai_event_messages WHERE session_id = ?", (session_id,))
+            cur.execute("DELETE FROM ai_event_sessions WHERE session_id = ?", (session_id,))
 
     # --- AI Agent Methods ---
 
     # C - Creates the necessary database tables for the AI Agent feature (sessions, messages, patches)
     def create_ai_agent_tables(self) -> None:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        # AI Session Table
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS ai_event_sessions (
-                session_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                host_id INTEGER NOT NULL,
-                status TEXT NOT NULL DEFAULT 'in_progress',
-                current_draft_json TEXT,
-                linked_event_id INTEGER,
-                created_at TEXT DEFAULT (datetime('now')),
-                updated_at TEXT DEFAULT (datetime('now')),
-                FOREIGN KEY (host_id) REFERENCES event_users(user_id) ON DELETE CASCADE,
-                FOREIGN KEY (linked_event_id) REFERENCES events(event_id) ON DELETE SET NULL
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            # AI Session Table
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ai_event_sessions (
+                    session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    host_id INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'in_progress',
+                    current_draft_json TEXT,
+                    linked_event_id INTEGER,
+                    created_at TEXT DEFAULT (datetime('now')),
+                    updated_at TEXT DEFAULT (datetime('now')),
+                    FOREIGN KEY (host_id) REFERENCES event_users(user_id) ON DELETE CASCADE,
+                    FOREIGN KEY (linked_event_id) REFERENCES events(event_id) ON DELETE SET NULL
+                )
+                """
             )
-            """
-        )
-        # AI Messages Table
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS ai_event_messages (
-                message_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id INTEGER NOT NULL,
-                role TEXT NOT NULL CHECK (role IN ('admin', 'ai', 'system')),
-                content TEXT NOT NULL,
-                created_at TEXT DEFAULT (datetime('now')),
-                FOREIGN KEY (session_id) REFERENCES ai_event_sessions(session_id) ON DELETE CASCADE
+            # AI Messages Table
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ai_event_messages (
+                    message_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id INTEGER NOT NULL,
+                    role TEXT NOT NULL CHECK (role IN ('admin', 'ai', 'system')),
+                    content TEXT NOT NULL,
+                    created_at TEXT DEFAULT (datetime('now')),
+                    FOREIGN KEY (session_id) REFERENCES ai_event_sessions(session_id) ON DELETE CASCADE
+                )
+                """
             )
-            """
-        )
-        # AI Patches Table (for diffs and history)
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS ai_event_patches (
-                patch_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id INTEGER NOT NULL,
-                message_id INTEGER,
-                patch_json TEXT,
-                impact_report_json TEXT,
-                created_at TEXT DEFAULT (datetime('now')),
-                FOREIGN KEY (session_id) REFERENCES ai_event_sessions(session_id) ON DELETE CASCADE,
-                FOREIGN KEY (message_id) REFERENCES ai_event_messages(message_id) ON DELETE SET NULL
+            # AI Patches Table (for diffs and history)
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ai_event_patches (
+                    patch_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id INTEGER NOT NULL,
+                    message_id INTEGER,
+                    patch_json TEXT,
+                    impact_report_json TEXT,
+                    created_at TEXT DEFAULT (datetime('now')),
+                    FOREIGN KEY (session_id) REFERENCES ai_event_sessions(session_id) ON DELETE CASCADE,
+                    FOREIGN KEY (message_id) REFERENCES ai_event_messages(message_id) ON DELETE SET NULL
+                )
+                """
             )
-            """
-        )
-        conn.commit()
-        conn.close()
 
     # C - Creates a new AI session for a host with an initial draft
     def create_ai_session(self, host_id: int, initial_draft: Dict[str, Any]) -> int:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO ai_event_sessions (host_id, current_draft_json, updated_at)
-            VALUES (?, ?, datetime('now'))
-            """,
-            (host_id, json.dumps(initial_draft)),
-        )
-        session_id = cur.lastrowid
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO ai_event_sessions (host_id, current_draft_json, updated_at)
+                VALUES (?, ?, datetime('now'))
+                """,
+                (host_id, json.dumps(initial_draft)),
+            )
+            session_id = cur.lastrowid
         return session_id
 
     # R - Retrieves all AI sessions belonging to a specific host, ordered by last update
@@ -233,7 +421,6 @@ class DatabaseHelper:
             (host_id,),
         )
         rows = cur.fetchall()
-        conn.close()
         sessions = []
         for r in rows:
             sessions.append({
@@ -253,7 +440,6 @@ class DatabaseHelper:
             (session_id,),
         )
         row = cur.fetchone()
-        conn.close()
         if row:
             return {
                 "session_id": row[0],
@@ -266,15 +452,13 @@ class DatabaseHelper:
 
     # C - Adds a new message to an existing AI session
     def add_ai_message(self, session_id: int, role: str, content: str) -> int:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO ai_event_messages (session_id, role, content) VALUES (?, ?, ?)",
-            (session_id, role, content),
-        )
-        msg_id = cur.lastrowid
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO ai_event_messages (session_id, role, content) VALUES (?, ?, ?)",
+                (session_id, role, content),
+            )
+            msg_id = cur.lastrowid
         return msg_id
 
     # R - Retrieves the full message history for a specific AI session
@@ -286,30 +470,25 @@ class DatabaseHelper:
             (session_id,),
         )
         rows = cur.fetchall()
-        conn.close()
         return [{"message_id": r[0], "role": r[1], "content": r[2], "created_at": r[3]} for r in rows]
 
     # U - Updates the current draft JSON and status of an AI session
     def update_ai_session_draft(self, session_id: int, draft_json: str, status: str = "in_progress") -> None:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "UPDATE ai_event_sessions SET current_draft_json = ?, status = ?, updated_at = datetime('now') WHERE session_id = ?",
-            (draft_json, status, session_id),
-        )
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "UPDATE ai_event_sessions SET current_draft_json = ?, status = ?, updated_at = datetime('now') WHERE session_id = ?",
+                (draft_json, status, session_id),
+            )
 
     # C - Records a patch (diff) and its impact report for version control
     def add_ai_patch(self, session_id: int, message_id: int, patch_json: str, impact_json: str) -> None:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO ai_event_patches (session_id, message_id, patch_json, impact_report_json) VALUES (?, ?, ?, ?)",
-            (session_id, message_id, patch_json, impact_json),
-        )
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO ai_event_patches (session_id, message_id, patch_json, impact_report_json) VALUES (?, ?, ?, ?)",
+                (session_id, message_id, patch_json, impact_json),
+            )
 
     # R - Retrieves all patches for a session, ordered by ID
     def get_ai_patches(self, session_id: int) -> List[Dict[str, Any]]:
@@ -320,7 +499,6 @@ class DatabaseHelper:
             (session_id,),
         )
         rows = cur.fetchall()
-        conn.close()
         return [{"patch_id": r[0], "message_id": r[1], "patch_json": r[2]} for r in rows]
 
     def get_latest_impact(self, session_id: int) -> Optional[Dict[str, Any]]:
@@ -331,7 +509,6 @@ class DatabaseHelper:
             (session_id,),
         )
         row = cur.fetchone()
-        conn.close()
         if row and row[0]:
             return json.loads(row[0])
         return None
@@ -340,30 +517,27 @@ class DatabaseHelper:
         """
         Reverts the session draft to a checkpoint and deletes messages/patches created after that point.
         """
-        conn = self._get_conn()
-        cur = conn.cursor()
-        
-        # 1. Update Draft
-        cur.execute(
-            "UPDATE ai_event_sessions SET current_draft_json = ?, updated_at = datetime('now') WHERE session_id = ?",
-            (json.dumps(checkpoint_draft), session_id),
-        )
+        with self.transaction() as conn:
+            cur = conn.cursor()
         
-        # 2. Delete newer messages (Keep messages <= max_message_id)
-        cur.execute(
-            "DELETE FROM ai_event_messages WHERE session_id = ? AND message_id > ?",
-            (session_id, max_message_id),
-        )
+            # 1. Update Draft
+            cur.execute(
+                "UPDATE ai_event_sessions SET current_draft_json = ?, updated_at = datetime('now') WHERE session_id = ?",
+                (json.dumps(checkpoint_draft), session_id),
+            )
         
-        # 3. Delete newer patches (Keep patches linked to messages <= max_message_id)
-        # Delete patches linked to messages after the checkpoint (using message_id relationship)
-        cur.execute(
-            "DELETE FROM ai_event_patches WHERE session_id = ? AND message_id > ?",
-            (session_id, max_message_id),
-        )
+            # 2. Delete newer messages (Keep messages <= max_message_id)
+            cur.execute(
+                "DELETE FROM ai_event_messages WHERE session_id = ? AND message_id > ?",
+                (session_id, max_message_id),
+            )
         
-        conn.commit()
-        conn.close()
+            # 3. Delete newer patches (Keep patches linked to messages <= max_message_id)
+            # Delete patches linked to messages after the checkpoint (using message_id relationship)
+            cur.execute(
+                "DELETE FROM ai_event_patches WHERE session_id = ? AND message_id > ?",
+                (session_id, max_message_id),
+            )
 
     # R - Retrieves interest tags for a specific user
     def get_user_interests(self, user_id: int) -> str:
@@ -371,16 +545,13 @@ class DatabaseHelper:
         cur = conn.cursor()
         cur.execute("SELECT interests FROM event_users WHERE user_id = ?", (user_id,))
         row = cur.fetchone()
-        conn.close()
         return row[0] if row else ""
 
     # U - Updates the interest tags for a specific user
     def update_user_interests(self, user_id: int, interests_json: str) -> None:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        cur.execute("UPDATE event_users SET interests = ? WHERE user_id = ?", (interests_json, user_id))
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            cur.execute("UPDATE event_users SET interests = ? WHERE user_id = ?", (interests_json, user_id))
 
     # R - Retrieves all users from the database
     def get_all_users(self) -> List[Tuple]:
@@ -388,7 +559,6 @@ class DatabaseHelper:
         cur = conn.cursor()
         cur.execute("SELECT user_id, name, role, interests FROM event_users")
         rows = cur.fetchall()
-        conn.close()
         return rows
 
     # R - Retrieves user details by their ID
@@ -397,7 +567,6 @@ class DatabaseHelper:
         cur = conn.cursor()
         cur.execute("SELECT user_id, name, role, interests FROM event_users WHERE user_id = ?", (user_id,))
         row = cur.fetchone()
-        conn.close()
         return row
 
     # R - Retrieves a single event by its unique code
@@ -406,7 +575,6 @@ class DatabaseHelper:
         cur = conn.cursor()
         cur.execute("SELECT * FROM events WHERE event_code = ?", (code,))
         row = cur.fetchone()
-        conn.close()
         return row
 
     # R - Retrieves detailed event information including host and features
@@ -430,14 +598,12 @@ class DatabaseHelper:
         row = cur.fetchone()
         
         if not row:
-            conn.close()
             return None
             
         # Get column names
         cols = [description[0] for description in cur.description]
         event_dict = dict(zip(cols, row))
         
-        conn.close()
         return event_dict
 
     # R - Retrieves counts of participants by status for an event
@@ -453,7 +619,6 @@ class DatabaseHelper:
         """, (event_id,))
         
         rows = cur.fetchall()
-        conn.close()
         
         counts = {"going": 0, "interested": 0}
         for status, count in rows:
@@ -464,43 +629,37 @@ class DatabaseHelper:
     
     # U - Updates the unique code for an event
     def set_event_code(self, event_id: int, code: str) -> None:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        cur.execute("UPDATE events SET event_code = ? WHERE event_id = ?", (code, event_id))
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            cur.execute("UPDATE events SET event_code = ? WHERE event_id = ?", (code, event_id))
 
     # C - Adds a user to an event (creates or updates participant record)
     def join_event(self, event_id: int, user_id: int, status: str = "going") -> bool:
         try:
-            conn = self._get_conn()
-            cur = conn.cursor()
-            # Check if already exists
-            cur.execute("SELECT participant_id FROM event_participants WHERE event_id = ? AND user_id = ?", (event_id, user_id))
-            row = cur.fetchone()
-            if row:
-                # Update status
-                cur.execute("UPDATE event_participants SET status = ? WHERE event_id = ? AND user_id = ?", (status, event_id, user_id))
-            else:
-                # Insert new
-                cur.execute(
-                    "INSERT INTO event_participants (event_id, user_id, status) VALUES (?, ?, ?)",
-                    (event_id, user_id, status)
-                )
-            conn.commit()
-            conn.close()
+            with self.transaction() as conn:
+                cur = conn.cursor()
+                # Check if already exists
+                cur.execute("SELECT participant_id FROM event_participants WHERE event_id = ? AND user_id = ?", (event_id, user_id))
+                row = cur.fetchone()
+                if row:
+                    # Update status
+                    cur.execute("UPDATE event_participants SET status = ? WHERE event_id = ? AND user_id = ?", (status, event_id, user_id))
+                else:
+                    # Insert new
+                    cur.execute(
+                        "INSERT INTO event_participants (event_id, user_id, status) VALUES (?, ?, ?)",
+                        (event_id, user_id, status)
+                    )
             return True
         except sqlite3.IntegrityError:
             return False
 
     # D - Removes a user from an event
     def leave_event(self, event_id: int, user_id: int) -> bool:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM event_participants WHERE event_id = ? AND user_id = ?", (event_id, user_id))
-        rows_affected = cur.rowcount
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM event_participants WHERE event_id = ? AND user_id = ?", (event_id, user_id))
+            rows_affected = cur.rowcount
         return rows_affected > 0
 
     # R - Retrieves actionable items for the host dashboard
@@ -540,7 +699,7 @@ class DatabaseHelper:
             FROM events
             WHERE host_id = ? 
             AND (image_path IS NULL OR image_path = '') 
-            AND end_date >= ?
+            AND end_on >= ?
         """, (host_id, today))
         actions["missing_posters"] = [
             {"type": "missing_poster", "event_id": r[0], "event_name": r[1], "start_date": r[2], "event_code": r[3]}
@@ -552,14 +711,13 @@ class DatabaseHelper:
             SELECT event_id, event_name, end_date, event_code
             FROM events
             WHERE host_id = ? 
-            AND end_date >= ? AND end_date <= ?
+            AND end_on >= ? AND end_on <= ?
         """, (host_id, today, three_days_later))
         actions["ending_soon"] = [
             {"type": "ending_soon", "event_id": r[0], "event_name": r[1], "end_date": r[2], "event_code": r[3]}
             for r in cur.fetchall()
         ]
 
-        conn.close()
         return actions
 
     # R - Retrieves the status of a specific participant
@@ -571,10 +729,8 @@ class DatabaseHelper:
             (event_id, user_id)
         )
         row = cur.fetchone()
-        conn.close()
         return row[0] if row else None
 
-
     # R - Checks if a user is a participant of an event
     def is_user_joined(self, event_id: int, user_id: int) -> bool:
         conn = self._get_conn()
@@ -584,62 +740,57 @@ class DatabaseHelper:
             (event_id, user_id)
         )
         row = cur.fetchone()
-        conn.close()
         return row is not None
 
     # C - Creates a new event record
     def insert_event(self, event_dict: Dict[str, Any]) -> int:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO events (
-                event_name, start_date, end_date, start_time, end_time,
-                location, description, visibility, event_type,
-                image_source, image_path, ai_theme, event_code, interest_tags, host_id, updated_at
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO events (
+                    event_name, start_date, end_date, start_time, end_time,
+                    location, description, visibility, event_type,
+                    image_source, image_path, ai_theme, event_code, interest_tags, host_id, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                """,
+                (
+                    event_dict.get("event_name"),
+                    event_dict.get("start_date"),
+                    event_dict.get("end_date"),
+                    event_dict.get("start_time"),
+                    event_dict.get("end_time"),
+                    event_dict.get("location"),
+                    event_dict.get("description"),
+                    event_dict.get("visibility"),
+                    event_dict.get("event_type"),
+                    event_dict.get("image_source"),
+                    event_dict.get("image_path"),
+                    event_dict.get("ai_theme"),
+                    event_dict.get("event_code"), 
+                    event_dict.get("interest_tags"),
+                    event_dict.get("host_id"),
+                ),
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-            """,
-            (
-                event_dict.get("event_name"),
-                event_dict.get("start_date"),
-                event_dict.get("end_date"),
-                event_dict.get("start_time"),
-                event_dict.get("end_time"),
-                event_dict.get("location"),
-                event_dict.get("description"),
-                event_dict.get("visibility"),
-                event_dict.get("event_type"),
-                event_dict.get("image_source"),
-                event_dict.get("image_path"),
-                event_dict.get("ai_theme"),
-                event_dict.get("event_code"), 
-                event_dict.get("interest_tags"),
-                event_dict.get("host_id"),
-            ),
-        )
-        event_id = cur.lastrowid
-        conn.commit()
-        conn.close()
+            event_id = cur.lastrowid
         return event_id
 
     # C - Creates feature settings for an event
     def insert_event_features(self, event_id: int, features_dict: Dict[str, Any]) -> None:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO event_features (event_id, enable_group_chat, enable_minigames)
-            VALUES (?, ?, ?)
-            """,
-            (
-                event_id,
-                int(features_dict.get("enable_group_chat", 0)),
-                int(features_dict.get("enable_minigames", 0)),
-            ),
-        )
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO event_features (event_id, enable_group_chat, enable_minigames)
+                VALUES (?, ?, ?)
+                """,
+                (
+                    event_id,
+                    int(features_dict.get("enable_group_chat", 0)),
+                    int(features_dict.get("enable_minigames", 0)),
+                ),
+            )
 
     # R - Retrieves all public events
     def get_all_events(self) -> List[Tuple]:
@@ -662,9 +813,106 @@ class DatabaseHelper:
             """
         )
         rows = cur.fetchall()
-        conn.close()
         return rows
 
+    # R - Retrieves the sort keys of every event matching the discovery filters
+    def get_discovery_keys(self, query: DiscoveryQuery) -> List[Tuple]:
+        where, params = query.where()
+        conn = self._get_conn()
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            SELECT e.event_id, e.start_date, COALESCE(e.created_at, '')
+            FROM events e
+            WHERE {where}
+            """,
+            params,
+        )
+        return cur.fetchall()
+
+    # R - Retrieves the (oldest, newest) sequence numbers in the event change log
+    def get_event_change_range(self) -> Tuple[int, int]:
+        conn = self._get_conn()
+        cur = conn.cursor()
+        cur.execute("SELECT COALESCE(MIN(seq), 0), COALESCE(MAX(seq), 0) FROM event_changes")
+        return cur.fetchone()
+
+    # R - Retrieves the ids of events changed after a change-log sequence number
+    def get_events_changed_since(self, seq: int) -> List[int]:
+        conn = self._get_conn()
+        cur = conn.cursor()
+        cur.execute("SELECT DISTINCT event_id FROM event_changes WHERE seq > ?", (seq,))
+        return [r[0] for r in cur.fetchall()]
+
+    # R - Retrieves (event_id, description, interest_tags) for all events or the given ones
+    def get_event_match_fields(self, event_ids: Optional[List[int]] = None) -> List[Tuple]:
+        conn = self._get_conn()
+        cur = conn.cursor()
+        if event_ids is None:
+            cur.execute("SELECT event_id, description, interest_tags FROM events")
+        else:
+            placeholders = ",".join("?" * len(event_ids))
+            cur.execute(
+                f"SELECT event_id, description, interest_tags FROM events WHERE event_id IN ({placeholders})",
+                event_ids,
+            )
+        return cur.fetchall()
+
+    # R - Retrieves discovery rows (with the viewer's status) for the given events, in the given order
+    def get_discovery_events(self, event_ids: List[int], viewer_id: Optional[int]) -> List[Tuple]:
+        if not event_ids:
+            return []
+        conn = self._get_conn()
+        cur = conn.cursor()
+        placeholders = ",".join("?" * len(event_ids))
+        cur.execute(
+            f"""
+            SELECT {DISCOVERY_COLUMNS}
+            FROM events e
+            LEFT JOIN event_features ef ON e.event_id = ef.event_id
+            LEFT JOIN event_participants ep ON e.event_id = ep.event_id AND ep.user_id = ?
+            WHERE e.event_id IN ({placeholders})
+            """,
+            (viewer_id, *event_ids),
+        )
+        by_id = {row[0]: row for row in cur.fetchall()}
+        return [by_id[event_id] for event_id in event_ids if event_id in by_id]
+
+    # R - Retrieves one page of discovery rows in date order, after a (start_date, created_at, event_id) cursor
+    def get_discovery_page(
+        self,
+        query: DiscoveryQuery,
+        viewer_id: Optional[int],
+        after: Optional[Tuple[str, str, int]] = None,
+        limit: int = 24,
+    ) -> List[Tuple]:
+        where, params = query.where()
+        if after:
+            # Keyset: start_date ASC, created_at DESC, event_id DESC
+            start_date, created_at, event_id = after
+            where += """
+                AND (e.start_date > ? OR (e.start_date = ? AND (
+                    COALESCE(e.created_at, '') < ?
+                    OR (COALESCE(e.created_at, '') = ? AND e.event_id < ?)
+                )))
+            """
+            params += [start_date, start_date, created_at, created_at, event_id]
+        conn = self._get_conn()
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            SELECT {DISCOVERY_COLUMNS}
+            FROM events e
+            LEFT JOIN event_features ef ON e.event_id = ef.event_id
+            LEFT JOIN event_participants ep ON e.event_id = ep.event_id AND ep.user_id = ?
+            WHERE {where}
+            ORDER BY e.start_date ASC, COALESCE(e.created_at, '') DESC, e.event_id DESC
+            LIMIT ?
+            """,
+            (viewer_id, *params, limit),
+        )
+        return cur.fetchall()
+
     # R - Retrieves upcoming events for a user
     def get_user_upcoming_events(self, user_id: int) -> List[Tuple]:
         conn = self._get_conn()
@@ -691,14 +939,13 @@ class DatabaseHelper:
             LEFT JOIN event_features ef ON e.event_id = ef.event_id
             WHERE 
                 (e.host_id = ? OR ep.status IN ('going', 'interested'))
-                AND e.start_date >= ?
+                AND e.start_on >= ?
             ORDER BY e.start_date ASC
         """
         # Params: user_id (for case), user_id (for join), user_id (for host check), today
         
         cur.execute(query, (user_id, user_id, user_id, today))
         rows = cur.fetchall()
-        conn.close()
         return rows
 
     # R - Retrieves all events associated with a user
@@ -744,20 +991,17 @@ class DatabaseHelper:
         
         cur.execute(query, tuple(params))
         rows = cur.fetchall()
-        conn.close()
         return rows
 
     # D - Deletes an event and its related data
     def delete_event(self, event_id: int) -> bool:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        # Delete participants first to avoid issues if CASCADE is not enabled
-        cur.execute("DELETE FROM event_participants WHERE event_id = ?", (event_id,))
-        cur.execute("DELETE FROM event_features WHERE event_id = ?", (event_id,))
-        cur.execute("DELETE FROM events WHERE event_id = ?", (event_id,))
-        rows_affected = cur.rowcount
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            # Delete participants first to avoid issues if CASCADE is not enabled
+            cur.execute("DELETE FROM event_participants WHERE event_id = ?", (event_id,))
+            cur.execute("DELETE FROM event_features WHERE event_id = ?", (event_id,))
+            cur.execute("DELETE FROM events WHERE event_id = ?", (event_id,))
+            rows_affected = cur.rowcount
         return rows_affected > 0
 
     # R - Retrieves an event by its ID
@@ -766,7 +1010,6 @@ class DatabaseHelper:
         cur = conn.cursor()
         cur.execute("SELECT * FROM events WHERE event_id = ?", (event_id,))
         row = cur.fetchone()
-        conn.close()
         return row
 
     # R - Retrieves an event along with its enabled features
@@ -788,7 +1031,6 @@ class DatabaseHelper:
             (event_id,),
         )
         row = cur.fetchone()
-        conn.close()
         return row
 
     # U - Updates event details and features
@@ -798,66 +1040,54 @@ class DatabaseHelper:
         updated_event_dict: Dict[str, Any],
         updated_features_dict_optional: Optional[Dict[str, Any]] = None,
     ) -> bool:
-        conn = self._get_conn()
-        cur = conn.cursor()
-
-        cur.execute(
-            """
-            UPDATE events
-            SET
-                event_name = ?, start_date = ?, end_date = ?, start_time = ?, end_time = ?,
-                location = ?, description = ?, visibility = ?, event_type = ?,
-                image_source = ?, image_path = ?, ai_theme = ?, event_code = ?,
-                updated_at = datetime('now')
-            WHERE event_id = ?
-            """,
-            (
-                updated_event_dict.get("event_name"),
-                updated_event_dict.get("start_date"),
-                updated_event_dict.get("end_date"),
-                updated_event_dict.get("start_time"),
-                updated_event_dict.get("end_time"),
-                updated_event_dict.get("location"),
-                updated_event_dict.get("description"),
-                updated_event_dict.get("visibility"),
-                updated_event_dict.get("event_type"),
-                updated_event_dict.get("image_source"),
-                updated_event_dict.get("image_path"),
-                updated_event_dict.get("ai_theme"),
-                updated_event_dict.get("event_code"),
-                event_id,
-            ),
-        )
-        rows_affected = cur.rowcount
+        with self.transaction() as conn:
+            cur = conn.cursor()
 
-        if updated_features_dict_optional is not None:
             cur.execute(
                 """
-                INSERT INTO event_features (event_id, enable_group_chat, enable_minigames)
-                VALUES (?, ?, ?)
-                ON CONFLICT(event_id) DO UPDATE SET
-                    enable_group_chat = excluded.enable_group_chat,
-                    enable_minigames = excluded.enable_minigames
+                UPDATE events
+                SET
+                    event_name = ?, start_date = ?, end_date = ?, start_time = ?, end_time = ?,
+                    location = ?, description = ?, visibility = ?, event_type = ?,
+                    image_source = ?, image_path = ?, ai_theme = ?, event_code = ?,
+                    updated_at = datetime('now')
+                WHERE event_id = ?
                 """,
                 (
+                    updated_event_dict.get("event_name"),
+                    updated_event_dict.get("start_date"),
+                    updated_event_dict.get("end_date"),
+                    updated_event_dict.get("start_time"),
+                    updated_event_dict.get("end_time"),
+                    updated_event_dict.get("location"),
+                    updated_event_dict.get("description"),
+                    updated_event_dict.get("visibility"),
+                    updated_event_dict.get("event_type"),
+                    updated_event_dict.get("image_source"),
+                    updated_event_dict.get("image_path"),
+                    updated_event_dict.get("ai_theme"),
+                    updated_event_dict.get("event_code"),
                     event_id,
-                    int(updated_features_dict_optional.get("enable_group_chat", 0)),
-                    int(updated_features_dict_optional.get("enable_minigames", 0)),
                 ),
             )
+            rows_affected = cur.rowcount
 
-        conn.commit()
-        conn.close()
-        return rows_affected > 0
+            if updated_features_dict_optional is not None:
+                cur.execute(
+                    """
+                    INSERT INTO event_features (event_id, enable_group_chat, enable_minigames)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(event_id) DO UPDATE SET
+                        enable_group_chat = excluded.enable_group_chat,
+                        enable_minigames = excluded.enable_minigames
+                    """,
+                    (
+                        event_id,
+                        int(updated_features_dict_optional.get("enable_group_chat", 0)),
+                        int(updated_features_dict_optional.get("enable_minigames", 0)),
+                    ),
+                )
 
-    # D - Deletes an event and its related data
-    def delete_event(self, event_id: int) -> bool:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM events WHERE event_id = ?", (event_id,))
-        rows_affected = cur.rowcount
-        conn.commit()
-        conn.close()
         return rows_affected > 0
 
     # R - Retrieves pending participant requests for a host
@@ -882,48 +1112,43 @@ class DatabaseHelper:
         
         cur.execute(query, (host_id,))
         rows = cur.fetchall()
-        conn.close()
         return rows
 
     # U - Updates all pending requests to 'going'
     def approve_all_pending_requests(self, host_id: int) -> int:
-        conn = self._get_conn()
-        cur = conn.cursor()
+        with self.transaction() as conn:
+            cur = conn.cursor()
         
-        # Update all pending requests for events hosted by this user
-        query = """
-            UPDATE event_participants 
-            SET status = 'going' 
-            WHERE status = 'pending' 
-            AND event_id IN (
-                SELECT event_id FROM events WHERE host_id = ?
-            )
-        """
+            # Update all pending requests for events hosted by this user
+            query = """
+                UPDATE event_participants 
+                SET status = 'going' 
+                WHERE status = 'pending' 
+                AND event_id IN (
+                    SELECT event_id FROM events WHERE host_id = ?
+                )
+            """
         
-        cur.execute(query, (host_id,))
-        rows_affected = cur.rowcount
-        conn.commit()
-        conn.close()
+            cur.execute(query, (host_id,))
+            rows_affected = cur.rowcount
         return rows_affected
 
     # D - Deletes all pending requests
     def reject_all_pending_requests(self, host_id: int) -> int:
-        conn = self._get_conn()
-        cur = conn.cursor()
+        with self.transaction() as conn:
+            cur = conn.cursor()
         
-        # Delete all pending requests for events hosted by this user
-        query = """
-            DELETE FROM event_participants 
-            WHERE status = 'pending' 
-            AND event_id IN (
-                SELECT event_id FROM events WHERE host_id = ?
-            )
-        """
+            # Delete all pending requests for events hosted by this user
+            query = """
+                DELETE FROM event_participants 
+                WHERE status = 'pending' 
+                AND event_id IN (
+                    SELECT event_id FROM events WHERE host_id = ?
+                )
+            """
         
-        cur.execute(query, (host_id,))
-        rows_affected = cur.rowcount
-        conn.commit()
-        conn.close()
+            cur.execute(query, (host_id,))
+            rows_affected = cur.rowcount
         return rows_affected
 
     # R - Retrieves statistics for the host dashboard
@@ -947,11 +1172,10 @@ class DatabaseHelper:
             SELECT COUNT(*) 
             FROM events 
             WHERE host_id = ? 
-            AND start_date >= ? AND start_date <= ?
+            AND start_on >= ? AND start_on <= ?
         """, (host_id, today.strftime("%Y-%m-%d"), week_later.strftime("%Y-%m-%d")))
         upcoming_count = cur.fetchone()[0]
         
-        conn.close()
         return {
             "total_participants": total_participants,
             "upcoming_this_week": upcoming_count
@@ -962,19 +1186,20 @@ class DatabaseHelper:
         cur = conn.cursor()
         start_date_obj = datetime.now().date() - timedelta(days=days - 1)
         start_date_str = start_date_obj.strftime("%Y-%m-%d")
+        # joined_at >= 'YYYY-MM-DD' keeps the same rows as comparing its date part, but can use
+        # the (event_id, status, joined_at) index
         cur.execute(
             """
             SELECT substr(ep.joined_at, 1, 10) as join_date, COUNT(*)
             FROM event_participants ep
             JOIN events e ON ep.event_id = e.event_id
-            WHERE e.host_id = ? AND ep.status = 'going' AND substr(ep.joined_at, 1, 10) >= ?
+            WHERE e.host_id = ? AND ep.status = 'going' AND ep.joined_at >= ?
             GROUP BY join_date
             ORDER BY join_date
             """,
             (host_id, start_date_str),
         )
         rows = cur.fetchall()
-        conn.close()
         counts_map = {r[0]: r[1] for r in rows}
         result: List[Dict[str, Any]] = []
         current = start_date_obj
@@ -993,13 +1218,12 @@ class DatabaseHelper:
             """
             SELECT event_type, visibility, COUNT(*)
             FROM events
-            WHERE host_id = ? AND start_date >= ?
+            WHERE host_id = ? AND start_on >= ?
             GROUP BY event_type, visibility
             """,
             (host_id, today),
         )
         rows = cur.fetchall()
-        conn.close()
         data: List[Dict[str, Any]] = []
         for event_type, visibility, count in rows:
             label = f"{event_type.capitalize()} {visibility.capitalize()}"
@@ -1023,14 +1247,13 @@ class DatabaseHelper:
                 COUNT(ep.participant_id) as current_signups
             FROM events e
             LEFT JOIN event_participants ep ON e.event_id = ep.event_id AND ep.status = 'going'
-            WHERE e.host_id = ? AND e.start_date >= ?
+            WHERE e.host_id = ? AND e.start_on >= ?
             GROUP BY e.event_id
             HAVING current_signups < 5
         """
         
         cur.execute(query, (host_id, today))
         rows = cur.fetchall()
-        conn.close()
         
         suggestions = []
         for r in rows:
@@ -1066,7 +1289,6 @@ class DatabaseHelper:
         
         cur.execute(query, (host_id, limit))
         rows = cur.fetchall()
-        conn.close()
         
         activities = []
         for r in rows:
@@ -1082,11 +1304,9 @@ class DatabaseHelper:
 
     # U - Updates the status of a specific participant
     def update_participant_status(self, participant_id: int, status: str) -> None:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        cur.execute("UPDATE event_participants SET status = ? WHERE participant_id = ?", (status, participant_id))
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            cur.execute("UPDATE event_participants SET status = ? WHERE participant_id = ?", (status, participant_id))
 
     # R - Retrieves participant details by ID
     def get_participant_by_id(self, participant_id: int) -> Optional[Tuple]:
@@ -1094,14 +1314,11 @@ class DatabaseHelper:
         cur = conn.cursor()
         cur.execute("SELECT * FROM event_participants WHERE participant_id = ?", (participant_id,))
         row = cur.fetchone()
-        conn.close()
         return row
 
     # D - Deletes a participant record
     def delete_participant(self, participant_id: int) -> None:
-        conn = self._get_conn()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM event_participants WHERE participant_id = ?", (participant_id,))
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM event_participants WHERE participant_id = ?", (participant_id,))
 
@@ -9,6 +9,8 @@ import requests
 from urllib.parse import quote
 import re
 
+from integration_client import integration_client
+
 
 class LyricsAPIError(Exception):
     """Exception raised for lyrics API errors"""
@@ -50,14 +52,8 @@ def fetch_lyrics_from_lrclib(title, artist, album=None, duration=None):
         if duration:
             params['duration'] = int(duration)
 
-        # Make request
-        response = requests.get(base_url, params=params, timeout=5)
-
-        if response.status_code == 404:
-            return None
-
-        response.raise_for_status()
-        results = response.json()
+        # Make request (pooled, cached and coalesced; see integration_client.py)
+        results = integration_client.get_json(base_url, params, timeout=5, allow_404=True)
 
         if not results or len(results) == 0:
             return None
@@ -139,10 +135,7 @@ def search_songs_itunes(query, limit=20):
             'explicit': 'No'  # Filter explicit content for family-friendly karaoke
         }
 
-        response = requests.get(base_url, params=params, timeout=5)
-        response.raise_for_status()
-
-        data = response.json()
+        data = integration_client.get_json(base_url, params, timeout=5)
         results = data.get('results', [])
 
         songs = []
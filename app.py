@@ -1,11 +1,13 @@
 import base64
+import io
 import json
 import os
 import secrets
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from urllib.parse import urlencode
 
+import click
 import dotenv
 
 dotenv.load_dotenv()
@@ -34,7 +36,7 @@ from config import config, Config
 from models import (
     db, User, Forum, Post, Comment, Like, Notification,
     Report, Ban, DeletedPost, Hobby, Message, PasswordResetToken,
-    Follow, Session as SessionModel, Score
+    Follow, Session as SessionModel, SessionParticipant, Score, Song, SGT
 )
 from extensions import socketio
 from routes.event_routes import event_bp
@@ -46,7 +48,10 @@ from karaoke import (
     delete_queue_item,
     delete_song,
     get_leaderboard_data,
+    get_relay_metrics,
+    get_relay_metrics_prometheus,
     get_session_info,
+    get_session_recording,
     get_song,
     get_song_lyrics,
     get_song_queue,
@@ -55,11 +60,30 @@ from karaoke import (
     get_user_sessions,
     search_songs_external,
     submit_score,
+    submit_scores_batch,
     update_song,
     index as karaoke_index
 )
-from database import seed_default_songs
-from decorators import login_required
+from database import (
+    seed_default_songs,
+    ensure_column,
+    ensure_indexes,
+    ensure_leaderboard_rollups,
+    ensure_song_normalized_keys,
+    ensure_user_karaoke_stats,
+)
+from karaoke_writer import session_writer
+from karaoke_recorder import session_recorder
+from rank_index import rank_index
+from karaoke_profile import profile_cache
+from song_catalog import catalog_version
+from karaoke_lyrics import lyrics_prefetcher
+from community_stats import community_stats
+from karaoke_sessions import live_sessions, session_sweeper
+from karaoke_vocal_range import vocal_range_analyzer
+import karaoke_hub
+import karaoke_metrics
+from decorators import admin_required, login_required
 
 # Initialize extensions globally for decorators
 sock = Sock()
@@ -74,6 +98,17 @@ def create_app(config_name="default"):
     socketio.init_app(app)
     sock.init_app(app)
     bootstrap.init_app(app)
+    session_writer.init_app(app)
+    karaoke_hub.init_app(app)
+    session_recorder.init_app(app)
+    karaoke_metrics.init_app(app)
+    catalog_version.init_app(app)
+    lyrics_prefetcher.init_app(app)
+    community_stats.init_app(app)
+    live_sessions.init_app(app)
+    session_sweeper.init_app(app)
+    vocal_range_analyzer.init_app(app, session_recorder)
+    rank_index.init_app(app)
 
     # Ensure upload folder exists
     upload_folder = app.config.get("UPLOAD_FOLDER")
@@ -86,6 +121,9 @@ def create_app(config_name="default"):
 
     with app.app_context():
         db.create_all()
+        ensure_song_normalized_keys()
+        ensure_column("songs", "difficulty_score", "FLOAT")
+        ensure_indexes(Song, Score, SessionModel, SessionParticipant)
         # Initialize Hobbies if empty (from Account logic)
         if not Hobby.query.first():
             for name in app.config['INTERESTS']:
@@ -93,6 +131,81 @@ def create_app(config_name="default"):
                     db.session.add(Hobby(name=name))
             db.session.commit()
         seed_default_songs()
+        ensure_leaderboard_rollups()
+        ensure_user_karaoke_stats()
+        rank_index.build()
+
+    @app.cli.command("rebuild-leaderboard")
+    def rebuild_leaderboard_command():
+        """Recompute karaoke leaderboard rollups from the scores table."""
+        from database import rebuild_leaderboard_rollups
+
+        count = rebuild_leaderboard_rollups()
+        print(f"Rebuilt {count} leaderboard rollups")
+
+    @app.cli.command("import-songs")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--format", "fmt", type=click.Choice(["csv", "jsonl", "itunes", "itunes-jsonl"]), required=True)
+    @click.option("--batch-size", default=500, show_default=True)
+    def import_songs_command(path, fmt, batch_size):
+        """Bulk import songs, reporting rows that failed validation or were duplicates."""
+        from song_import import import_songs
+
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            report = import_songs(f, fmt, batch_size=batch_size)
+        for error in report.errors:
+            print(f"row {error['row']}: {error['error']}")
+        print(
+            f"Imported {report.imported} of {report.rows} rows "
+            f"({len(report.duplicate_rows)} duplicates, {len(report.errors)} failed)"
+        )
+
+    @app.cli.command("build-song-neighbors")
+    def build_song_neighbors_command():
+        """Recompute item-item song similarities used for recommendations."""
+        from karaoke_recommender import build_song_neighbors
+
+        count = build_song_neighbors()
+        print(f"Stored {count} song neighbours")
+
+    @app.cli.command("estimate-difficulty")
+    def estimate_difficulty_command():
+        """Estimate numeric song difficulty from cached lyrics timelines and scores."""
+        from karaoke_difficulty import estimate_song_difficulty
+
+        count = estimate_song_difficulty()
+        print(f"Estimated difficulty for {count} songs")
+
+    @app.cli.command("rebuild-karaoke-stats")
+    def rebuild_karaoke_stats_command():
+        """Recompute per-user karaoke summaries from the scores table."""
+        from database import rebuild_user_karaoke_stats
+
+        count = rebuild_user_karaoke_stats()
+        print(f"Rebuilt karaoke stats for {count} users")
+
+    @app.cli.command("analyze-vocal-range")
+    def analyze_vocal_range_command():
+        """Fold stored session recordings into users' vocal range profiles."""
+        from karaoke_vocal_range import analyze_recordings
+
+        if not session_recorder.enabled:
+            print("Session recording is disabled (set KARAOKE_RECORDING_DIR)")
+            return
+        count = analyze_recordings(session_recorder.root)
+        print(f"Analysed {count} recorded tracks")
+
+    @app.cli.command("sweep-sessions")
+    def sweep_sessions_command():
+        """Complete karaoke sessions stuck in waiting/active."""
+        count = session_sweeper.sweep()
+        print(f"Completed {count} stale sessions")
+
+    @app.cli.command("refresh-community-stats")
+    def refresh_community_stats_command():
+        """Recompute the community statistics snapshot."""
+        stats = community_stats.refresh()
+        print(f"Community stats computed at {stats['computed_at']}")
 
     # --- Helpers & Decorators (Merged) ---
 
@@ -258,6 +371,26 @@ def api_get_song_lyrics(song_id):
     return get_song_lyrics(song_id)
 
 
+# bulk import songs from CSV, JSONL or an iTunes export
+@app.route("/api/songs/import", methods=["POST"])
+@login_required
+def api_import_songs():
+    from song_import import FORMATS, import_songs
+
+    upload = request.files.get("file")
+    fmt = request.args.get("format") or request.form.get("format")
+    if not fmt and upload and upload.filename:
+        fmt = {"csv": "csv", "jsonl": "jsonl", "json": "itunes"}.get(upload.filename.rsplit(".", 1)[-1].lower())
+    if fmt not in FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(FORMATS)}"}), 400
+
+    raw = upload.stream if upload else request.stream
+    stream = io.TextIOWrapper(raw, encoding="utf-8-sig", errors="replace", newline="")
+    report = import_songs(stream, fmt)
+    lyrics_prefetcher.enqueue(report.song_ids)
+    return jsonify(report.to_dict()), 200
+
+
 # search for a song
 @app.route("/api/songs/search", methods=["GET"])
 @login_required
@@ -302,6 +435,12 @@ def api_get_session(session_id):
     return get_session_info(session_id)
 
 
+@app.route("/api/sessions/<session_id>/recording", methods=["GET"])
+@login_required
+def api_get_session_recording(session_id):
+    return get_session_recording(session_id)
+
+
 @app.route("/api/scores", methods=["POST"])
 @login_required
 def api_submit_score():
@@ -309,6 +448,13 @@ def api_submit_score():
     return submit_score(data)
 
 
+@app.route("/api/scores/batch", methods=["POST"])
+@login_required
+def api_submit_scores_batch():
+    data = request.get_json(silent=True)
+    return submit_scores_batch(data)
+
+
 @app.route("/api/leaderboard", methods=["GET"])
 @login_required
 def api_get_leaderboard():
@@ -320,6 +466,22 @@ def healthz():
     return jsonify({"status": "ok"}), 200
 
 
+@app.route("/karaoke/metrics", methods=["GET"])
+@login_required
+def karaoke_metrics_json():
+    return get_relay_metrics()
+
+
+# Prometheus scrapers authenticate with KARAOKE_METRICS_TOKEN instead of a login
+@app.route("/karaoke/metrics/prometheus", methods=["GET"])
+def karaoke_metrics_prometheus():
+    token = app.config.get("KARAOKE_METRICS_TOKEN")
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if token and secrets.compare_digest(token, supplied):
+        return get_relay_metrics_prometheus()
+    return login_required(get_relay_metrics_prometheus)()
+
+
 @app.route("/api/queue", methods=["GET"])
 @login_required
 def api_get_queue():
@@ -345,86 +507,11 @@ def api_get_user_profile():
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    from database import get_user_stats, get_user_scores, get_recommended_songs
-
-    stats = get_user_stats(user.id) or {}
-    scores = get_user_scores(user.id, limit=100)
-
-    def avg_or_zero(values):
-        clean = [v for v in values if v is not None]
-        if not clean:
-            return 0
-        return round(sum(clean) / len(clean), 1)
-
-    pitch_accuracy = avg_or_zero([s.accuracy for s in scores])
-    rhythm_accuracy = avg_or_zero([s.timing for s in scores])
-    song_completion = avg_or_zero([s.completeness for s in scores])
-
-    average_score = stats.get("average_score", 0)
-    if isinstance(average_score, float):
-        average_score = round(average_score, 1)
-
-    # Favorite genres with counts
-    genre_counts = {}
-    for score in scores:
-        if score.session and score.session.song and score.session.song.genre:
-            genre = score.session.song.genre
-            genre_counts[genre] = genre_counts.get(genre, 0) + 1
-    favorite_genres = sorted(
-        genre_counts.items(), key=lambda x: x[1], reverse=True
-    )[:3]
-    favorite_genres = [
-        {"name": genre, "count": count, "icon": "music"}
-        for genre, count in favorite_genres
-    ]
-
-    # Recent activity
-    recent_activity = []
-    for score in scores[:5]:
-        if score.session and score.session.song:
-            recent_activity.append(
-                {
-                    "song": score.session.song.title,
-                    "artist": score.session.song.artist,
-                    "score": score.score,
-                    "date": score.created_at.strftime("%Y-%m-%d"),
-                }
-            )
-
-    # Recommendations
-    recommendations = []
-    for song in get_recommended_songs(user.id, limit=5):
-        recommendations.append(
-            {
-                "id": song.id,
-                "title": song.title,
-                "artist": song.artist,
-                "difficulty": song.difficulty or "medium",
-                "thumbnail": None,
-            }
-        )
-
-    payload = {
-        "stats": {
-            "totalSessions": stats.get("total_sessions", 0),
-            "totalSongs": stats.get("total_songs", 0),
-            "highestScore": stats.get("highest_score", 0),
-            "averageScore": average_score,
-            "ranking": stats.get("ranking"),
-            "improvementRate": stats.get("improvement_rate", 0),
-        },
-        "skills": {
-            "pitchAccuracy": pitch_accuracy,
-            "rhythmAccuracy": rhythm_accuracy,
-            "vocalRange": average_score or 0,
-            "songCompletion": song_completion,
-        },
-        "favoriteGenres": favorite_genres,
-        "recentActivity": recent_activity,
-        "recommendations": recommendations,
-    }
-
-    return jsonify(payload)
+    payload, etag = profile_cache.get(user.id)
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response.make_conditional(request)
 
 
 @app.route("/api/user/improvement", methods=["GET"])
@@ -436,7 +523,49 @@ def api_get_user_improvement():
 
     from database import get_user_improvement
 
-    return jsonify(get_user_improvement(user.id))
+    try:
+        points = request.args.get("points", type=int)
+        start = _parse_range_arg("from")
+        end = _parse_range_arg("to", end_of_day=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if points is None and request.args.get("points"):
+        return jsonify({"error": "points must be an integer"}), 400
+    if points is not None:
+        points = max(3, min(points, 5000))
+
+    return jsonify(get_user_improvement(user.id, points=points, start=start, end=end))
+
+
+def _parse_range_arg(name, end_of_day=False):
+    """Parse an ISO date/datetime query argument; a bare `to` date includes that whole day"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date (YYYY-MM-DD) or datetime")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(SGT).replace(tzinfo=None)
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+@app.route("/api/community/stats", methods=["GET"])
+@login_required
+def api_get_community_stats():
+    from database import get_community_stats
+
+    return jsonify(get_community_stats())
+
+
+@app.route("/api/community/stats/refresh", methods=["POST"])
+@login_required
+@admin_required
+def api_refresh_community_stats():
+    return jsonify(community_stats.refresh())
 
 
 @app.route("/api/user/sessions", methods=["GET"])
@@ -484,8 +613,9 @@ def scores_delete_score(score_id):
         flash("Score not found or access denied.", "danger")
         return redirect(url_for("scores_my_scores"))
 
-    db.session.delete(score)
-    db.session.commit()
+    from database import delete_score
+
+    delete_score(score)
     flash("Score deleted.", "success")
     return redirect(url_for("scores_my_scores"))
 
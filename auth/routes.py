@@ -23,6 +23,7 @@ from sqlalchemy.exc import IntegrityError
 
 from models import db, User, Hobby, PasswordResetToken, Follow, Notification, Forum, get_sgt_now_naive
 from config import Config
+from rank_index import rank_index
 from validators import (
     validate_login,
     validate_register_step,
@@ -348,8 +349,11 @@ def delete_account():
                 # Delete user (Cascading deletes should handle related data if configured, 
                 # otherwise we might need to manually delete or set null)
                 # For this implementation, we assume cascading or simple user deletion is desired.
+                user_id = user.id
                 db.session.delete(user)
                 db.session.commit()
+                # Their rollups are gone; take them out of everyone's rank
+                rank_index.refresh_users([user_id])
                 
                 # Logout
                 session.clear()
@@ -0,0 +1,204 @@
+"""
+Precomputed community statistics for karaoke dashboards.
+
+get_community_stats used to run its counts, averages, song/genre joins and
+the 30-day hourly aggregation on every call. compute_community_stats() now
+runs them once per snapshot and stores the result in
+community_stats_snapshots. CommunityStats serves the snapshot from memory,
+re-reading the row at most every CHECK_INTERVAL seconds so refreshes made by
+other workers are picked up; a background thread recomputes it once it is
+older than MAX_AGE. refresh() (flask refresh-community-stats, POST
+/api/community/stats/refresh) recomputes immediately.
+"""
+
+import atexit
+import json
+import threading
+import time
+from datetime import timedelta
+
+from sqlalchemy import desc, func
+
+from models import db, get_sgt_now, get_sgt_now_naive, CommunityStatsSnapshot, Score, Session, Song, User
+
+SNAPSHOT_NAME = "community"
+MAX_AGE = 300  # Seconds before a snapshot is recomputed
+CHECK_INTERVAL = 30  # Seconds between re-reads of the snapshot row
+
+
+def compute_community_stats():
+    """Run the community aggregates against the live tables"""
+    total_users = User.query.count()
+    total_sessions = Session.query.count()
+    total_songs = Song.query.count()
+
+    # Average score
+    avg_score_result = db.session.query(func.avg(Score.score)).scalar()
+    avg_score = round(avg_score_result, 1) if avg_score_result else 0
+
+    # Most popular songs
+    popular_songs_result = (
+        db.session.query(Song, func.count(Session.id).label("session_count"))
+        .join(Session)
+        .group_by(Song.id)
+        .order_by(desc("session_count"))
+        .limit(5)
+        .all()
+    )
+
+    popular_songs = [
+        {"song": song.to_dict(), "session_count": session_count}
+        for song, session_count in popular_songs_result
+    ]
+
+    # Most popular genres
+    genre_counts = (
+        db.session.query(Song.genre, func.count(Session.id).label("count"))
+        .join(Session)
+        .group_by(Song.genre)
+        .order_by(desc("count"))
+        .limit(5)
+        .all()
+    )
+
+    genres = [{"genre": genre, "count": count} for genre, count in genre_counts]
+
+    # Activity by time of day (last 30 days)
+    thirty_days_ago = get_sgt_now() - timedelta(days=30)
+    time_data = (
+        db.session.query(
+            func.extract("hour", Session.created_at).label("hour"),
+            func.count(Session.id).label("count"),
+        )
+        .filter(Session.created_at >= thirty_days_ago)
+        .group_by("hour")
+        .all()
+    )
+
+    hourly_activity = [{"hour": int(hour), "count": count} for hour, count in time_data]
+
+    return {
+        "total_users": total_users,
+        "total_sessions": total_sessions,
+        "total_songs": total_songs,
+        "avg_score": avg_score,
+        "popular_songs": popular_songs,
+        "popular_genres": genres,
+        "hourly_activity": hourly_activity,
+    }
+
+
+class CommunityStats:
+    """In-memory copy of the community stats snapshot"""
+
+    def __init__(self, max_age=MAX_AGE, check_interval=CHECK_INTERVAL):
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._stats = None
+        self._computed_at = None
+        self._checked_at = 0.0
+        self._app = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._stopping = False
+
+    def init_app(self, app):
+        self._app = app
+        app.extensions["karaoke_community_stats"] = self
+        atexit.register(self.stop)
+
+    def _is_stale(self, computed_at):
+        return computed_at is None or (
+            get_sgt_now_naive() - computed_at > timedelta(seconds=self.max_age)
+        )
+
+    def _remember(self, stats, computed_at):
+        with self._lock:
+            self._stats = stats
+            self._computed_at = computed_at
+            self._checked_at = time.monotonic()
+
+    def refresh(self):
+        """Recompute the snapshot now and store it; returns the served document"""
+        stats = compute_community_stats()
+        computed_at = get_sgt_now_naive()
+        row = db.session.get(CommunityStatsSnapshot, SNAPSHOT_NAME) or CommunityStatsSnapshot(
+            name=SNAPSHOT_NAME
+        )
+        row.payload = json.dumps(stats, separators=(",", ":"))
+        row.computed_at = computed_at
+        db.session.add(row)
+        db.session.commit()
+        self._remember(stats, computed_at)
+        return self._document(stats, computed_at)
+
+    def _reload(self):
+        """Pick up the stored snapshot; returns False when there is none"""
+        row = db.session.get(CommunityStatsSnapshot, SNAPSHOT_NAME)
+        if row is None:
+            return False
+        self._remember(json.loads(row.payload), row.computed_at)
+        return True
+
+    @staticmethod
+    def _document(stats, computed_at):
+        return dict(stats, computed_at=computed_at.isoformat())
+
+    def get(self):
+        """Community stats with their computed_at freshness timestamp"""
+        with self._lock:
+            stats, computed_at = self._stats, self._computed_at
+            checked = time.monotonic() - self._checked_at < self.check_interval
+        if stats is not None and checked:
+            return self._document(stats, computed_at)
+
+        if not self._reload():
+            return self.refresh()
+        with self._lock:
+            stats, computed_at = self._stats, self._computed_at
+        if self._is_stale(computed_at):
+            if self._app is None:
+                return self.refresh()
+            # Serve the stale snapshot while the background thread recomputes it
+            self._ensure_started()
+            self._wake.set()
+        return self._document(stats, computed_at)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="karaoke-community-stats", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            with self._app.app_context():
+                try:
+                    row = db.session.get(CommunityStatsSnapshot, SNAPSHOT_NAME)
+                    # Another worker may have refreshed it already
+                    if row is None or self._is_stale(row.computed_at):
+                        self.refresh()
+                    else:
+                        self._remember(json.loads(row.payload), row.computed_at)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[CommunityStats] Refresh failed: {e}")
+                finally:
+                    db.session.remove()
+            self._wake.wait(self.max_age)
+            self._wake.clear()
+
+    def stop(self, timeout=2.0):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+
+
+community_stats = CommunityStats()
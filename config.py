@@ -16,6 +16,30 @@ class Config:
     # Uploads
     UPLOAD_FOLDER = os.path.join(os.getcwd(), "instance", "uploads")
 
+    # Karaoke relay hub (see karaoke_hub.py); leave unset to relay in-process
+    KARAOKE_RELAY_SOCKET_DIR = os.environ.get('KARAOKE_RELAY_SOCKET_DIR')
+    KARAOKE_RELAY_WORKERS = int(os.environ.get('KARAOKE_RELAY_WORKERS') or 0)
+
+    # Karaoke session recording (opt-in; see karaoke_recorder.py)
+    KARAOKE_RECORDING_DIR = os.environ.get('KARAOKE_RECORDING_DIR')
+    KARAOKE_RECORDING_SAMPLE_RATE = int(os.environ.get('KARAOKE_RECORDING_SAMPLE_RATE') or 48000)
+    KARAOKE_RECORDING_MAX_BYTES = int(os.environ.get('KARAOKE_RECORDING_MAX_BYTES') or 2 * 1024 ** 3)
+    KARAOKE_RECORDING_MAX_AGE_DAYS = int(os.environ.get('KARAOKE_RECORDING_MAX_AGE_DAYS') or 14)
+
+    # Karaoke relay logging and metrics (see karaoke_metrics.py)
+    KARAOKE_RELAY_LOG_LEVEL = os.environ.get('KARAOKE_RELAY_LOG_LEVEL', 'WARNING')
+    KARAOKE_RELAY_LOG_SAMPLE_EVERY = int(os.environ.get('KARAOKE_RELAY_LOG_SAMPLE_EVERY') or 1000)
+    KARAOKE_METRICS_TOKEN = os.environ.get('KARAOKE_METRICS_TOKEN')
+
+    # Song catalog version marker shared by web workers (see song_catalog.py)
+    SONG_CATALOG_VERSION_FILE = os.environ.get('SONG_CATALOG_VERSION_FILE') or os.path.join(os.getcwd(), "instance", "song_catalog.version")
+
+    # Karaoke live-session registry and stale-session sweeper (see karaoke_sessions.py)
+    KARAOKE_LIVE_SESSIONS_VERSION_FILE = os.environ.get('KARAOKE_LIVE_SESSIONS_VERSION_FILE') or os.path.join(os.getcwd(), "instance", "live_sessions.version")
+    KARAOKE_SESSION_SWEEP_INTERVAL = int(os.environ.get('KARAOKE_SESSION_SWEEP_INTERVAL') or 300)
+    KARAOKE_SESSION_WAITING_TTL = int(os.environ.get('KARAOKE_SESSION_WAITING_TTL') or 2 * 3600)
+    KARAOKE_SESSION_ACTIVE_TTL = int(os.environ.get('KARAOKE_SESSION_ACTIVE_TTL') or 6 * 3600)
+
     # Admin secret key
     ADMIN_SECRET_KEY = os.environ.get('ADMIN_SECRET_KEY', 'ADMIN_SECRET_KEY_2025')
     
@@ -47,6 +71,7 @@ class Config:
 class DevelopmentConfig(Config):
     DEBUG = True
     TESTING = False
+    KARAOKE_RELAY_LOG_LEVEL = os.environ.get('KARAOKE_RELAY_LOG_LEVEL', 'INFO')
 
 class ProductionConfig(Config):
     DEBUG = False
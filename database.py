@@ -1,13 +1,22 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, Date, ForeignKey, Table, func, desc, or_
-from sqlalchemy.orm import DeclarativeBase, sessionmaker, relationship, scoped_session
-from datetime import datetime, timedelta
+from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, Date, ForeignKey, Table, func, or_, text
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import DeclarativeBase, sessionmaker, relationship, scoped_session, joinedload
+from datetime import date, datetime, timedelta
 import json
+import numpy as np
 import pytz
 import random
 
 # Import models for logic functions
-from models import db, Song, Session, SessionParticipant, Score
+from models import db, Song, Session, SessionParticipant, Score, LeaderboardRollup, UserKaraokeStats
 from models import User as AppUser
+from rank_index import rank_index
+from karaoke_profile import profile_cache
+from karaoke_recommender import recommend_songs
+from song_catalog import catalog_changed
+from song_sampler import song_sampler
+from community_stats import community_stats
+from karaoke_timeseries import lttb_indices
 
 SGT = pytz.timezone('Asia/Singapore')
 
@@ -427,25 +436,56 @@ DEFAULT_SONGS = [
 
 def seed_default_songs():
     """Ensure the default song list exists (idempotent)."""
+    keys = {Song.normalize_key(song["title"], song["artist"]): song for song in DEFAULT_SONGS}
     existing = {
-        (title, artist)
-        for title, artist in Song.query.with_entities(Song.title, Song.artist).all()
+        key
+        for (key,) in db.session.query(Song.normalized_key).filter(Song.normalized_key.in_(list(keys)))
     }
 
-    to_add = []
-    for song_data in DEFAULT_SONGS:
-        key = (song_data["title"], song_data["artist"])
-        if key not in existing:
-            to_add.append(Song(**song_data))
+    to_add = [
+        Song(normalized_key=key, **song_data)
+        for key, song_data in keys.items()
+        if key not in existing
+    ]
 
     if not to_add:
         return
 
     db.session.add_all(to_add)
     db.session.commit()
+    catalog_changed()
     print(f"Seeded {len(to_add)} default songs into the database")
 
 
+def ensure_song_normalized_keys():
+    """Add and backfill songs.normalized_key on databases created before it existed"""
+    ensure_column("songs", "normalized_key", "VARCHAR(420)")
+
+    rows = (
+        db.session.query(Song.id, Song.title, Song.artist)
+        .filter(Song.normalized_key.is_(None))
+        .order_by(Song.id)
+        .all()
+    )
+    if not rows:
+        return
+
+    taken = {key for (key,) in db.session.query(Song.normalized_key).filter(Song.normalized_key.isnot(None))}
+    updates = []
+    duplicates = 0
+    for song_id, title, artist in rows:
+        key = Song.normalize_key(title, artist)
+        if key in taken:
+            duplicates += 1  # Keep the older song as the canonical one
+            continue
+        taken.add(key)
+        updates.append({"id": song_id, "normalized_key": key})
+    if updates:
+        db.session.bulk_update_mappings(Song, updates)
+        db.session.commit()
+    print(f"Backfilled normalized keys for {len(updates)} songs ({duplicates} duplicates left unkeyed)")
+
+
 def seed_sample_sessions_and_scores():
     """Seed some sample sessions and scores for demo purposes"""
     users = AppUser.query.all()
@@ -494,6 +534,9 @@ def seed_sample_sessions_and_scores():
             created_at=session.completed_at,
         )
         db.session.add(score)
+        db.session.flush()
+        _apply_score_to_rollups(score)
+        _apply_score_to_user_stats(score)
 
     db.session.commit()
     print(f"Seeded 10 sample sessions with scores")
@@ -542,6 +585,20 @@ def add_participant_to_session(session_id, user_id, role="singer"):
     return participant
 
 
+def get_session_participant_usernames(session_ids):
+    """Usernames of the participants of each session, keyed by public session_id"""
+    rows = (
+        db.session.query(Session.session_id, AppUser.username)
+        .join(SessionParticipant, SessionParticipant.session_id == Session.id)
+        .join(AppUser, AppUser.id == SessionParticipant.user_id)
+        .filter(Session.session_id.in_(set(session_ids)))
+    )
+    participants = {}
+    for session_id, username in rows:
+        participants.setdefault(session_id, set()).add(username)
+    return participants
+
+
 def save_score(
     session_id,
     user_id,
@@ -568,44 +625,434 @@ def save_score(
         notes=notes,
     )
     db.session.add(score_entry)
+    db.session.flush()  # Populate created_at for the rollup period keys
+    _apply_score_to_rollups(score_entry)
+    _apply_score_to_user_stats(score_entry)
     db.session.commit()
+    rank_index.refresh_users([user_id])
+    profile_cache.invalidate(user_id)
     return score_entry
 
 
+def save_scores_batch(records):
+    """Save many score records in one transaction
+
+    Each record is a dict with session_id, username and score, plus optional
+    display_name, mic_time, accuracy, timing, completeness and notes. Users
+    and sessions are resolved with one query each (missing users are created
+    like get_or_create_user does), and the scores, rollups, user stats and
+    session completion are committed together. Returns one item per record:
+    the saved Score, or None when its session does not exist.
+    """
+    sessions = {
+        session.session_id: session
+        for session in Session.query.filter(
+            Session.session_id.in_({record["session_id"] for record in records})
+        )
+    }
+    users = {
+        user.username: user
+        for user in AppUser.query.filter(
+            AppUser.username.in_({record["username"] for record in records})
+        )
+    }
+
+    now = get_sgt_now()
+    saved = []
+    for record in records:
+        session = sessions.get(record["session_id"])
+        if session is None:
+            saved.append(None)
+            continue
+
+        username, display_name = record["username"], record.get("display_name")
+        user = users.get(username)
+        if user is None:
+            user = AppUser(username=username, display_name=display_name or username, email=f"{username}@example.com")
+            user.set_password("password123")  # Default password for auto-created users
+            db.session.add(user)
+            db.session.flush()
+            users[username] = user
+        elif display_name and user.display_name != display_name:
+            user.display_name = display_name
+
+        score_entry = Score(
+            session_id=session.id,
+            user_id=user.id,
+            score=record["score"],
+            mic_time=record.get("mic_time") or 0,
+            accuracy=record.get("accuracy"),
+            timing=record.get("timing"),
+            completeness=record.get("completeness"),
+            notes=record.get("notes"),
+        )
+        db.session.add(score_entry)
+        db.session.flush()
+        _apply_score_to_rollups(score_entry)
+        _apply_score_to_user_stats(score_entry)
+
+        if session.status != "completed":
+            session.status = "completed"
+            session.completed_at = now
+        saved.append(score_entry)
+
+    db.session.commit()
+
+    scores = [score_entry for score_entry in saved if score_entry is not None]
+    if scores:
+        user_ids = {score_entry.user_id for score_entry in scores}
+        rank_index.refresh_users(user_ids)
+        for user_id in user_ids:
+            profile_cache.invalidate(user_id)
+    return saved
+
+
+def delete_score(score_entry):
+    """Delete a score and take it out of the leaderboard rollups in the same transaction"""
+    user_id = score_entry.user_id
+    _remove_score_from_rollups(score_entry)
+    _remove_score_from_user_stats(score_entry)
+    db.session.delete(score_entry)
+    db.session.commit()
+    rank_index.refresh_users([user_id])
+    profile_cache.invalidate(user_id)
+
+
+# Leaderboard rollups
+# -----------------------------------------------------------------------------
+# One LeaderboardRollup row per (period_kind, period_start, user_id) holds the
+# user's totals for that calendar week (Monday start), month, year or all time,
+# so leaderboard reads are an indexed top-N over a single period instead of a
+# GROUP BY over every score.
+
+ROLLUP_PERIODS = ("week", "month", "year", "all")
+ALL_TIME_START = date(1970, 1, 1)
+
+
+def _rollup_period_starts(moment):
+    """Return [(period_kind, period_start)] for every period a timestamp falls into"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(SGT)
+    day = moment.date()
+    return [
+        ("week", day - timedelta(days=day.weekday())),
+        ("month", day.replace(day=1)),
+        ("year", day.replace(month=1, day=1)),
+        ("all", ALL_TIME_START),
+    ]
+
+
+def _rollup_period_end(period_kind, period_start):
+    if period_kind == "week":
+        return period_start + timedelta(days=7)
+    if period_kind == "month":
+        if period_start.month == 12:
+            return period_start.replace(year=period_start.year + 1, month=1)
+        return period_start.replace(month=period_start.month + 1)
+    if period_kind == "year":
+        return period_start.replace(year=period_start.year + 1)
+    return None
+
+
+def current_period_start(period_kind):
+    return dict(_rollup_period_starts(get_sgt_now()))[period_kind]
+
+
+def _apply_score_to_rollups(score_entry):
+    """Add a score to its rollups (caller commits)"""
+    moment = score_entry.created_at or get_sgt_now()
+    for period_kind, period_start in _rollup_period_starts(moment):
+        rollup = LeaderboardRollup.query.filter_by(
+            period_kind=period_kind, period_start=period_start, user_id=score_entry.user_id
+        ).first()
+        if rollup is None:
+            rollup = LeaderboardRollup(
+                period_kind=period_kind,
+                period_start=period_start,
+                user_id=score_entry.user_id,
+                total_mic_time=0,
+                session_count=0,
+                score_sum=0,
+                max_score=0,
+            )
+            db.session.add(rollup)
+        rollup.total_mic_time += score_entry.mic_time or 0
+        rollup.session_count += 1
+        rollup.score_sum += score_entry.score
+        rollup.max_score = max(rollup.max_score, score_entry.score)
+    db.session.flush()
+
+
+def _remove_score_from_rollups(score_entry):
+    """Subtract a score from its rollups (caller commits)"""
+    for period_kind, period_start in _rollup_period_starts(score_entry.created_at):
+        rollup = LeaderboardRollup.query.filter_by(
+            period_kind=period_kind, period_start=period_start, user_id=score_entry.user_id
+        ).first()
+        if rollup is None:
+            continue
+        rollup.session_count -= 1
+        if rollup.session_count <= 0:
+            db.session.delete(rollup)
+            continue
+        rollup.total_mic_time -= score_entry.mic_time or 0
+        rollup.score_sum -= score_entry.score
+        if score_entry.score >= rollup.max_score:
+            # The max can't be decremented; recompute it for this period only
+            query = db.session.query(func.max(Score.score)).filter(
+                Score.user_id == score_entry.user_id, Score.id != score_entry.id
+            )
+            period_end = _rollup_period_end(period_kind, period_start)
+            if period_end is not None:
+                query = query.filter(
+                    Score.created_at >= datetime.combine(period_start, datetime.min.time()),
+                    Score.created_at < datetime.combine(period_end, datetime.min.time()),
+                )
+            rollup.max_score = query.scalar() or 0
+    db.session.flush()
+
+
+def rebuild_leaderboard_rollups(batch_size=5000):
+    """Recompute every leaderboard rollup from the scores table"""
+    totals = {}
+    rows = (
+        db.session.query(Score.user_id, Score.created_at, Score.mic_time, Score.score)
+        .execution_options(yield_per=batch_size)
+    )
+    for user_id, created_at, mic_time, score in rows:
+        if created_at is None:
+            continue
+        for period_kind, period_start in _rollup_period_starts(created_at):
+            key = (period_kind, period_start, user_id)
+            entry = totals.get(key)
+            if entry is None:
+                entry = totals[key] = [0, 0, 0, 0]
+            entry[0] += mic_time or 0
+            entry[1] += 1
+            entry[2] += score
+            entry[3] = max(entry[3], score)
+
+    LeaderboardRollup.query.delete()
+    mappings = [
+        {
+            "period_kind": period_kind,
+            "period_start": period_start,
+            "user_id": user_id,
+            "total_mic_time": mic_time,
+            "session_count": sessions,
+            "score_sum": score_sum,
+            "max_score": max_score,
+        }
+        for (period_kind, period_start, user_id), (mic_time, sessions, score_sum, max_score) in totals.items()
+    ]
+    for i in range(0, len(mappings), batch_size):
+        db.session.bulk_insert_mappings(LeaderboardRollup, mappings[i:i + batch_size])
+    db.session.commit()
+    rank_index.build()
+    return len(mappings)
+
+
+def ensure_leaderboard_rollups():
+    """Build rollups for databases that have scores from before rollups existed"""
+    if LeaderboardRollup.query.first() is None and Score.query.first() is not None:
+        count = rebuild_leaderboard_rollups()
+        print(f"Built {count} leaderboard rollups from existing scores")
+
+
+# Per-user karaoke stats
+#
+# user_karaoke_stats keeps what get_user_stats and get_recommended_songs used
+# to derive by walking every score -> session -> song: totals, best score, the
+# oldest/newest three scores (for improvement rate) and per-genre,
+# per-difficulty and per-song tallies.
+
+SCORE_WINDOW = 3
+
+
+def _window_timestamp(created_at):
+    """Naive SGT isoformat, as the column reads back, so window entries compare as strings"""
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(SGT).replace(tzinfo=None)
+    return created_at.isoformat()
+
+
+def _score_window_entry(score_entry):
+    return [_window_timestamp(score_entry.created_at), score_entry.id, score_entry.score]
+
+
+def _add_to_totals(totals, key, score):
+    entry = totals.setdefault(key, [0, 0])
+    entry[0] += score
+    entry[1] += 1
+
+
+def _subtract_from_totals(totals, key, score):
+    entry = totals.get(key)
+    if entry is None:
+        return
+    entry[0] -= score
+    entry[1] -= 1
+    if entry[1] <= 0:
+        del totals[key]
+
+
+def _accumulate_user_stats(stats, score_entry, song):
+    stats.total_sessions = (stats.total_sessions or 0) + 1
+    stats.score_sum = (stats.score_sum or 0) + score_entry.score
+    stats.best_score = max(stats.best_score or 0, score_entry.score)
+    stats.total_mic_time = (stats.total_mic_time or 0) + (score_entry.mic_time or 0)
+
+    entry = _score_window_entry(score_entry)
+    stats.store("first_scores", sorted(stats.load("first_scores") + [entry])[:SCORE_WINDOW])
+    stats.store("last_scores", sorted(stats.load("last_scores") + [entry])[-SCORE_WINDOW:])
+
+    if song:
+        genres = stats.load("genre_totals")
+        _add_to_totals(genres, song.genre, score_entry.score)
+        stats.store("genre_totals", genres)
+
+        difficulties = stats.load("difficulty_totals")
+        _add_to_totals(difficulties, song.difficulty, score_entry.score)
+        stats.store("difficulty_totals", difficulties)
+
+        songs = stats.load("song_counts")
+        songs[str(song.id)] = songs.get(str(song.id), 0) + 1
+        stats.store("song_counts", songs)
+
+
+def _apply_score_to_user_stats(score_entry):
+    """Add a score to its user's summary (caller commits)"""
+    stats = db.session.get(UserKaraokeStats, score_entry.user_id)
+    if stats is None:
+        stats = UserKaraokeStats(user_id=score_entry.user_id)
+        db.session.add(stats)
+    song = score_entry.session.song if score_entry.session else None
+    _accumulate_user_stats(stats, score_entry, song)
+    db.session.flush()
+
+
+def _score_window(user_id, newest, exclude_score_id=None):
+    """Oldest or newest SCORE_WINDOW scores of a user, oldest first"""
+    query = db.session.query(Score.created_at, Score.id, Score.score).filter(
+        Score.user_id == user_id, Score.id != exclude_score_id
+    )
+    if newest:
+        query = query.order_by(Score.created_at.desc(), Score.id.desc())
+    else:
+        query = query.order_by(Score.created_at, Score.id)
+    return sorted(
+        [_window_timestamp(created_at), score_id, score]
+        for created_at, score_id, score in query.limit(SCORE_WINDOW)
+    )
+
+
+def _remove_score_from_user_stats(score_entry):
+    """Subtract a score from its user's summary (caller commits and deletes the score)"""
+    stats = db.session.get(UserKaraokeStats, score_entry.user_id)
+    if stats is None:
+        return
+
+    stats.total_sessions -= 1
+    if stats.total_sessions <= 0:
+        db.session.delete(stats)
+        return
+    stats.score_sum -= score_entry.score
+    stats.total_mic_time -= score_entry.mic_time or 0
+
+    song = score_entry.session.song if score_entry.session else None
+    if song:
+        genres = stats.load("genre_totals")
+        _subtract_from_totals(genres, song.genre, score_entry.score)
+        stats.store("genre_totals", genres)
+
+        difficulties = stats.load("difficulty_totals")
+        _subtract_from_totals(difficulties, song.difficulty, score_entry.score)
+        stats.store("difficulty_totals", difficulties)
+
+        songs = stats.load("song_counts")
+        remaining = songs.pop(str(song.id), 0) - 1
+        if remaining > 0:
+            songs[str(song.id)] = remaining
+        stats.store("song_counts", songs)
+
+    # Recompute only what the removed score may have been part of
+    if score_entry.score >= stats.best_score:
+        stats.best_score = (
+            db.session.query(func.max(Score.score))
+            .filter(Score.user_id == score_entry.user_id, Score.id != score_entry.id)
+            .scalar()
+            or 0
+        )
+    for column, newest in (("first_scores", False), ("last_scores", True)):
+        if any(score_id == score_entry.id for _, score_id, _ in stats.load(column)):
+            stats.store(column, _score_window(score_entry.user_id, newest, score_entry.id))
+
+
+def rebuild_user_karaoke_stats():
+    """Recompute every user's karaoke summary from the scores table"""
+    UserKaraokeStats.query.delete()
+    summaries = {}
+    scores = (
+        Score.query.options(joinedload(Score.session).joinedload(Session.song))
+        .order_by(Score.created_at, Score.id)
+        .all()
+    )
+    for score in scores:
+        stats = summaries.get(score.user_id)
+        if stats is None:
+            stats = summaries[score.user_id] = UserKaraokeStats(user_id=score.user_id)
+        _accumulate_user_stats(stats, score, score.session.song if score.session else None)
+    db.session.add_all(summaries.values())
+    db.session.commit()
+    return len(summaries)
+
+
+def ensure_user_karaoke_stats():
+    """Build summaries for databases that have scores from before they existed"""
+    if UserKaraokeStats.query.first() is None and Score.query.first() is not None:
+        count = rebuild_user_karaoke_stats()
+        print(f"Built karaoke stats for {count} users")
+
+
+def ensure_column(table, column, ddl):
+    """Add a nullable column to a table created before it existed (db.create_all only adds tables)"""
+    columns = {existing["name"] for existing in sa_inspect(db.engine).get_columns(table)}
+    if column not in columns:
+        with db.engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def ensure_indexes(*models):
+    """Create indexes declared on tables that already existed (db.create_all only adds tables)"""
+    for model in models:
+        for index in model.__table__.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+
 def get_leaderboard(limit=10, period=None):
     """Get top users by total karaoke time with optional time period filter
 
     period: 'week', 'month', 'year', or None (all time)
     Returns list of dicts with user info and total mic time
     """
-    query = (
+    period_kind = period if period in ("week", "month", "year") else "all"
+
+    results = (
         db.session.query(
             AppUser,
-            func.sum(Score.mic_time).label("total_mic_time"),
-            func.count(Score.id).label("session_count"),
+            LeaderboardRollup.total_mic_time,
+            LeaderboardRollup.session_count,
         )
-        .select_from(AppUser)
-        .join(Score, Score.user_id == AppUser.id)
-        .group_by(AppUser.id)
+        .join(LeaderboardRollup, LeaderboardRollup.user_id == AppUser.id)
+        .filter(
+            LeaderboardRollup.period_kind == period_kind,
+            LeaderboardRollup.period_start == current_period_start(period_kind),
+        )
+        .order_by(LeaderboardRollup.total_mic_time.desc())
+        .limit(limit)
+        .all()
     )
 
-    # Apply time period filter if specified
-    if period:
-        now = get_sgt_now()
-        if period == "week":
-            start_date = now - timedelta(days=7)
-        elif period == "month":
-            start_date = now.replace(day=1)
-        elif period == "year":
-            start_date = now.replace(month=1, day=1)
-        else:
-            start_date = None
-
-        if start_date:
-            query = query.filter(Score.created_at >= start_date)
-
-    results = query.order_by(desc("total_mic_time")).limit(limit).all()
-
     # Format results as list of dicts with user and time info
     leaderboard_data = []
     for user, total_time, session_count in results:
@@ -648,8 +1095,8 @@ def get_user_stats(user_id):
     if not user:
         return None
 
-    scores = Score.query.filter_by(user_id=user_id).all()
-    if not scores:
+    stats = db.session.get(UserKaraokeStats, user_id)
+    if not stats or not stats.total_sessions:
         return {
             "user": user.to_dict(),
             "total_sessions": 0,
@@ -661,66 +1108,31 @@ def get_user_stats(user_id):
             "ranking": None,
         }
 
-    # Count unique songs
-    unique_song_ids = set()
-    for score in scores:
-        if score.session and score.session.song:
-            unique_song_ids.add(score.session.song_id)
-
     # Calculate improvement rate (average of last 3 scores vs first 3 scores)
-    chronological_scores = sorted(scores, key=lambda s: s.created_at)
-    first_scores = (
-        chronological_scores[:3]
-        if len(chronological_scores) >= 3
-        else chronological_scores
-    )
-    last_scores = (
-        chronological_scores[-3:]
-        if len(chronological_scores) >= 3
-        else chronological_scores
-    )
+    first_scores = [score for _, _, score in stats.load("first_scores")]
+    last_scores = [score for _, _, score in stats.load("last_scores")]
 
-    avg_first = (
-        sum(s.score for s in first_scores) / len(first_scores) if first_scores else 0
-    )
-    avg_last = (
-        sum(s.score for s in last_scores) / len(last_scores) if last_scores else 0
-    )
+    avg_first = sum(first_scores) / len(first_scores) if first_scores else 0
+    avg_last = sum(last_scores) / len(last_scores) if last_scores else 0
 
     improvement_rate = 0
     if avg_first > 0:
         improvement_rate = ((avg_last - avg_first) / avg_first) * 100
 
-    # Find favorite genres (most played)
-    genre_counts = {}
-    for score in scores:
-        if score.session and score.session.song:
-            genre = score.session.song.genre
-            if genre in genre_counts:
-                genre_counts[genre] += 1
-            else:
-                genre_counts[genre] = 1
-
-    # Sort genres by count and get top 3
-    favorite_genres = sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)[:3]
-    favorite_genres = [genre for genre, count in favorite_genres]
+    # Find favorite genres (most played), top 3
+    genre_totals = stats.load("genre_totals")
+    favorite_genres = sorted(genre_totals.items(), key=lambda x: x[1][1], reverse=True)[:3]
+    favorite_genres = [genre for genre, _ in favorite_genres]
 
     # Get user global ranking
-    user_best_score = max(s.score for s in scores)
-    better_users = (
-        Score.query.filter(Score.score > user_best_score)
-        .with_entities(Score.user_id)
-        .distinct()
-        .count()
-    )
-    ranking = better_users + 1  # Add 1 to convert from 0-indexed to 1-indexed ranking
+    ranking = rank_index.best_score_rank(stats.best_score)
 
     return {
         "user": user.to_dict(),
-        "total_sessions": len(scores),
-        "average_score": sum(s.score for s in scores) / len(scores),
-        "highest_score": max(s.score for s in scores),
-        "total_songs": len(unique_song_ids),
+        "total_sessions": stats.total_sessions,
+        "average_score": stats.average_score,
+        "highest_score": stats.best_score,
+        "total_songs": len(stats.sung_song_ids),
         "favorite_genres": favorite_genres,
         "improvement_rate": round(improvement_rate, 1),
         "ranking": ranking,
@@ -729,20 +1141,23 @@ def get_user_stats(user_id):
 
 def get_monthly_top_players(limit=3):
     """Get top players for the current month based on number of sessions played"""
-    now = get_sgt_now()
-    first_day_of_month = datetime(now.year, now.month, 1)
+    avg_score = (
+        LeaderboardRollup.score_sum * 1.0 / LeaderboardRollup.session_count
+    ).label("avg_score")
 
     result = (
         db.session.query(
             AppUser,
-            func.count(Score.id).label("session_count"),
-            func.avg(Score.score).label("avg_score"),
-            func.max(Score.score).label("max_score"),
+            LeaderboardRollup.session_count,
+            avg_score,
+            LeaderboardRollup.max_score,
         )
-        .join(Score)
-        .filter(Score.created_at >= first_day_of_month)
-        .group_by(AppUser.id)
-        .order_by(func.count(Score.id).desc(), func.avg(Score.score).desc())
+        .join(LeaderboardRollup, LeaderboardRollup.user_id == AppUser.id)
+        .filter(
+            LeaderboardRollup.period_kind == "month",
+            LeaderboardRollup.period_start == current_period_start("month"),
+        )
+        .order_by(LeaderboardRollup.session_count.desc(), avg_score.desc())
         .limit(limit)
         .all()
     )
@@ -764,44 +1179,28 @@ def get_recommended_songs(user_id, limit=5):
     if not user:
         return []
 
-    # Get user's previously sung songs
-    user_scores = Score.query.filter_by(user_id=user_id).all()
-    sung_song_ids = set()
+    stats = db.session.get(UserKaraokeStats, user_id)
 
-    if not user_scores:
+    if not stats or not stats.total_sessions:
         # For new users without history, recommend easy songs
-        return (
-            Song.query.filter_by(difficulty="easy")
-            .order_by(func.random())
-            .limit(limit)
-            .all()
-        )
+        return song_sampler.sample(limit, difficulties=["easy"])
 
-    # Determine favorite genres and difficulties based on history
-    genre_scores = {}
-    difficulty_scores = {}
+    # Songs similar to what the user has sung, from the item-item neighbour table
+    collaborative = recommend_songs(user_id, limit=limit)
+    if len(collaborative) >= limit:
+        return collaborative
 
-    for score in user_scores:
-        if score.session and score.session.song:
-            song = score.session.song
-            sung_song_ids.add(song.id)
+    # Not enough neighbours yet (new songs or sparse history): fill with the
+    # genre/difficulty heuristic below
+    limit -= len(collaborative)
 
-            # Track genres user performs well in
-            if song.genre not in genre_scores:
-                genre_scores[song.genre] = []
-            genre_scores[song.genre].append(score.score)
-
-            # Track difficulties user performs well in
-            if song.difficulty not in difficulty_scores:
-                difficulty_scores[song.difficulty] = []
-            difficulty_scores[song.difficulty].append(score.score)
-
-    # Calculate average scores for each genre and difficulty
+    # Previously sung songs, and average scores for each genre and difficulty
+    sung_song_ids = stats.sung_song_ids | {song.id for song in collaborative}
     avg_genre_scores = {
-        genre: sum(scores) / len(scores) for genre, scores in genre_scores.items()
+        genre: total / count for genre, (total, count) in stats.load("genre_totals").items()
     }
     avg_difficulty_scores = {
-        diff: sum(scores) / len(scores) for diff, scores in difficulty_scores.items()
+        diff: total / count for diff, (total, count) in stats.load("difficulty_totals").items()
     }
 
     # Find top performing genre and appropriate difficulty
@@ -835,37 +1234,27 @@ def get_recommended_songs(user_id, limit=5):
     else:
         target_difficulties = ["easy", "medium"]
 
-    # Build query based on preferences
-    query = Song.query.filter(~Song.id.in_(sung_song_ids) if sung_song_ids else True)
-
+    # Sample based on preferences
+    genres = None
     if top_genre:
         # 70% chance to recommend songs from favorite genre
         if random.random() < 0.7:
-            query = query.filter(Song.genre == top_genre)
-
-    query = query.filter(Song.difficulty.in_(target_difficulties))
+            genres = [top_genre]
 
     # Get recommendations
-    recommendations = query.order_by(func.random()).limit(limit).all()
+    recommendations = song_sampler.sample(
+        limit, genres=genres, difficulties=target_difficulties, exclude=sung_song_ids
+    )
 
     # If not enough recommendations, fill with random songs they haven't sung
     if len(recommendations) < limit:
         remaining = limit - len(recommendations)
-        existing_ids = [song.id for song in recommendations]
-        additional = (
-            Song.query.filter(
-                ~Song.id.in_(list(sung_song_ids) + existing_ids)
-                if sung_song_ids or existing_ids
-                else True
-            )
-            .order_by(func.random())
-            .limit(remaining)
-            .all()
-        )
+        existing_ids = {song.id for song in recommendations}
+        additional = song_sampler.sample(remaining, exclude=sung_song_ids | existing_ids)
 
         recommendations.extend(additional)
 
-    return recommendations
+    return collaborative + recommendations
 
 
 def search_songs(search_term, genre=None, difficulty=None, limit=20):
@@ -889,31 +1278,57 @@ def search_songs(search_term, genre=None, difficulty=None, limit=20):
     return query.order_by(Song.title).limit(limit).all()
 
 
-def get_user_improvement(user_id):
-    """Get user's improvement over time for visualization"""
-    scores = Score.query.filter_by(user_id=user_id).order_by(Score.created_at).all()
+def get_user_improvement(user_id, points=None, start=None, end=None):
+    """Get user's improvement over time for visualization
 
-    if not scores:
+    Scores created in [start, end) are fetched in one query joined to their
+    song; when points is given the series is downsampled with LTTB over the
+    score, accuracy, timing and completeness values.
+    """
+    query = (
+        db.session.query(
+            Score.created_at,
+            Score.score,
+            Score.accuracy,
+            Score.timing,
+            Score.completeness,
+            Song.title,
+        )
+        .select_from(Score)
+        .outerjoin(Session, Score.session_id == Session.id)
+        .outerjoin(Song, Session.song_id == Song.id)
+        .filter(Score.user_id == user_id)
+    )
+    if start is not None:
+        query = query.filter(Score.created_at >= start)
+    if end is not None:
+        query = query.filter(Score.created_at < end)
+    rows = query.order_by(Score.created_at, Score.id).all()
+
+    if not rows:
         return []
 
-    result = []
-    for score in scores:
-        result.append(
-            {
-                "date": score.created_at.strftime("%Y-%m-%d"),
-                "score": score.score,
-                "song_title": score.session.song.title
-                if score.session and score.session.song
-                else "Unknown",
-                "metrics": {
-                    "accuracy": score.accuracy,
-                    "timing": score.timing,
-                    "completeness": score.completeness,
-                },
-            }
-        )
+    if points is not None and len(rows) > points:
+        x = np.array([row.created_at.timestamp() for row in rows])
+        ys = np.array(
+            [[row.score, row.accuracy, row.timing, row.completeness] for row in rows],
+            dtype=float,
+        ).T
+        rows = [rows[i] for i in lttb_indices(x, ys, points)]
 
-    return result
+    return [
+        {
+            "date": row.created_at.strftime("%Y-%m-%d"),
+            "score": row.score,
+            "song_title": row.title or "Unknown",
+            "metrics": {
+                "accuracy": row.accuracy,
+                "timing": row.timing,
+                "completeness": row.completeness,
+            },
+        }
+        for row in rows
+    ]
 
 
 def get_user_ranking(user_id):
@@ -922,17 +1337,10 @@ def get_user_ranking(user_id):
     if not user:
         return None
 
-    # Get user's total mic time and stats
-    user_stats = (
-        db.session.query(
-            func.sum(Score.mic_time).label("total_mic_time"),
-            func.count(Score.id).label("total_sessions"),
-            func.avg(Score.score).label("avg_score"),
-            func.max(Score.score).label("highest_score"),
-        )
-        .filter(Score.user_id == user_id)
-        .first()
-    )
+    # Get user's total mic time and stats from the all-time rollup
+    user_stats = LeaderboardRollup.query.filter_by(
+        user_id=user_id, period_kind="all"
+    ).first()
 
     if not user_stats or not user_stats.total_mic_time:
         return {
@@ -944,22 +1352,14 @@ def get_user_ranking(user_id):
         }
 
     # Calculate ranking based on total mic time
-    # Count users with more total mic time
-    better_users_count = (
-        db.session.query(Score.user_id)
-        .group_by(Score.user_id)
-        .having(func.sum(Score.mic_time) > user_stats.total_mic_time)
-        .count()
-    )
-
-    ranking = better_users_count + 1
+    ranking = rank_index.mic_time_rank(user_stats.total_mic_time)
 
     return {
         "ranking": ranking,
         "total_mic_time": int(user_stats.total_mic_time or 0),
-        "total_sessions": user_stats.total_sessions,
-        "avg_score": round(float(user_stats.avg_score or 0), 1),
-        "highest_score": int(user_stats.highest_score or 0),
+        "total_sessions": user_stats.session_count,
+        "avg_score": round(user_stats.score_sum / user_stats.session_count, 1),
+        "highest_score": int(user_stats.max_score or 0),
     }
 
 
@@ -979,62 +1379,5 @@ def get_user_active_sessions(user_id):
 
 
 def get_community_stats():
-    """Get overall community statistics"""
-    total_users = AppUser.query.count()
-    total_sessions = Session.query.count()
-    total_songs = Song.query.count()
-
-    # Average score
-    avg_score_result = db.session.query(func.avg(Score.score)).scalar()
-    avg_score = round(avg_score_result, 1) if avg_score_result else 0
-
-    # Most popular songs
-    popular_songs_result = (
-        db.session.query(Song, func.count(Session.id).label("session_count"))
-        .join(Session)
-        .group_by(Song.id)
-        .order_by(desc("session_count"))
-        .limit(5)
-        .all()
-    )
-
-    popular_songs = [
-        {"song": song.to_dict(), "session_count": session_count}
-        for song, session_count in popular_songs_result
-    ]
-
-    # Most popular genres
-    genre_counts = (
-        db.session.query(Song.genre, func.count(Session.id).label("count"))
-        .join(Session)
-        .group_by(Song.genre)
-        .order_by(desc("count"))
-        .limit(5)
-        .all()
-    )
-
-    genres = [{"genre": genre, "count": count} for genre, count in genre_counts]
-
-    # Activity by time of day (last 30 days)
-    thirty_days_ago = get_sgt_now() - timedelta(days=30)
-    time_data = (
-        db.session.query(
-            func.extract("hour", Session.created_at).label("hour"),
-            func.count(Session.id).label("count"),
-        )
-        .filter(Session.created_at >= thirty_days_ago)
-        .group_by("hour")
-        .all()
-    )
-
-    hourly_activity = [{"hour": int(hour), "count": count} for hour, count in time_data]
-
-    return {
-        "total_users": total_users,
-        "total_sessions": total_sessions,
-        "total_songs": total_songs,
-        "avg_score": avg_score,
-        "popular_songs": popular_songs,
-        "popular_genres": genres,
-        "hourly_activity": hourly_activity,
-    }
+    """Get overall community statistics (served from the precomputed snapshot)"""
+    return community_stats.get()
@@ -278,7 +278,30 @@ def apply_migrations(conn):
         print("Migration: Adding 'created_by' to events")
         cursor.execute("ALTER TABLE events ADD COLUMN created_by INTEGER")
 
+    # Normalized dates for range queries (generated columns are only listed by table_xinfo)
+    cursor.execute("PRAGMA table_xinfo(events)")
+    all_event_columns = [info[1] for info in cursor.fetchall()]
+    if "start_on" not in all_event_columns:
+        print("Migration: Adding 'start_on' to events")
+        cursor.execute("ALTER TABLE events ADD COLUMN start_on TEXT GENERATED ALWAYS AS (date(start_date)) VIRTUAL")
+    if "end_on" not in all_event_columns:
+        print("Migration: Adding 'end_on' to events")
+        cursor.execute("ALTER TABLE events ADD COLUMN end_on TEXT GENERATED ALWAYS AS (date(end_date)) VIRTUAL")
+
+    conn.commit()
+
+
+def create_indexes(conn):
+    """Creates the indexes used by the event queries (same as DatabaseHelper.create_events_tables)."""
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_events_visibility_start ON events (visibility, start_date, created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_events_host_start ON events (host_id, start_on)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_event_participants_user_status ON event_participants (user_id, status)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS ix_event_participants_event_status_joined "
+        "ON event_participants (event_id, status, joined_at)"
+    )
     conn.commit()
+    print("Checked/Created event indexes")
 
 
 def seed_existing_data(conn):
@@ -334,6 +357,7 @@ def init_db():
         
         # Apply Migrations (for existing DBs)
         apply_migrations(conn)
+        create_indexes(conn)
         
         # Seed Data (for new DBs)
         seed_existing_data(conn)
@@ -12,4 +12,13 @@ then
   fi
 fi
 
-exec gunicorn -k eventlet -w 1 -b 0.0.0.0:5000 app:app
+# Karaoke sessions are pinned to relay processes, so the web tier can scale out
+# only when the relay hub is running; otherwise keep a single worker.
+if [ "${KARAOKE_RELAY_WORKERS:-0}" -gt 0 ]
+then
+  export KARAOKE_RELAY_SOCKET_DIR="${KARAOKE_RELAY_SOCKET_DIR:-/tmp/kk-relay}"
+  python karaoke_hub.py --socket-dir "$KARAOKE_RELAY_SOCKET_DIR" --workers "$KARAOKE_RELAY_WORKERS" &
+  WEB_WORKERS="${WEB_WORKERS:-$KARAOKE_RELAY_WORKERS}"
+fi
+
+exec gunicorn -k eventlet -w "${WEB_WORKERS:-1}" -b 0.0.0.0:5000 app:app
@@ -0,0 +1,172 @@
+"""
+Interest-match scoring for event discovery.
+
+events.calculate_match_score scores one event for one user: each interest
+found in the description adds its weight, each interest tag on the event adds
+twice its weight. InterestMatcher produces the same scores for every event at
+once:
+
+- a vocabulary maps interest terms to columns,
+- a sparse events x terms matrix holds (term in description) + 2 * (times the
+  term is a tag) per cell, and
+- a user's interest weights become a dense vector over the vocabulary, so
+  scoring all events is one sparse mat-vec.
+
+The matrix follows the events table through the event_changes log that
+EventDBHelper's triggers fill on insert, edit and delete: only changed events
+are re-read. Terms first seen in a user's interests get a new column computed
+over the cached descriptions. Per-user score vectors are cached until the
+user's interests or the matrix change.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+USER_CACHE_SIZE = 1024  # Users whose score vectors are kept per worker
+
+
+def _parse_tags(tags_str: Optional[str]) -> List[str]:
+    # Same split as calculate_match_score (empty tags included)
+    return [t.strip().lower() for t in tags_str.split(",")] if tags_str else []
+
+
+def _interest_terms(raw: Optional[str]) -> List[str]:
+    # Same formats as events._get_user_interests_dict: JSON weights or a CSV list
+    if not raw:
+        return []
+    try:
+        interests = json.loads(raw)
+    except json.JSONDecodeError:
+        return [tag.strip().lower() for tag in raw.split(",") if tag.strip()]
+    return list(interests) if isinstance(interests, dict) else []
+
+
+def _cell(term: str, description: str, tags: List[str]) -> float:
+    return float(term in description) + 2.0 * tags.count(term)
+
+
+class InterestMatcher:
+    """Per-worker event x interest-term matrix with cached per-user scores"""
+
+    def __init__(self, db_helper, user_cache_size: int = USER_CACHE_SIZE):
+        self.db = db_helper
+        self.user_cache_size = user_cache_size
+        self._lock = threading.RLock()
+        self._fields: Dict[int, Tuple[str, List[str]]] = {}  # event_id -> (lowercase description, tags)
+        self._cells: Dict[int, Dict[int, float]] = {}  # event_id -> {column: value}
+        self._vocab: Dict[str, int] = {}
+        self._seq: Optional[int] = None  # Last event_changes seq applied
+        self._matrix = None
+        self._rows: Dict[int, int] = {}  # event_id -> matrix row
+        self._generation = 0  # Bumped whenever the matrix changes
+        self._users: "OrderedDict[int, tuple]" = OrderedDict()  # user_id -> (interests, generation, scores)
+
+    # --- Matrix maintenance ---
+
+    def _set_event(self, event_id: int, description: Optional[str], tags_str: Optional[str]) -> None:
+        desc = description.lower() if description else ""
+        tags = _parse_tags(tags_str)
+        self._fields[event_id] = (desc, tags)
+        cells = {}
+        for term, column in self._vocab.items():
+            value = _cell(term, desc, tags)
+            if value:
+                cells[column] = value
+        self._cells[event_id] = cells
+
+    def _add_terms(self, terms) -> bool:
+        new_terms = [t for t in terms if t not in self._vocab]
+        for term in new_terms:
+            column = len(self._vocab)
+            self._vocab[term] = column
+            for event_id, (desc, tags) in self._fields.items():
+                value = _cell(term, desc, tags)
+                if value:
+                    self._cells[event_id][column] = value
+        return bool(new_terms)
+
+    def _reload(self, newest_seq: int) -> None:
+        self._fields.clear()
+        self._cells.clear()
+        for user_row in self.db.get_all_users():
+            self._add_terms(_interest_terms(user_row[3]))
+        rows = self.db.get_event_match_fields()
+        # Every event tag is a term a user can pick up via _update_user_interest_weights
+        self._add_terms({tag for _, _, tags_str in rows for tag in _parse_tags(tags_str) if tag})
+        for event_id, description, tags_str in rows:
+            self._set_event(event_id, description, tags_str)
+        self._seq = newest_seq
+
+    def _apply_changes(self, newest_seq: int) -> None:
+        changed = self.db.get_events_changed_since(self._seq)
+        present = set()
+        for event_id, description, tags_str in self.db.get_event_match_fields(changed):
+            present.add(event_id)
+            self._add_terms(t for t in _parse_tags(tags_str) if t)
+            self._set_event(event_id, description, tags_str)
+        for event_id in set(changed) - present:
+            self._fields.pop(event_id, None)
+            self._cells.pop(event_id, None)
+        self._seq = newest_seq
+
+    def _build(self) -> None:
+        event_ids = np.fromiter(self._cells.keys(), dtype=np.int64, count=len(self._cells))
+        counts = np.fromiter((len(c) for c in self._cells.values()), dtype=np.int64, count=len(self._cells))
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+        columns = np.fromiter((k for c in self._cells.values() for k in c), dtype=np.int64, count=indptr[-1])
+        values = np.fromiter((v for c in self._cells.values() for v in c.values()), dtype=float, count=indptr[-1])
+        self._matrix = sparse.csr_matrix((values, columns, indptr), shape=(len(event_ids), len(self._vocab)))
+        self._rows = {int(event_id): row for row, event_id in enumerate(event_ids)}
+        self._generation += 1
+
+    def _sync(self) -> None:
+        oldest, newest = self.db.get_event_change_range()
+        if self._seq is not None and newest == self._seq and self._matrix is not None:
+            return
+        if self._seq is None or newest < self._seq or oldest > self._seq + 1:
+            # First use, or the log was pruned past what this worker has seen
+            self._reload(newest)
+        else:
+            self._apply_changes(newest)
+        self._build()
+
+    # --- Scoring ---
+
+    def scores(self, user_id: Optional[int], interests: Dict[str, float]) -> Tuple[Dict[int, int], np.ndarray]:
+        """
+        Returns (row of each event_id, score per row) for a user's interest
+        weights. The score vector is reused while neither the interests nor
+        the events changed.
+        """
+        with self._lock:
+            self._sync()
+            if self._add_terms(interests):
+                self._build()
+
+            cached = self._users.get(user_id) if user_id is not None else None
+            if cached and cached[0] == interests and cached[1] == self._generation:
+                self._users.move_to_end(user_id)
+                return self._rows, cached[2]
+
+            weights = np.zeros(len(self._vocab))
+            for term, weight in interests.items():
+                weights[self._vocab[term]] = weight
+            scores = self._matrix @ weights
+
+            if user_id is not None:
+                self._users[user_id] = (dict(interests), self._generation, scores)
+                self._users.move_to_end(user_id)
+                while len(self._users) > self.user_cache_size:
+                    self._users.popitem(last=False)
+            return self._rows, scores
+
+    def forget_user(self, user_id: int) -> None:
+        """Drop a user's cached scores (their interests changed)"""
+        with self._lock:
+            self._users.pop(user_id, None)
+
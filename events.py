@@ -2,9 +2,13 @@ import os
 import json
 import traceback
 import random
+import base64
+import binascii
+from functools import cmp_to_key
 from datetime import datetime, date, timedelta, time
 from flask import url_for
 from EventDBHelper import DatabaseHelper
+from event_matching import InterestMatcher
 from keybert import KeyBERT
 from AIAgentHelper import AIAgentHelper
 from duckduckgo_search import DDGS
@@ -13,6 +17,9 @@ from duckduckgo_search import DDGS
 project_root = os.path.dirname(__file__)
 db_helper = DatabaseHelper(db_name=os.path.join(project_root, "events.db"))
 
+# Interest-match scores for all events, kept in step with the events table
+interest_matcher = InterestMatcher(db_helper)
+
 # Initialize AI Agent Helper
 ai_agent = AIAgentHelper()
 
@@ -119,7 +126,6 @@ def _update_user_interest_weights(user_id, event_id, delta=1):
     cur = conn.cursor()
     cur.execute("SELECT interest_tags FROM events WHERE event_id = ?", (event_id,))
     row = cur.fetchone()
-    conn.close()
     
     if not row or not row[0]:
         return
@@ -148,6 +154,7 @@ def _update_user_interest_weights(user_id, event_id, delta=1):
         
     # Save back
     db_helper.update_user_interests(user_id, json.dumps(interests_dict))
+    interest_matcher.forget_user(user_id)
 
 # Helper to parse interests
 def _get_user_interests_dict(user_id):
@@ -160,7 +167,7 @@ def _get_user_interests_dict(user_id):
         # Fallback for CSV format
         return {tag.strip().lower(): 1 for tag in raw.split(",") if tag.strip()}
 
-# Helper for weighted interest matching
+# Helper for weighted interest matching (one event; interest_matcher scores all events at once)
 def calculate_match_score(interests_dict, description, tags_str):
     score = 0
     desc_lower = description.lower() if description else ""
@@ -178,3 +185,74 @@ def calculate_match_score(interests_dict, description, tags_str):
                 # Double weight for direct tag match
                 score += interests_dict[tag] * 2
     return score
+
+# --- Event Discovery ---
+
+DISCOVERY_PAGE_SIZE = 24
+
+# Helper - Encodes a discovery sort key (score, start_date, created_at, event_id) as an opaque cursor
+def encode_discovery_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip("=")
+
+# Helper - Decodes a discovery cursor; returns None when it is missing or malformed
+def decode_discovery_cursor(token):
+    if not token:
+        return None
+    try:
+        score, start_date, created_at, event_id = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        return (float(score), str(start_date), str(created_at), int(event_id))
+    except (ValueError, TypeError, binascii.Error):
+        return None
+
+# Helper - Discovery order: best match first, then soonest, then newest
+def _discovery_order(a, b):
+    if a[0] != b[0]:
+        return -1 if a[0] > b[0] else 1
+    if a[1] != b[1]:
+        return -1 if a[1] < b[1] else 1
+    if a[2] != b[2]:
+        return -1 if a[2] > b[2] else 1
+    if a[3] != b[3]:
+        return -1 if a[3] > b[3] else 1
+    return 0
+
+# Finds one page of public events for the discovery page
+def discover_events(user_id, interests_dict, query, cursor=None, page_size=DISCOVERY_PAGE_SIZE):
+    """
+    Returns (rows, match_scores, next_cursor). rows are DISCOVERY_COLUMNS
+    tuples ending with the viewer's participant status; next_cursor is None
+    on the last page.
+
+    Without interests every score is 0 and the order is pure date order, so
+    the page is read straight from SQL with a keyset cursor. Otherwise the
+    sort keys of the matching events are ranked by interest_matcher's scores
+    and full rows are loaded for the requested page alone.
+    """
+    after = decode_discovery_cursor(cursor)
+
+    if not interests_dict:
+        rows = db_helper.get_discovery_page(
+            query, user_id, after=after[1:] if after else None, limit=page_size + 1
+        )
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_discovery_cursor((0, last[2], last[14] or "", last[0]))
+        return rows, [0] * len(rows), next_cursor
+
+    rows_by_id, scores = interest_matcher.scores(user_id, interests_dict)
+    keys = [
+        (float(scores[rows_by_id[event_id]]) if event_id in rows_by_id else 0.0, start_date, created_at, event_id)
+        for event_id, start_date, created_at in db_helper.get_discovery_keys(query)
+    ]
+    keys.sort(key=cmp_to_key(_discovery_order))
+    if after:
+        keys = [key for key in keys if _discovery_order(key, after) > 0]
+    page = keys[:page_size]
+    next_cursor = encode_discovery_cursor(page[-1]) if len(keys) > page_size else None
+
+    rows = db_helper.get_discovery_events([key[3] for key in page], user_id)
+    scores = {key[3]: key[0] for key in page}
+    return rows, [scores[row[0]] for row in rows], next_cursor
@@ -0,0 +1,153 @@
+"""
+Shared HTTP client for external karaoke integrations (iTunes, LRCLIB).
+
+One requests.Session with pooled keep-alive connections and a small retry
+policy replaces the bare requests.get calls. On top of it:
+
+- a per-host semaphore caps concurrent upstream requests,
+- an LRU cache with a TTL stores parsed JSON responses keyed on the URL and
+  normalized query (case and whitespace folded), and
+- single-flight coalescing makes concurrent identical queries share one
+  upstream call, so per-keystroke searches do not fan out.
+
+Errors are raised as requests exceptions, so callers keep their existing
+error handling.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def normalize_params(params):
+    """Cache key form of query parameters: sorted, with strings case/whitespace folded"""
+    normalized = []
+    for key, value in sorted((params or {}).items()):
+        if isinstance(value, str):
+            value = " ".join(value.split()).casefold()
+        normalized.append((key, value))
+    return tuple(normalized)
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class IntegrationClient:
+    """Pooled, cached and coalescing JSON GET client"""
+
+    def __init__(self, max_per_host=4, cache_size=512, cache_ttl=300, timeout=5, retries=2):
+        self.max_per_host = max_per_host
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.2,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max_per_host, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # Map of cache key to (expires_at, value)
+        self._in_flight = {}  # Map of cache key to _InFlight
+        self._host_limits = {}  # Map of host to BoundedSemaphore
+        self.upstream_calls = 0
+
+    # Cache ------------------------------------------------------------------
+
+    def _cache_get(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._cache[key]
+                return False, None
+            self._cache.move_to_end(key)
+            return True, value
+
+    def _cache_put(self, key, value, ttl):
+        with self._lock:
+            self._cache[key] = (time.monotonic() + ttl, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    # Requests ---------------------------------------------------------------
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = self._host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return limit
+
+    def _fetch(self, url, params, timeout, allow_404):
+        limit = self._host_limit(url)
+        if not limit.acquire(timeout=timeout):
+            raise requests.exceptions.Timeout(f"Too many concurrent requests to {urlsplit(url).netloc}")
+        try:
+            with self._lock:
+                self.upstream_calls += 1
+            response = self.session.get(url, params=params, timeout=timeout)
+            if allow_404 and response.status_code == 404:
+                return None
+            response.raise_for_status()
+            return response.json()
+        finally:
+            limit.release()
+
+    def get_json(self, url, params=None, timeout=None, ttl=None, allow_404=False):
+        """GET url and return its parsed JSON body (None for a 404 when allow_404)"""
+        key = (url, normalize_params(params))
+        hit, value = self._cache_get(key)
+        if hit:
+            return value
+
+        with self._lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _InFlight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._fetch(url, params, timeout or self.timeout, allow_404)
+            self._cache_put(key, flight.result, self.cache_ttl if ttl is None else ttl)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight.done.set()
+
+
+integration_client = IntegrationClient()
@@ -1,29 +1,55 @@
+import io
 import json
+import os
 import threading
+import time
 import uuid
-from datetime import datetime
+import wave
+from urllib.parse import urlencode
 
-from flask import jsonify, render_template, request, session, g
+from flask import current_app, jsonify, render_template, request, session, g
+from sqlalchemy.exc import IntegrityError
 
 from database import (
     add_participant_to_session,
     create_session,
     get_leaderboard,
     get_or_create_user,
+    get_session_participant_usernames,
     save_score,
+    save_scores_batch,
     get_monthly_top_players,
     get_user_ranking,
     get_user_active_sessions
 )
 
 from models import Session as SessionModel
-from models import SessionParticipant, Song, User, db
+from models import SessionParticipant, Song, User, db, get_sgt_now_naive
+from karaoke_writer import session_writer
+from karaoke_recorder import RecordingReader, list_participants, session_recorder
+from karaoke_lyrics import forget_lyrics, get_cached_lyrics, line_at, lyrics_prefetcher, timeline_of
+from karaoke_metrics import relay_log, relay_metrics
+from karaoke_sessions import live_sessions
+from karaoke_vocal_range import vocal_range_analyzer
+from song_catalog import (
+    CatalogQueryError,
+    catalog_changed,
+    catalog_etag,
+    list_songs,
+    parse_list_args,
+)
 
 session_clients = {}  # Map of session_id to list of websocket clients
 session_locks = {}  # Map of session_id to threading.Lock for thread safety
 sessions_lock = (
     threading.Lock()
 )  # Lock for managing session_clients and session_locks dictionaries
+client_stats = {}  # Map of websocket client to its karaoke_metrics.ClientStats
+
+relay_metrics.register_queue("session_writer", session_writer.queue_depth)
+relay_metrics.register_queue("recorder", session_recorder.queue_depth)
+relay_metrics.register_queue("lyrics_prefetch", lyrics_prefetcher.queue_depth)
+relay_metrics.register_queue("vocal_range", vocal_range_analyzer.queue_depth)
 
 
 # main page (/karaoke)
@@ -38,24 +64,29 @@ def create_session_page():
 
 # API Functions for song management
 def get_songs():
-    """Get all songs with optional filtering"""
-    genre = request.args.get("genre")
-    difficulty = request.args.get("difficulty")
-    search = request.args.get("search")
-
-    query = Song.query
-
-    if genre:
-        query = query.filter_by(genre=genre)
-    if difficulty:
-        query = query.filter_by(difficulty=difficulty)
-    if search:
-        query = query.filter(
-            (Song.title.ilike(f"%{search}%")) | (Song.artist.ilike(f"%{search}%"))
-        )
-
-    songs = query.all()
-    return jsonify([song.to_dict() for song in songs])
+    """List songs with optional filtering, sorting, sparse fields and cursor pagination"""
+    try:
+        params = parse_list_args(request.args)
+    except CatalogQueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Answer revalidations from the catalog version alone, before touching the DB
+    etag = catalog_etag(params)
+    if etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    songs, next_cursor = list_songs(params)
+    response = jsonify(songs)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    if next_cursor:
+        args = request.args.to_dict()
+        args["cursor"] = next_cursor
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
 
 
 def get_song(song_id):
@@ -85,28 +116,32 @@ def search_songs_external(query):
 
 
 def get_song_lyrics(song_id):
-    """Get lyrics for a song by ID"""
-    from api_integrations import fetch_lyrics_from_lrclib, LyricsAPIError
+    """Get lyrics for a song by ID (served from the lyrics cache)
+
+    The response includes the parsed timeline of [ms, line] pairs; pass
+    ?t=<ms> to also get the index of the line sung at that offset.
+    """
+    from api_integrations import LyricsAPIError
 
     song = Song.query.get(song_id)
     if not song:
         return jsonify({"error": "Song not found"}), 404
 
     try:
-        # Try to fetch lyrics from LRCLIB API
-        lyrics_data = fetch_lyrics_from_lrclib(
-            title=song.title,
-            artist=song.artist,
-            duration=song.duration
-        )
-
-        if lyrics_data and lyrics_data.get('lyrics'):
-            # Return synced lyrics in LRC format
-            return jsonify({
-                "lyrics": lyrics_data['lyrics'],
-                "instrumental": lyrics_data.get('instrumental', False),
-                "source": "lrclib"
-            })
+        entry = get_cached_lyrics(song)
+
+        if entry.found:
+            # Return synced lyrics in LRC format, plus the pre-parsed timeline
+            timeline = timeline_of(entry)
+            payload = {
+                "lyrics": entry.raw_lrc,
+                "timeline": timeline,
+                "instrumental": entry.instrumental,
+                "source": entry.source,
+            }
+            if request.args.get("t", type=int) is not None:
+                payload["line_index"] = line_at(timeline, request.args.get("t", type=int))
+            return jsonify(payload)
         else:
             # No lyrics found, return fallback
             lyrics = generate_sample_lyrics(song.title, song.artist)
@@ -193,8 +228,12 @@ def generate_sample_lyrics(title, artist):
     return "\n".join(lyrics_lines)
 
 
-def create_song(data):
-    """Create a new song with validation"""
+def validate_song(data, require_video=True):
+    """Validate new-song data; returns (song fields, None) or (None, error message)
+
+    require_video=False lets a row without youtube_url through (catalog
+    imports from sources that have no video); a given URL is still checked.
+    """
     # Validate required fields
     required_fields = [
         "title",
@@ -202,66 +241,75 @@ def create_song(data):
         "genre",
         "difficulty",
         "duration",
-        "youtube_url",
     ]
+    if require_video or data.get("youtube_url"):
+        required_fields.append("youtube_url")
     for field in required_fields:
         if field not in data or not data[field]:
-            return jsonify({"error": f"{field} is required"}), 400
+            return None, f"{field} is required"
 
     # Validate title  length
     if len(data["title"]) < 2 or len(data["title"]) > 200:
-        return jsonify({"error": "Title must be between 2 and 200 characters"}), 400
+        return None, "Title must be between 2 and 200 characters"
 
     # Validate artist length
     if len(data["artist"]) < 2 or len(data["artist"]) > 200:
-        return jsonify(
-            {"error": "Artist name must be between 2 and 200 characters"}
-        ), 400
+        return None, "Artist name must be between 2 and 200 characters"
 
     # Validate difficulty
     valid_difficulties = ["easy", "medium", "hard"]
     if data["difficulty"] not in valid_difficulties:
-        return jsonify(
-            {"error": f"Difficulty must be one of: {', '.join(valid_difficulties)}"}
-        ), 400
+        return None, f"Difficulty must be one of: {', '.join(valid_difficulties)}"
 
     # Validate duration
     try:
         duration = int(data["duration"])
         if duration < 30 or duration > 900:
-            return jsonify(
-                {"error": "Duration must be between 30 and 900 seconds"}
-            ), 400
+            return None, "Duration must be between 30 and 900 seconds"
     except (ValueError, TypeError):
-        return jsonify({"error": "Duration must be a valid number"}), 400
+        return None, "Duration must be a valid number"
 
     # Validate YouTube URL
-    youtube_url = data["youtube_url"]
-    if not (
+    youtube_url = data.get("youtube_url") or ""
+    if youtube_url and not (
         youtube_url.startswith("https://www.youtube.com/")
         or youtube_url.startswith("https://youtu.be/")
         or youtube_url.startswith("http://www.youtube.com/")
         or youtube_url.startswith("http://youtu.be/")
     ):
-        return jsonify(
-            {
-                "error": "Invalid YouTube URL. Must start with https://www.youtube.com/ or https://youtu.be/"
-            }
-        ), 400
+        return None, "Invalid YouTube URL. Must start with https://www.youtube.com/ or https://youtu.be/"
+
+    title = data["title"].strip()
+    artist = data["artist"].strip()
+    return {
+        "title": title,
+        "artist": artist,
+        "genre": data["genre"],
+        "difficulty": data["difficulty"],
+        "duration": duration,
+        "youtube_url": youtube_url.strip() or None,
+        "lyrics_url": (data.get("lyrics_url") or "").strip() or None,
+        "normalized_key": Song.normalize_key(title, artist),
+    }, None
+
+
+def create_song(data):
+    """Create a new song with validation"""
+    fields, error = validate_song(data)
+    if error:
+        return jsonify({"error": error}), 400
 
     # Create song
-    song = Song(
-        title=data["title"].strip(),
-        artist=data["artist"].strip(),
-        genre=data["genre"],
-        difficulty=data["difficulty"],
-        duration=duration,
-        youtube_url=youtube_url.strip(),
-        lyrics_url=data.get("lyrics_url", "").strip() or None,
-    )
+    song = Song(**fields)
 
     db.session.add(song)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "A song with this title and artist already exists"}), 409
+    catalog_changed()
+    lyrics_prefetcher.enqueue([song.id])
 
     return jsonify(song.to_dict()), 201
 
@@ -323,7 +371,22 @@ def update_song(song_id, data):
     if "lyrics_url" in data:
         song.lyrics_url = data["lyrics_url"].strip() or None
 
-    db.session.commit()
+    if "title" in data or "artist" in data:
+        song.normalized_key = Song.normalize_key(song.title, song.artist)
+
+    # Cached lyrics were looked up by title/artist/duration
+    refetch_lyrics = any(key in data for key in ("title", "artist", "duration"))
+    if refetch_lyrics:
+        forget_lyrics(song.id)
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "A song with this title and artist already exists"}), 409
+    catalog_changed()
+    if refetch_lyrics:
+        lyrics_prefetcher.enqueue([song.id])
 
     return jsonify(song.to_dict()), 200
 
@@ -348,6 +411,7 @@ def delete_song(song_id):
 
     db.session.delete(song)
     db.session.commit()
+    catalog_changed()
 
     return jsonify({"message": "Song deleted successfully"}), 200
 
@@ -374,14 +438,16 @@ def create_karaoke_session(data):
     user = get_or_create_user(username, display_name)
 
     # Check if user already has a waiting or active session
-    existing_session = (
-        SessionModel.query.join(SessionParticipant)
-        .filter(
-            SessionParticipant.user_id == user.id,
-            SessionModel.status.in_(["waiting", "active"]),
+    existing_session = None
+    if live_sessions.has_live_session(user.id):
+        existing_session = (
+            SessionModel.query.join(SessionParticipant)
+            .filter(
+                SessionParticipant.user_id == user.id,
+                SessionModel.status.in_(["waiting", "active"]),
+            )
+            .first()
         )
-        .first()
-    )
 
     if existing_session:
         # If replace_existing is True, delete the old session and create a new one
@@ -420,6 +486,56 @@ def get_session_info(session_id):
     return jsonify(session.to_dict())
 
 
+def get_session_recording(session_id):
+    """Replay part of a recorded session as WAV (participant, from and to in seconds)"""
+    if not session_recorder.enabled:
+        return jsonify({"error": "Session recording is disabled"}), 404
+
+    session_dir = session_recorder.session_dir(session_id)
+    session = SessionModel.query.filter_by(session_id=session_id).first()
+    if not session or not os.path.isdir(session_dir):
+        return jsonify({"error": "Recording not found"}), 404
+
+    # Only the session's own participants (and admins) may listen back
+    user = g.current_user
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+    if not user.is_admin and not SessionParticipant.query.filter_by(
+        session_id=session.id, user_id=user.id
+    ).first():
+        return jsonify({"error": "You are not a participant in this session"}), 403
+
+    try:
+        participants = list_participants(session_dir)
+    except (OSError, KeyError, ValueError):
+        return jsonify({"error": "Recording not found"}), 404
+
+    participant = request.args.get("participant")
+    if participant is None:
+        return jsonify({"participants": participants})
+    if participant not in participants:
+        return jsonify({"error": "Recording not found"}), 404
+
+    try:
+        reader = RecordingReader(session_dir, participant)
+    except (OSError, KeyError, ValueError):
+        return jsonify({"error": "Recording not found"}), 404
+
+    with reader:
+        start = request.args.get("from", 0.0, type=float)
+        end = request.args.get("to", reader.duration, type=float)
+        pcm = reader.read_range(start, end)
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(reader.sample_width)
+            wav.setframerate(reader.sample_rate)
+            wav.writeframes(pcm)
+
+    return buffer.getvalue(), 200, {"Content-Type": "audio/wav"}
+
+
 # API Functions for score management
 def submit_score(data):
     """Submit a score for a session"""
@@ -467,12 +583,108 @@ def submit_score(data):
     session = SessionModel.query.filter_by(session_id=session_id).first()
     if session:
         session.status = "completed"
-        session.completed_at = datetime.utcnow()
+        session.completed_at = get_sgt_now_naive()
         db.session.commit()
 
     return jsonify(score_entry.to_dict()), 201
 
 
+MAX_SCORE_BATCH = 100
+
+
+def _authorize_score_records(valid, results, current_user):
+    """Keep batch items the current user may submit; the others get an error result
+
+    An item is allowed for the current user's own account, or for another
+    participant of the item's session when the current user takes part in it
+    too. Other users' display names are never changed from a batch.
+    """
+    participants = get_session_participant_usernames(clean["session_id"] for _, clean in valid)
+    allowed = []
+    for index, clean in valid:
+        session_users = participants.get(clean["session_id"], set())
+        if current_user and clean["username"] == current_user.username:
+            clean["display_name"] = current_user.display_name or current_user.username
+        elif current_user and current_user.username in session_users and clean["username"] in session_users:
+            clean["display_name"] = None
+        else:
+            results[index] = {
+                "index": index,
+                "status": "error",
+                "error": "You can only submit scores for yourself or participants of your session",
+            }
+            continue
+        allowed.append((index, clean))
+    return allowed
+
+
+def _validate_score_record(record, default_username=None):
+    """Check one /api/scores/batch item; returns (clean record, None) or (None, error)"""
+    if not isinstance(record, dict):
+        return None, "Each score must be an object"
+
+    session_id = record.get("session_id")
+    username = record.get("username") or default_username
+    if not session_id or not username or record.get("score") is None:
+        return None, "session_id, username, and score are required"
+
+    clean = {
+        "session_id": str(session_id),
+        "username": str(username),
+        "display_name": record.get("display_name"),
+        "notes": record.get("notes"),
+    }
+    try:
+        clean["score"] = int(record["score"])
+        clean["mic_time"] = int(record.get("mic_time") or 0)
+        for metric in ("accuracy", "timing", "completeness"):
+            value = record.get(metric)
+            clean[metric] = float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None, "score, mic_time and metrics must be numbers"
+
+    if not 0 <= clean["score"] <= 100:
+        return None, "score must be between 0 and 100"
+    if clean["mic_time"] < 0:
+        return None, "mic_time must not be negative"
+    return clean, None
+
+
+def submit_scores_batch(data):
+    """Submit many scores (duets, groups, offline queues) in one transaction"""
+    records = data.get("scores") if isinstance(data, dict) else data
+    if not isinstance(records, list) or not records:
+        return jsonify({"error": "scores must be a non-empty list"}), 400
+    if len(records) > MAX_SCORE_BATCH:
+        return jsonify({"error": f"At most {MAX_SCORE_BATCH} scores per batch"}), 400
+
+    # Items without a username are scored for the logged-in user
+    default_username = g.current_user.username if g.current_user else None
+
+    results = [None] * len(records)
+    valid = []  # [(index, clean record)]
+    for index, record in enumerate(records):
+        clean, error = _validate_score_record(record, default_username)
+        if error:
+            results[index] = {"index": index, "status": "error", "error": error}
+        else:
+            valid.append((index, clean))
+    if valid:
+        valid = _authorize_score_records(valid, results, g.current_user)
+
+    if valid:
+        saved = save_scores_batch([clean for _, clean in valid])
+        for (index, _), score_entry in zip(valid, saved):
+            if score_entry is None:
+                results[index] = {"index": index, "status": "error", "error": "Session not found"}
+            else:
+                results[index] = {"index": index, "status": "created", "score": score_entry.to_dict()}
+
+    created = sum(1 for result in results if result["status"] == "created")
+    status_code = 201 if created == len(results) else 200 if created else 400
+    return jsonify({"created": created, "failed": len(results) - created, "results": results}), status_code
+
+
 def get_leaderboard_data(limit=10):
     """Get leaderboard data - sorted by total karaoke time"""
     leaderboard_data = get_leaderboard(limit)
@@ -491,7 +703,7 @@ def get_leaderboard_data(limit=10):
 def get_song_queue():
     """Get queue of songs for the current user"""
     user = g.current_user
-    if not user:
+    if not user or not live_sessions.has_live_session(user.id):
         return jsonify([])
 
     # Get user's waiting or active sessions
@@ -572,7 +784,7 @@ def get_user_ranking_data():
 def get_user_sessions():
     """Get current user's active sessions"""
     user = g.current_user
-    if not user:
+    if not user or not live_sessions.has_live_session(user.id):
         return jsonify([])
 
     sessions = get_user_active_sessions(user.id)
@@ -590,13 +802,134 @@ def get_user_sessions():
     return jsonify(sessions_data)
 
 
+def _handle_control_message(session_id, data, recording_id=None):
+    """
+    Handle a text control message from a client.
+    recording_id is the connection's track in the session recording.
+    Returns the message type (PLAY, PAUSE, USER_JOIN, ...) or None if it is not JSON.
+    """
+    # Try to parse as JSON for control messages (PLAY, PAUSE, USER_JOIN)
+    try:
+        msg = json.loads(data)
+    except (json.JSONDecodeError, ValueError):
+        # Not a JSON message, ignore
+        return None
+    if not isinstance(msg, dict):
+        return None
+
+    msg_type = msg.get("type")
+    if msg_type == "USER_JOIN":
+        # Handle user joining - add them as a participant
+        user_id = msg.get("user_id")
+        display_name = msg.get("display_name", "Guest")
+
+        if user_id:
+            # Get or create user and add them as a participant
+            # (idempotent upsert applied by the background writer)
+            session_writer.user_joined(session_id, user_id, display_name, role="singer")
+            session_recorder.tag_participant(session_id, recording_id, user_id)
+
+    return msg_type
+
+
+def _audio_ws_via_relay(ws, session_id, relay_router):
+    """
+    Proxy a WebSocket to the relay worker that owns this session (see karaoke_hub.py).
+    Control messages are still interpreted here so DB writes stay in the web worker.
+    """
+    try:
+        relay = relay_router.connect(session_id)
+    except Exception as e:
+        relay_log.warning("[Session %s] Could not reach relay worker: %s", session_id, e)
+        return
+
+    relay_log.info(
+        "[Session %s] Client %s connected via relay %s (Total: %s)",
+        session_id, relay.client_index, relay.worker, relay.participant_count,
+    )
+    stats, client_stats = relay_metrics.client_connected(session_id, ws, relay.client_index)
+    # client_index is a list position the relay reuses after disconnects; the recording needs a stable key
+    recording_id = uuid.uuid4().hex
+
+    try:
+        ws.send(f"connected:{relay.client_index}")
+    except Exception as e:
+        relay_log.warning("Error notifying client of connection: %s", e)
+
+    if relay.participant_count == 1:
+        session_writer.session_activated(session_id)
+
+    def deliver(data):
+        started = time.perf_counter()
+        try:
+            ws.send(data)
+        except Exception:
+            relay_metrics.drop(stats, client_stats)
+            raise
+        relay_metrics.frame_out(stats, client_stats, len(data), time.perf_counter() - started)
+
+    relay.start_reader(deliver)
+
+    try:
+        while True:
+            data = ws.receive()
+            if data is None:
+                relay_log.info("[Session %s] Client %s disconnected", session_id, relay.client_index)
+                break
+
+            relay_metrics.frame_in(stats, client_stats, len(data))
+            if isinstance(data, (bytes, bytearray)):
+                relay.send_binary(data)
+                session_recorder.record(session_id, recording_id, data)
+                relay_log.sampled("[Session %s] Relayed %d audio bytes", session_id, len(data))
+            else:
+                relay_log.debug("[Session %s] Client %s sent text: %s", session_id, relay.client_index, data)
+                msg_type = _handle_control_message(session_id, data, recording_id)
+                if msg_type in ["PLAY", "PAUSE"]:
+                    relay.send_text(data)
+    except OSError as e:
+        relay_log.warning("[Session %s] Relay connection lost: %s", session_id, e)
+    finally:
+        session_recorder.finish(session_id, recording_id)
+        relay_metrics.client_disconnected(stats, ws)
+        remaining_count = relay.leave()
+        if remaining_count == 0:
+            session_writer.session_completed(session_id)
+            relay_log.info("[Session %s] Session cleaned up", session_id)
+
+
+def _send_to_others(ws, session_id, data, stats):
+    """Fan a frame out to every other client in the session (caller holds the session lock)"""
+    size = len(data)
+    for other in session_clients[session_id]:
+        if other is ws:
+            continue
+        other_stats = client_stats.get(other)
+        started = time.perf_counter()
+        try:
+            other.send(data)
+        except Exception as e:
+            if other_stats is not None:
+                relay_metrics.drop(stats, other_stats)
+            relay_log.warning("[Session %s] Error relaying to participant: %s", session_id, e)
+            continue
+        if other_stats is not None:
+            relay_metrics.frame_out(stats, other_stats, size, time.perf_counter() - started)
+
+
 def audio_ws(ws, session_id):
     """
     Handle WebSocket connection for a specific karaoke session.
     Routes audio between all clients in the same session (supports multiple participants).
     """
+    # When the relay hub is configured, the session's relay worker does the fan-out
+    relay_router = current_app.extensions.get("karaoke_relay_router")
+    if relay_router is not None:
+        return _audio_ws_via_relay(ws, session_id, relay_router)
+
     client_index = None
-    user_id_for_client = None  # Track user ID for this connection
+    # client_index is reused after disconnects; the recording needs a stable key per connection
+    recording_id = uuid.uuid4().hex
 
     # Initialize session data structures if needed
     with sessions_lock:
@@ -611,13 +944,17 @@ def audio_ws(ws, session_id):
         # Add client to session (no limit on number of participants)
         session_clients[session_id].append(ws)
         client_index = len(session_clients[session_id]) - 1
-        print(f"[Session {session_id}] Client {client_index} connected (Total: {len(session_clients[session_id])})")
+        stats, client_stats[ws] = relay_metrics.client_connected(session_id, ws, client_index)
+        relay_log.info(
+            "[Session %s] Client %s connected (Total: %s)",
+            session_id, client_index, len(session_clients[session_id]),
+        )
 
         # Notify client they're connected
         try:
             ws.send(f"connected:{client_index}")
         except Exception as e:
-            print(f"Error notifying client of connection: {e}")
+            relay_log.warning("Error notifying client of connection: %s", e)
 
         # Notify all existing clients that a new participant joined
         participant_count = len(session_clients[session_id])
@@ -629,99 +966,57 @@ def audio_ws(ws, session_id):
                     "client_index": i
                 }))
             except Exception as e:
-                print(f"[Session {session_id}] Error notifying client {i} of participant update: {e}")
+                relay_log.warning(
+                    "[Session %s] Error notifying client %s of participant update: %s", session_id, i, e
+                )
 
         # Update session status to active when first participant joins
+        # (queued for the background writer so the audio path never waits on the DB)
         if participant_count == 1:
-            try:
-                session = SessionModel.query.filter_by(session_id=session_id).first()
-                if session and session.status == "waiting":
-                    session.status = "active"
-                    session.started_at = datetime.utcnow()
-                    db.session.commit()
-                    print(f"[Session {session_id}] Status updated to active")
-            except Exception as e:
-                print(f"Error updating session status: {e}")
+            session_writer.session_activated(session_id)
 
+    own_stats = client_stats[ws]
     try:
         while True:
             data = ws.receive()
             if data is None:
-                print(f"[Session {session_id}] Client {client_index} disconnected")
+                relay_log.info("[Session %s] Client %s disconnected", session_id, client_index)
                 break
 
+            relay_metrics.frame_in(stats, own_stats, len(data))
+
             # Handle binary audio data
             if isinstance(data, (bytes, bytearray)):
                 with session_lock:
                     # Broadcast audio to all other participants in the same session
-                    for other in session_clients[session_id]:
-                        if other is not ws:
-                            try:
-                                other.send(data)
-                            except Exception as e:
-                                print(
-                                    f"[Session {session_id}] Error broadcasting audio to participant: {e}"
-                                )
+                    _send_to_others(ws, session_id, data, stats)
+                session_recorder.record(session_id, recording_id, data)
+                relay_log.sampled("[Session %s] Relayed %d audio bytes", session_id, len(data))
 
             # Handle text messages (control messages)
             else:
-                print(f"[Session {session_id}] Client {client_index} sent text: {data}")
-                # Try to parse as JSON for control messages (PLAY, PAUSE, USER_JOIN)
-                try:
-                    msg = json.loads(data)
-                    msg_type = msg.get("type")
-
-                    if msg_type == "USER_JOIN":
-                        # Handle user joining - add them as a participant
-                        user_id = msg.get("user_id")
-                        display_name = msg.get("display_name", "Guest")
-
-                        if user_id:
-                            user_id_for_client = user_id
-                            # Get or create user
-                            user = get_or_create_user(user_id, display_name)
-
-                            # Check if user is already a participant in this session
-                            session = SessionModel.query.filter_by(session_id=session_id).first()
-                            if session:
-                                existing_participant = SessionParticipant.query.filter_by(
-                                    session_id=session.id,
-                                    user_id=user.id
-                                ).first()
-
-                                if not existing_participant:
-                                    # Add user as participant
-                                    add_participant_to_session(session_id, user.id, role="singer")
-                                    print(f"[Session {session_id}] Added user {user_id} as participant")
-                                else:
-                                    print(f"[Session {session_id}] User {user_id} already a participant")
-
-                    elif msg_type in ["PLAY", "PAUSE"]:
-                        # Relay control message to all other clients
-                        with session_lock:
-                            for other in session_clients[session_id]:
-                                if other is not ws:
-                                    try:
-                                        other.send(data)
-                                        print(
-                                            f"[Session {session_id}] Relayed {msg_type} to other participants"
-                                        )
-                                    except Exception as e:
-                                        print(
-                                            f"[Session {session_id}] Error relaying control message: {e}"
-                                        )
-                except (json.JSONDecodeError, ValueError):
-                    # Not a JSON message, ignore
-                    pass
+                relay_log.debug("[Session %s] Client %s sent text: %s", session_id, client_index, data)
+                msg_type = _handle_control_message(session_id, data, recording_id)
+
+                if msg_type in ["PLAY", "PAUSE"]:
+                    # Relay control message to all other clients
+                    with session_lock:
+                        _send_to_others(ws, session_id, data, stats)
+                    relay_log.debug("[Session %s] Relayed %s to other participants", session_id, msg_type)
 
     finally:
+        session_recorder.finish(session_id, recording_id)
+        relay_metrics.client_disconnected(stats, ws)
+
         # Remove client from session
         with session_lock:
+            client_stats.pop(ws, None)
             if ws in session_clients[session_id]:
                 session_clients[session_id].remove(ws)
                 remaining_count = len(session_clients[session_id])
-                print(
-                    f"[Session {session_id}] Client {client_index} removed from session (Remaining: {remaining_count})"
+                relay_log.info(
+                    "[Session %s] Client %s removed from session (Remaining: %s)",
+                    session_id, client_index, remaining_count,
                 )
 
                 # Notify all remaining clients about the updated participant count
@@ -734,21 +1029,27 @@ def audio_ws(ws, session_id):
                                 "client_index": i
                             }))
                         except Exception as e:
-                            print(
-                                f"[Session {session_id}] Error notifying client {i} of disconnection: {e}"
+                            relay_log.warning(
+                                "[Session %s] Error notifying client %s of disconnection: %s",
+                                session_id, i, e,
                             )
 
                 # Clean up empty sessions and mark as completed in database
                 if remaining_count == 0:
                     # Update session status to completed in database
-                    session = SessionModel.query.filter_by(session_id=session_id).first()
-                    if session and session.status != "completed":
-                        session.status = "completed"
-                        session.completed_at = datetime.utcnow()
-                        db.session.commit()
-                        print(f"[Session {session_id}] Session marked as completed in database")
+                    session_writer.session_completed(session_id)
 
                     with sessions_lock:
                         del session_clients[session_id]
                         del session_locks[session_id]
-                    print(f"[Session {session_id}] Session cleaned up")
+                    relay_log.info("[Session %s] Session cleaned up", session_id)
+
+
+def get_relay_metrics():
+    """Relay metrics for live and recently finished sessions as JSON"""
+    return jsonify(relay_metrics.snapshot())
+
+
+def get_relay_metrics_prometheus():
+    """Relay metrics in the Prometheus text exposition format"""
+    return relay_metrics.prometheus(), 200, {"Content-Type": "text/plain; version=0.0.4"}
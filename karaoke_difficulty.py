@@ -0,0 +1,177 @@
+"""
+Batch song difficulty estimation (flask estimate-difficulty).
+
+Songs.difficulty_score (0 = easiest, 100 = hardest) is estimated for the
+whole catalog at once from the cached LRC timelines (see karaoke_lyrics.py):
+
+- words per second over the sung part of the song,
+- variance of the gaps between line starts (irregular phrasing),
+- longest phrase (the longest time a line holds before the next one), and
+- total duration.
+
+Each feature is ranked against the catalog and the weighted ranks give a
+prior. The prior is then recalibrated from how singers actually score: per
+song, the mean of (score - the singer's all-time average score), shrunk
+toward zero for songs with few scores. The hand-set difficulty label is left
+alone; difficulty_score is indexed for filtering and sorting.
+"""
+
+import json
+
+import numpy as np
+from sqlalchemy import func
+
+from models import db, LeaderboardRollup, Score, Session, Song, SongLyrics
+
+# Weights of the catalog-relative feature ranks in the prior
+FEATURE_WEIGHTS = {
+    "words_per_second": 0.4,
+    "gap_variance": 0.2,
+    "longest_phrase": 0.25,
+    "duration": 0.15,
+}
+SHRINKAGE_SCORES = 10  # Scores needed before observations carry half the weight
+POINTS_PER_SCORE_POINT = 1.5  # Difficulty points per point below singers' averages
+
+
+def lyric_features(song_ids, durations, timelines):
+    """Feature matrix (one row per song, columns in FEATURE_WEIGHTS order)
+
+    timelines[i] is a list of (ms offset, line) pairs or None when no synced
+    lyrics are cached; lyric features of such songs are NaN.
+    """
+    count = len(song_ids)
+    # Flatten every timeline into parallel arrays tagged with the song's row
+    rows, offsets, words = [], [], []
+    for row, timeline in enumerate(timelines):
+        for ms, line in timeline or ():
+            rows.append(row)
+            offsets.append(ms)
+            words.append(len(line.split()))
+    rows = np.asarray(rows, dtype=np.int64)
+    seconds = np.asarray(offsets, dtype=float) / 1000.0
+    words = np.asarray(words, dtype=float)
+
+    lines = np.bincount(rows, minlength=count)
+    has_lyrics = lines >= 2
+    first = np.full(count, np.nan)
+    last = np.full(count, np.nan)
+    if len(rows):
+        # Timelines are sorted, so the first/last entry of each row bounds it
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        ends = np.r_[starts[1:], len(rows)] - 1
+        first[rows[starts]] = seconds[starts]
+        last[rows[ends]] = seconds[ends]
+
+    duration = np.asarray([d or np.nan for d in durations], dtype=float)
+
+    # Gaps between consecutive lines of the same song
+    same_song = rows[1:] == rows[:-1]
+    gaps = np.diff(seconds)[same_song]
+    gap_rows = rows[1:][same_song]
+    gap_count = np.bincount(gap_rows, minlength=count)
+    gap_sum = np.bincount(gap_rows, weights=gaps, minlength=count)
+    gap_square_sum = np.bincount(gap_rows, weights=gaps * gaps, minlength=count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gap_mean = gap_sum / gap_count
+        gap_variance = np.where(has_lyrics, gap_square_sum / gap_count - gap_mean * gap_mean, np.nan)
+
+    # Sung span: first to last line, plus a typical line for the last one
+    # (intros and outros are not counted)
+    sung = np.maximum(last - first + gap_mean, 1.0)
+    words_per_second = np.where(
+        has_lyrics, np.bincount(rows, weights=words, minlength=count) / sung, np.nan
+    )
+
+    longest_phrase = np.full(count, -np.inf)
+    np.maximum.at(longest_phrase, gap_rows, gaps)
+    longest_phrase = np.where(has_lyrics, longest_phrase, np.nan)
+
+    return np.column_stack([words_per_second, gap_variance, longest_phrase, duration])
+
+
+def _percentile_ranks(column):
+    """Rank of each value within the column as 0..1; NaN stays NaN"""
+    ranks = np.full(column.shape, np.nan)
+    present = ~np.isnan(column)
+    if present.sum() == 1:
+        ranks[present] = 0.5
+    elif present.any():
+        order = column[present].argsort(kind="stable").argsort(kind="stable")
+        ranks[present] = order / (present.sum() - 1)
+    return ranks
+
+
+def prior_scores(features):
+    """Weighted catalog-relative ranks as 0..100; missing features count as the median"""
+    ranks = np.column_stack([_percentile_ranks(features[:, i]) for i in range(features.shape[1])])
+    ranks = np.where(np.isnan(ranks), 0.5, ranks)
+    weights = np.asarray(list(FEATURE_WEIGHTS.values()))
+    return ranks @ weights / weights.sum() * 100
+
+
+def observed_adjustments(song_ids):
+    """Difficulty points to add per song from singers' scores relative to their averages"""
+    user_average = (
+        db.session.query(
+            LeaderboardRollup.user_id.label("user_id"),
+            (LeaderboardRollup.score_sum * 1.0 / LeaderboardRollup.session_count).label("average"),
+        )
+        .filter(LeaderboardRollup.period_kind == "all", LeaderboardRollup.session_count > 0)
+        .subquery()
+    )
+    rows = (
+        db.session.query(
+            Session.song_id,
+            func.count(Score.id),
+            func.avg(Score.score - user_average.c.average),
+        )
+        .join(Score, Score.session_id == Session.id)
+        .join(user_average, user_average.c.user_id == Score.user_id)
+        .group_by(Session.song_id)
+        .all()
+    )
+
+    position = {song_id: i for i, song_id in enumerate(song_ids)}
+    counts = np.zeros(len(song_ids))
+    residuals = np.zeros(len(song_ids))
+    for song_id, count, residual in rows:
+        if song_id in position:
+            counts[position[song_id]] = count
+            residuals[position[song_id]] = residual or 0.0
+
+    shrink = counts / (counts + SHRINKAGE_SCORES)
+    return -residuals * shrink * POINTS_PER_SCORE_POINT
+
+
+def estimate_song_difficulty():
+    """Recompute difficulty_score for every song; returns the number of songs updated"""
+    from song_catalog import catalog_changed
+
+    songs = db.session.query(Song.id, Song.duration).order_by(Song.id).all()
+    if not songs:
+        return 0
+    song_ids = [song_id for song_id, _ in songs]
+
+    timelines = dict(
+        db.session.query(SongLyrics.song_id, SongLyrics.timeline).filter(
+            SongLyrics.found.is_(True), SongLyrics.timeline.isnot(None)
+        )
+    )
+    features = lyric_features(
+        song_ids,
+        [duration for _, duration in songs],
+        [json.loads(timelines[song_id]) if song_id in timelines else None for song_id in song_ids],
+    )
+    scores = np.clip(prior_scores(features) + observed_adjustments(song_ids), 0, 100)
+
+    db.session.bulk_update_mappings(
+        Song,
+        [
+            {"id": song_id, "difficulty_score": round(float(score), 1)}
+            for song_id, score in zip(song_ids, scores)
+        ],
+    )
+    db.session.commit()
+    catalog_changed()
+    return len(song_ids)
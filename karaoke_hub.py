@@ -0,0 +1,399 @@
+"""
+Sharded relay hub for karaoke audio.
+
+Sessions are consistently hashed onto a fixed set of relay worker processes,
+each listening on its own Unix socket. Web workers no longer fan audio out
+themselves; audio_ws opens one Unix socket connection per WebSocket to the
+relay that owns the session and pumps frames both ways. Because every web
+worker computes the same hash ring, all participants of a session meet in
+the same relay process no matter which gunicorn worker accepted them, so the
+web tier can run with more than one worker.
+
+Run the relay processes with:
+
+    python karaoke_hub.py --socket-dir /tmp/kk-relay --workers 4
+
+and point the app at them with KARAOKE_RELAY_SOCKET_DIR / KARAOKE_RELAY_WORKERS.
+This module only uses the standard library so it can be started on its own.
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import socketserver
+import struct
+import threading
+
+# Frame kinds on the web worker <-> relay Unix socket
+FRAME_HELLO = 1  # client -> relay: session id
+FRAME_WELCOME = 2  # relay -> client: JSON {client_index, count, worker}
+FRAME_BINARY = 3  # audio, either direction
+FRAME_TEXT = 4  # control message, either direction
+FRAME_BYE = 5  # client -> relay: leaving the session
+FRAME_BYE_ACK = 6  # relay -> client: JSON {remaining}
+
+_HEADER = struct.Struct("!BI")
+MAX_FRAME_SIZE = 4 * 1024 * 1024
+
+
+class RelayProtocolError(Exception):
+    """Raised when a relay peer sends an unexpected or malformed frame"""
+    pass
+
+
+# ----------------------------------------------------------------------
+# Framing
+# ----------------------------------------------------------------------
+
+
+def send_frame(sock, kind, payload=b""):
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    sock.sendall(_HEADER.pack(kind, len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            return None
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def recv_frame(sock):
+    """Read one frame; returns (kind, payload) or None when the peer closed"""
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    kind, size = _HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise RelayProtocolError(f"Frame of {size} bytes exceeds limit")
+    payload = _recv_exact(sock, size) if size else b""
+    if payload is None:
+        return None
+    return kind, payload
+
+
+# ----------------------------------------------------------------------
+# Consistent hashing
+# ----------------------------------------------------------------------
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes (stable across processes)"""
+
+    def __init__(self, nodes, replicas=64):
+        self._ring = sorted(
+            (_hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas)
+        )
+        self._keys = [h for h, _ in self._ring]
+
+    def node_for(self, key):
+        if not self._ring:
+            raise ValueError("Hash ring has no nodes")
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._ring[index][1]
+
+
+def socket_path(socket_dir, worker_index):
+    return os.path.join(socket_dir, f"relay-{worker_index}.sock")
+
+
+# ----------------------------------------------------------------------
+# Relay worker (runs inside each relay process)
+# ----------------------------------------------------------------------
+
+
+class _Peer:
+    def __init__(self, sock):
+        self.sock = sock
+        self.send_lock = threading.Lock()
+
+    def send(self, kind, payload):
+        with self.send_lock:
+            send_frame(self.sock, kind, payload)
+
+
+class RelayState:
+    """In-memory session membership for one relay worker"""
+
+    def __init__(self, worker_index):
+        self.worker_index = worker_index
+        self.sessions = {}  # Map of session_id to list of _Peer
+        self.lock = threading.Lock()
+
+    def join(self, session_id, peer):
+        with self.lock:
+            peers = self.sessions.setdefault(session_id, [])
+            peers.append(peer)
+            return len(peers) - 1, len(peers)
+
+    def leave(self, session_id, peer):
+        with self.lock:
+            peers = self.sessions.get(session_id, [])
+            if peer in peers:
+                peers.remove(peer)
+            remaining = len(peers)
+            if remaining == 0:
+                self.sessions.pop(session_id, None)
+            return remaining
+
+    def peers(self, session_id):
+        with self.lock:
+            return list(self.sessions.get(session_id, []))
+
+    def fan_out(self, session_id, sender, kind, payload):
+        for other in self.peers(session_id):
+            if other is sender:
+                continue
+            try:
+                other.send(kind, payload)
+            except OSError:
+                # The peer's own handler notices the broken socket and leaves
+                pass
+
+    def broadcast_participants(self, session_id):
+        peers = self.peers(session_id)
+        for i, peer in enumerate(peers):
+            try:
+                peer.send(
+                    FRAME_TEXT,
+                    json.dumps(
+                        {"type": "PARTICIPANT_UPDATE", "count": len(peers), "client_index": i}
+                    ),
+                )
+            except OSError:
+                pass
+
+
+class _RelayHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        state = self.server.state
+        sock = self.request
+
+        try:
+            hello = recv_frame(sock)
+        except RelayProtocolError:
+            return
+        if hello is None or hello[0] != FRAME_HELLO:
+            return
+        session_id = hello[1].decode("utf-8")
+
+        peer = _Peer(sock)
+        client_index, count = state.join(session_id, peer)
+        left = False
+        try:
+            peer.send(
+                FRAME_WELCOME,
+                json.dumps(
+                    {"client_index": client_index, "count": count, "worker": state.worker_index}
+                ),
+            )
+            state.broadcast_participants(session_id)
+
+            while True:
+                frame = recv_frame(sock)
+                if frame is None:
+                    break
+                kind, payload = frame
+                if kind in (FRAME_BINARY, FRAME_TEXT):
+                    state.fan_out(session_id, peer, kind, payload)
+                elif kind == FRAME_BYE:
+                    remaining = state.leave(session_id, peer)
+                    left = True
+                    peer.send(FRAME_BYE_ACK, json.dumps({"remaining": remaining}))
+                    if remaining:
+                        state.broadcast_participants(session_id)
+                    break
+        except (OSError, RelayProtocolError):
+            pass
+        finally:
+            if not left and state.leave(session_id, peer):
+                state.broadcast_participants(session_id)
+
+
+class RelayServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, worker_index):
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _RelayHandler)
+        self.state = RelayState(worker_index)
+
+
+def serve_relay(socket_dir, worker_index):
+    """Entry point for one relay worker process"""
+    path = socket_path(socket_dir, worker_index)
+    server = RelayServer(path, worker_index)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def start_hub(socket_dir, workers):
+    """Start `workers` relay processes; returns the Process objects"""
+    os.makedirs(socket_dir, exist_ok=True)
+    processes = []
+    for worker_index in range(workers):
+        process = multiprocessing.Process(
+            target=serve_relay,
+            args=(socket_dir, worker_index),
+            name=f"karaoke-relay-{worker_index}",
+            daemon=True,
+        )
+        process.start()
+        processes.append(process)
+    return processes
+
+
+# ----------------------------------------------------------------------
+# Web worker side
+# ----------------------------------------------------------------------
+
+
+class RelayConnection:
+    """One WebSocket's connection to the relay worker that owns its session"""
+
+    def __init__(self, path, session_id, timeout=5.0):
+        self.session_id = session_id
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        send_frame(self.sock, FRAME_HELLO, session_id)
+
+        welcome = recv_frame(self.sock)
+        if welcome is None or welcome[0] != FRAME_WELCOME:
+            self.sock.close()
+            raise RelayProtocolError("Relay did not acknowledge session")
+        info = json.loads(welcome[1])
+        self.client_index = info["client_index"]
+        self.participant_count = info["count"]
+        self.worker = info["worker"]
+
+        self.sock.settimeout(None)
+        self._send_lock = threading.Lock()
+        self._left = threading.Event()
+        self._remaining = None
+        self._reader = None
+
+    def send_binary(self, data):
+        with self._send_lock:
+            send_frame(self.sock, FRAME_BINARY, bytes(data))
+
+    def send_text(self, text):
+        with self._send_lock:
+            send_frame(self.sock, FRAME_TEXT, text)
+
+    def start_reader(self, deliver):
+        """Forward relay frames to `deliver` (str for text, bytes for audio) on a background thread"""
+        self._reader = threading.Thread(
+            target=self._read_loop, args=(deliver,), name="karaoke-relay-reader", daemon=True
+        )
+        self._reader.start()
+
+    def _read_loop(self, deliver):
+        try:
+            while True:
+                frame = recv_frame(self.sock)
+                if frame is None:
+                    break
+                kind, payload = frame
+                if kind == FRAME_BINARY:
+                    deliver(payload)
+                elif kind == FRAME_TEXT:
+                    deliver(payload.decode("utf-8"))
+                elif kind == FRAME_BYE_ACK:
+                    self._remaining = json.loads(payload)["remaining"]
+                    break
+        except Exception:
+            # Socket closed or the WebSocket went away; leave() handles cleanup
+            pass
+        finally:
+            self._left.set()
+
+    def leave(self, timeout=2.0):
+        """Leave the session; returns the remaining participant count (None if unknown)"""
+        try:
+            with self._send_lock:
+                send_frame(self.sock, FRAME_BYE)
+            if self._reader is None:
+                frame = recv_frame(self.sock)
+                while frame is not None and frame[0] != FRAME_BYE_ACK:
+                    frame = recv_frame(self.sock)
+                if frame is not None:
+                    self._remaining = json.loads(frame[1])["remaining"]
+            else:
+                self._left.wait(timeout)
+        except OSError:
+            pass
+        finally:
+            self.sock.close()
+        return self._remaining
+
+
+class RelayRouter:
+    """Maps session ids to relay sockets with the shared hash ring"""
+
+    def __init__(self, socket_dir, workers):
+        self.socket_dir = socket_dir
+        self.ring = HashRing(range(workers))
+
+    def worker_for(self, session_id):
+        return self.ring.node_for(session_id)
+
+    def socket_path_for(self, session_id):
+        return socket_path(self.socket_dir, self.worker_for(session_id))
+
+    def connect(self, session_id):
+        return RelayConnection(self.socket_path_for(session_id), session_id)
+
+
+def init_app(app):
+    """Register a RelayRouter on the app when the relay hub is configured"""
+    socket_dir = app.config.get("KARAOKE_RELAY_SOCKET_DIR")
+    workers = app.config.get("KARAOKE_RELAY_WORKERS", 0)
+    if socket_dir and workers:
+        app.extensions["karaoke_relay_router"] = RelayRouter(socket_dir, workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the karaoke relay hub")
+    parser.add_argument("--socket-dir", default=os.environ.get("KARAOKE_RELAY_SOCKET_DIR", "/tmp/kk-relay"))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("KARAOKE_RELAY_WORKERS") or os.cpu_count() or 1),
+    )
+    args = parser.parse_args()
+
+    processes = start_hub(args.socket_dir, args.workers)
+    print(f"Karaoke relay hub running {args.workers} workers in {args.socket_dir}")
+
+    def _terminate(*_):
+        for process in processes:
+            process.terminate()
+
+    signal.signal(signal.SIGTERM, _terminate)
+    signal.signal(signal.SIGINT, _terminate)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Lyrics cache for karaoke songs.
+
+get_song_lyrics used to call LRCLIB synchronously every time a song was
+opened. Lookups are now stored in song_lyrics, positive results for
+LYRICS_TTL and misses (negative entries) for NEGATIVE_TTL. LRC text is parsed
+once on write into a timeline of (ms offset, line) pairs, so clients get a
+ready-to-use array and line_at() can find the current line by binary search.
+
+LyricsPrefetcher warms the cache for newly added songs on a background
+thread, so the first singer does not wait for LRCLIB.
+"""
+
+import atexit
+import bisect
+import json
+import queue
+import re
+import threading
+from datetime import timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, get_sgt_now_naive, Song, SongLyrics
+
+LYRICS_TTL = timedelta(days=30)
+NEGATIVE_TTL = timedelta(hours=12)
+
+_TIMESTAMP_RE = re.compile(r"\[(\d+):(\d{1,2})(?:[.:](\d{1,3}))?\]")
+
+
+def parse_lrc(text):
+    """Parse LRC text into a list of (ms offset, line) sorted by offset
+
+    Lines with several timestamps are repeated at each one; metadata tags such
+    as [ar:...] and lines without timestamps are skipped.
+    """
+    timeline = []
+    for raw_line in (text or "").splitlines():
+        stamps = []
+        position = 0
+        while True:
+            match = _TIMESTAMP_RE.match(raw_line, position)
+            if not match:
+                break
+            minutes, seconds, fraction = match.groups()
+            fraction = (fraction or "0").ljust(3, "0")[:3]
+            stamps.append((int(minutes) * 60 + int(seconds)) * 1000 + int(fraction))
+            position = match.end()
+        if not stamps:
+            continue
+        line = raw_line[position:].strip()
+        timeline.extend((ms, line) for ms in stamps)
+    timeline.sort(key=lambda entry: entry[0])
+    return timeline
+
+
+def line_at(timeline, ms):
+    """Index of the line being sung at ms offset, or -1 before the first line"""
+    return bisect.bisect_right(timeline, ms, key=lambda entry: entry[0]) - 1
+
+
+def _store(song_id, lyrics_data, now):
+    entry = db.session.get(SongLyrics, song_id) or SongLyrics(song_id=song_id)
+    entry.fetched_at = now
+    if lyrics_data and lyrics_data.get("lyrics"):
+        entry.found = True
+        entry.raw_lrc = lyrics_data["lyrics"]
+        entry.plain_text = lyrics_data.get("plain_lyrics")
+        entry.timeline = json.dumps(parse_lrc(entry.raw_lrc), separators=(",", ":"))
+        entry.instrumental = bool(lyrics_data.get("instrumental"))
+        entry.source = lyrics_data.get("source", "lrclib")
+        entry.expires_at = now + LYRICS_TTL
+    else:
+        entry.found = False
+        entry.raw_lrc = entry.plain_text = entry.timeline = None
+        entry.instrumental = False
+        entry.source = None
+        entry.expires_at = now + NEGATIVE_TTL
+    db.session.add(entry)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # The prefetcher (or another request) stored this song first
+        db.session.rollback()
+        return db.session.get(SongLyrics, song_id)
+    return entry
+
+
+def forget_lyrics(song_id):
+    """Drop a song's cached lyrics (caller commits)"""
+    SongLyrics.query.filter_by(song_id=song_id).delete()
+
+
+def get_cached_lyrics(song):
+    """Return the song's SongLyrics entry, fetching from LRCLIB when missing or expired
+
+    Raises LyricsAPIError only when the API fails and nothing (not even a
+    stale entry) is cached.
+    """
+    from api_integrations import fetch_lyrics_from_lrclib, LyricsAPIError
+
+    now = get_sgt_now_naive()
+    entry = db.session.get(SongLyrics, song.id)
+    if entry is not None and entry.expires_at > now:
+        return entry
+
+    try:
+        lyrics_data = fetch_lyrics_from_lrclib(
+            title=song.title, artist=song.artist, duration=song.duration
+        )
+    except LyricsAPIError:
+        if entry is not None:
+            return entry  # Serve stale lyrics rather than nothing
+        raise
+    return _store(song.id, lyrics_data, now)
+
+
+def timeline_of(entry):
+    return json.loads(entry.timeline) if entry and entry.timeline else []
+
+
+class LyricsPrefetcher:
+    """Background worker that fills the lyrics cache for new songs"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._app = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def init_app(self, app):
+        self._app = app
+        app.extensions["karaoke_lyrics_prefetcher"] = self
+        atexit.register(self.stop)
+
+    def enqueue(self, song_ids):
+        if self._app is None:
+            return
+        for song_id in song_ids:
+            self._queue.put(song_id)
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="karaoke-lyrics-prefetcher", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        from api_integrations import LyricsAPIError
+
+        while True:
+            song_id = self._queue.get()
+            if song_id is None:
+                return
+            with self._app.app_context():
+                try:
+                    song = db.session.get(Song, song_id)
+                    if song is not None:
+                        get_cached_lyrics(song)
+                except LyricsAPIError as e:
+                    print(f"[LyricsPrefetcher] Could not fetch lyrics for song {song_id}: {e}")
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[LyricsPrefetcher] Failed for song {song_id}: {e}")
+                finally:
+                    db.session.remove()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stop(self, timeout=2.0):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+
+lyrics_prefetcher = LyricsPrefetcher()
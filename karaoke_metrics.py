@@ -0,0 +1,305 @@
+"""
+Relay instrumentation for karaoke sessions.
+
+Counters are plain integers updated under a per-session lock, so recording a
+frame costs a few additions and no string formatting. Snapshots are rendered
+on demand as JSON (/karaoke/metrics) or Prometheus text
+(/karaoke/metrics/prometheus).
+
+relay_log replaces the per-frame print() calls: messages are level-gated via
+the standard logging module and hot-path messages are additionally sampled.
+"""
+
+import bisect
+import itertools
+import logging
+import threading
+import time
+
+# Send latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+# How many recently finished sessions to keep in the JSON snapshot
+FINISHED_HISTORY = 50
+
+
+class SampledLogger:
+    """Level-gated logger that emits only every Nth hot-path message"""
+
+    def __init__(self, logger, sample_every=1000):
+        self.logger = logger
+        self.sample_every = sample_every
+        self._counter = itertools.count()
+
+    def debug(self, msg, *args):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(msg, *args)
+
+    def info(self, msg, *args):
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(msg, *args)
+
+    def warning(self, msg, *args):
+        self.logger.warning(msg, *args)
+
+    def sampled(self, msg, *args):
+        """Debug message from the per-frame path; formatted only when kept"""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        if next(self._counter) % self.sample_every == 0:
+            self.logger.debug(msg, *args)
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def merge(self, other):
+        for i, value in enumerate(other.counts):
+            self.counts[i] += value
+        self.total += other.total
+        self.count += other.count
+
+    def to_dict(self):
+        cumulative = list(itertools.accumulate(self.counts))
+        buckets = {str(bound): cumulative[i] for i, bound in enumerate(LATENCY_BUCKETS)}
+        buckets["+Inf"] = cumulative[-1]
+        return {"buckets": buckets, "sum": self.total, "count": self.count}
+
+
+class ClientStats:
+    def __init__(self, client_index):
+        self.client_index = client_index
+        self.connected_at = time.time()
+        self.frames_in = 0
+        self.bytes_in = 0
+        self.frames_out = 0
+        self.bytes_out = 0
+        self.drops = 0
+        self.send_latency = LatencyHistogram()
+
+    def to_dict(self):
+        return {
+            "client_index": self.client_index,
+            "connected_seconds": round(time.time() - self.connected_at, 3),
+            "frames_in": self.frames_in,
+            "bytes_in": self.bytes_in,
+            "frames_out": self.frames_out,
+            "bytes_out": self.bytes_out,
+            "drops": self.drops,
+            "send_latency": self.send_latency.to_dict(),
+        }
+
+
+class SessionStats:
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.started_at = time.time()
+        self.ended_at = None
+        self.lock = threading.Lock()
+        self.clients = {}  # Map of connection key to ClientStats
+        self.peak_participants = 0
+        # Totals from clients that already left
+        self.departed = ClientStats(None)
+
+    @property
+    def participants(self):
+        return len(self.clients)
+
+    def totals(self):
+        totals = ClientStats(None)
+        for client in itertools.chain(self.clients.values(), [self.departed]):
+            totals.frames_in += client.frames_in
+            totals.bytes_in += client.bytes_in
+            totals.frames_out += client.frames_out
+            totals.bytes_out += client.bytes_out
+            totals.drops += client.drops
+            totals.send_latency.merge(client.send_latency)
+        return totals
+
+    def to_dict(self):
+        with self.lock:
+            totals = self.totals().to_dict()
+            totals.pop("client_index")
+            totals.pop("connected_seconds")
+            end = self.ended_at or time.time()
+            return {
+                "session_id": self.session_id,
+                "participants": self.participants,
+                "peak_participants": self.peak_participants,
+                "lifetime_seconds": round(end - self.started_at, 3),
+                "ended": self.ended_at is not None,
+                **totals,
+                "clients": [client.to_dict() for client in self.clients.values()],
+            }
+
+
+class RelayMetrics:
+    """Registry of per-session and per-client relay statistics"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}  # Map of session_id to SessionStats
+        self.finished = []
+        self.queue_probes = {}  # Map of queue name to callable returning its depth
+
+    # Connection lifecycle -------------------------------------------------
+
+    def client_connected(self, session_id, key, client_index):
+        # Clients are added under the registry lock so a concurrent last
+        # disconnect cannot retire the session in between
+        with self.lock:
+            stats = self.sessions.get(session_id)
+            if stats is None:
+                stats = self.sessions[session_id] = SessionStats(session_id)
+            with stats.lock:
+                client = stats.clients[key] = ClientStats(client_index)
+                stats.peak_participants = max(stats.peak_participants, stats.participants)
+        return stats, client
+
+    def client_disconnected(self, stats, key):
+        with stats.lock:
+            client = stats.clients.pop(key, None)
+            if client is not None:
+                departed = stats.departed
+                departed.frames_in += client.frames_in
+                departed.bytes_in += client.bytes_in
+                departed.frames_out += client.frames_out
+                departed.bytes_out += client.bytes_out
+                departed.drops += client.drops
+                departed.send_latency.merge(client.send_latency)
+            empty = not stats.clients
+
+        if empty:
+            with self.lock:
+                if self.sessions.get(stats.session_id) is stats and not stats.clients:
+                    del self.sessions[stats.session_id]
+                    stats.ended_at = time.time()
+                    self.finished.append(stats)
+                    del self.finished[:-FINISHED_HISTORY]
+
+    # Hot path ---------------------------------------------------------------
+
+    @staticmethod
+    def frame_in(stats, client, size):
+        with stats.lock:
+            client.frames_in += 1
+            client.bytes_in += size
+
+    @staticmethod
+    def frame_out(stats, client, size, seconds):
+        with stats.lock:
+            client.frames_out += 1
+            client.bytes_out += size
+            client.send_latency.observe(seconds)
+
+    @staticmethod
+    def drop(stats, client):
+        with stats.lock:
+            client.drops += 1
+
+    # Export -----------------------------------------------------------------
+
+    def register_queue(self, name, probe):
+        self.queue_probes[name] = probe
+
+    def queue_depths(self):
+        return {name: probe() for name, probe in self.queue_probes.items()}
+
+    def snapshot(self):
+        with self.lock:
+            live = list(self.sessions.values())
+            finished = list(self.finished)
+        return {
+            "generated_at": time.time(),
+            "live_sessions": len(live),
+            "connected_participants": sum(s.participants for s in live),
+            "queue_depth": self.queue_depths(),
+            "sessions": [s.to_dict() for s in live],
+            "recently_finished": [s.to_dict() for s in finished],
+        }
+
+    def prometheus(self):
+        """Render live sessions in the Prometheus text exposition format"""
+        with self.lock:
+            live = list(self.sessions.values())
+
+        lines = [
+            "# HELP karaoke_live_sessions Sessions with at least one connected participant",
+            "# TYPE karaoke_live_sessions gauge",
+            f"karaoke_live_sessions {len(live)}",
+            "# HELP karaoke_queue_depth Items waiting in karaoke background queues",
+            "# TYPE karaoke_queue_depth gauge",
+        ]
+        for name, depth in self.queue_depths().items():
+            lines.append(f'karaoke_queue_depth{{queue="{_label_value(name)}"}} {depth}')
+
+        series = {
+            "karaoke_session_participants": ("gauge", "Connected participants", []),
+            "karaoke_session_lifetime_seconds": ("gauge", "Seconds since the session's first connection", []),
+            "karaoke_frames_in_total": ("counter", "Frames received from clients", []),
+            "karaoke_bytes_in_total": ("counter", "Bytes received from clients", []),
+            "karaoke_frames_out_total": ("counter", "Frames relayed to clients", []),
+            "karaoke_bytes_out_total": ("counter", "Bytes relayed to clients", []),
+            "karaoke_drops_total": ("counter", "Frames that failed to send", []),
+        }
+        latency_lines = []
+        now = time.time()
+        for stats in live:
+            label = f'session="{_label_value(stats.session_id)}"'
+            with stats.lock:
+                totals = stats.totals()
+                series["karaoke_session_participants"][2].append(f"{{{label}}} {stats.participants}")
+                series["karaoke_session_lifetime_seconds"][2].append(
+                    f"{{{label}}} {now - stats.started_at:.3f}"
+                )
+            series["karaoke_frames_in_total"][2].append(f"{{{label}}} {totals.frames_in}")
+            series["karaoke_bytes_in_total"][2].append(f"{{{label}}} {totals.bytes_in}")
+            series["karaoke_frames_out_total"][2].append(f"{{{label}}} {totals.frames_out}")
+            series["karaoke_bytes_out_total"][2].append(f"{{{label}}} {totals.bytes_out}")
+            series["karaoke_drops_total"][2].append(f"{{{label}}} {totals.drops}")
+
+            histogram = totals.send_latency.to_dict()
+            for bound, count in histogram["buckets"].items():
+                latency_lines.append(
+                    f'karaoke_send_latency_seconds_bucket{{{label},le="{bound}"}} {count}'
+                )
+            latency_lines.append(f"karaoke_send_latency_seconds_sum{{{label}}} {histogram['sum']:.6f}")
+            latency_lines.append(f"karaoke_send_latency_seconds_count{{{label}}} {histogram['count']}")
+
+        for name, (kind, help_text, samples) in series.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{sample}" for sample in samples)
+
+        lines.append("# HELP karaoke_send_latency_seconds Time to hand one frame to a client socket")
+        lines.append("# TYPE karaoke_send_latency_seconds histogram")
+        lines.extend(latency_lines)
+        return "\n".join(lines) + "\n"
+
+
+def _label_value(value):
+    """Escape a label value for the Prometheus text format (backslash, quote, newline)"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def init_app(app):
+    """Apply KARAOKE_RELAY_LOG_LEVEL to the relay logger"""
+    logger = relay_log.logger
+    logger.setLevel(app.config.get("KARAOKE_RELAY_LOG_LEVEL", "WARNING"))
+    relay_log.sample_every = app.config.get("KARAOKE_RELAY_LOG_SAMPLE_EVERY", relay_log.sample_every)
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        logger.addHandler(handler)
+
+
+relay_metrics = RelayMetrics()
+relay_log = SampledLogger(logging.getLogger("karaoke.relay"))
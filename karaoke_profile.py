@@ -0,0 +1,162 @@
+"""
+Karaoke profile view for /api/user/profile.
+
+build_profile_view() assembles the profile payload from the per-user stats
+summary and one eagerly loaded score -> session -> song query. ProfileCache
+keeps the built payload and its ETag per user; an entry is reused while the
+user's stats summary and vocal range profile are unchanged (so writes in
+other workers invalidate it too), save_score/delete_score drop it in this
+process, and it expires after a TTL so the ranking catches up with other
+users' scores. At most
+cache_size users are kept; the least recently used are dropped first.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.orm import selectinload
+
+from models import db, Score, Session, UserKaraokeStats, VocalRangeProfile
+from karaoke_vocal_range import profile_summary
+
+RECENT_SCORES = 100
+PROFILE_CACHE_SIZE = 2048  # Users whose built profiles are kept per worker
+
+
+def _avg_or_zero(values):
+    clean = [v for v in values if v is not None]
+    if not clean:
+        return 0
+    return round(sum(clean) / len(clean), 1)
+
+
+def build_profile_view(user_id):
+    """Build the /api/user/profile payload for a user"""
+    from database import get_user_stats, get_recommended_songs
+
+    stats = get_user_stats(user_id) or {}
+    scores = (
+        Score.query.filter_by(user_id=user_id)
+        .options(selectinload(Score.session).joinedload(Session.song))
+        .order_by(Score.created_at.desc())
+        .limit(RECENT_SCORES)
+        .all()
+    )
+
+    average_score = stats.get("average_score", 0)
+    if isinstance(average_score, float):
+        average_score = round(average_score, 1)
+
+    # Favorite genres with counts, and recent activity from the latest five scores
+    genre_counts = {}
+    recent_activity = []
+    for i, score in enumerate(scores):
+        song = score.session.song if score.session else None
+        if song is None:
+            continue
+        if song.genre:
+            genre_counts[song.genre] = genre_counts.get(song.genre, 0) + 1
+        if i < 5:
+            recent_activity.append(
+                {
+                    "song": song.title,
+                    "artist": song.artist,
+                    "score": score.score,
+                    "date": score.created_at.strftime("%Y-%m-%d"),
+                }
+            )
+    favorite_genres = sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)[:3]
+    vocal_range = profile_summary(db.session.get(VocalRangeProfile, user_id))
+
+    recommendations = [
+        {
+            "id": song.id,
+            "title": song.title,
+            "artist": song.artist,
+            "difficulty": song.difficulty or "medium",
+            "thumbnail": None,
+        }
+        for song in get_recommended_songs(user_id, limit=5)
+    ]
+
+    return {
+        "stats": {
+            "totalSessions": stats.get("total_sessions", 0),
+            "totalSongs": stats.get("total_songs", 0),
+            "highestScore": stats.get("highest_score", 0),
+            "averageScore": average_score,
+            "ranking": stats.get("ranking"),
+            "improvementRate": stats.get("improvement_rate", 0),
+        },
+        "skills": {
+            "pitchAccuracy": _avg_or_zero([s.accuracy for s in scores]),
+            "rhythmAccuracy": _avg_or_zero([s.timing for s in scores]),
+            "vocalRange": vocal_range["percent"] if vocal_range else 0,
+            "songCompletion": _avg_or_zero([s.completeness for s in scores]),
+        },
+        "vocalRange": vocal_range,
+        "favoriteGenres": [
+            {"name": genre, "count": count, "icon": "music"}
+            for genre, count in favorite_genres
+        ],
+        "recentActivity": recent_activity,
+        "recommendations": recommendations,
+    }
+
+
+class ProfileCache:
+    """Per-user cache of built profile payloads and their ETags"""
+
+    def __init__(self, ttl=300, cache_size=PROFILE_CACHE_SIZE):
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # Map of user_id to (version, built_at, payload, etag), LRU first
+
+    @staticmethod
+    def _version(user_id):
+        row = (
+            db.session.query(UserKaraokeStats.total_sessions, UserKaraokeStats.updated_at)
+            .filter(UserKaraokeStats.user_id == user_id)
+            .first()
+        )
+        # The payload includes the vocal range, which is analysed separately
+        vocal_range_at = (
+            db.session.query(VocalRangeProfile.updated_at)
+            .filter(VocalRangeProfile.user_id == user_id)
+            .scalar()
+        )
+        return (
+            (row.total_sessions, row.updated_at.isoformat() if row.updated_at else None) if row else None,
+            vocal_range_at.isoformat() if vocal_range_at else None,
+        )
+
+    def get(self, user_id):
+        """Return (payload, etag), rebuilding when the user's stats changed"""
+        version = self._version(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+        if entry is not None and entry[0] == version and time.monotonic() - entry[1] < self.ttl:
+            return entry[2], entry[3]
+
+        payload = build_profile_view(user_id)
+        body = json.dumps(payload, sort_keys=True, default=str).encode()
+        etag = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            self._entries[user_id] = (version, time.monotonic(), payload, etag)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.cache_size:
+                self._entries.popitem(last=False)
+        return payload, etag
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+profile_cache = ProfileCache()
@@ -0,0 +1,131 @@
+"""
+Item-item collaborative filtering for karaoke song recommendations.
+
+build_song_neighbors() is the batch job (flask build-song-neighbors): it
+builds a user x song interaction matrix from the scores table, weighting each
+performance by its score and an exponential recency decay, computes cosine
+similarity between song columns with SciPy sparse products, and stores the
+top-K neighbours of every song in song_neighbors.
+
+recommend_songs() is the online side: it takes the user's recent
+performances, looks up their songs' neighbours in one query and merges them
+into a top-N list of songs the user has not sung yet. It returns fewer songs
+(or none) when there is too little history or the neighbour table is empty;
+get_recommended_songs then falls back to its genre/difficulty heuristic.
+"""
+
+import heapq
+
+import numpy as np
+from scipy import sparse
+
+from models import db, get_sgt_now, get_sgt_now_naive, Score, Session, Song, SongNeighbor, UserKaraokeStats
+
+TOP_K = 20
+HALF_LIFE_DAYS = 90
+HISTORY_LIMIT = 50
+
+
+def _now_like(moment):
+    """Current SGT time, naive or aware to match stored timestamps"""
+    return get_sgt_now() if moment.tzinfo else get_sgt_now_naive()
+
+
+def _interaction_weights(scores, created_at, now, half_life_days=HALF_LIFE_DAYS):
+    """Score-and-recency weight of each performance"""
+    age_days = np.array([(now - moment).total_seconds() / 86400 for moment in created_at])
+    decay = np.power(0.5, np.clip(age_days, 0, None) / half_life_days)
+    return np.asarray(scores, dtype=np.float64) / 100.0 * decay
+
+
+def build_song_neighbors(top_k=TOP_K, half_life_days=HALF_LIFE_DAYS):
+    """Recompute and persist the top-K neighbours of every song; returns rows written"""
+    rows = (
+        db.session.query(Score.user_id, Session.song_id, Score.score, Score.created_at)
+        .join(Session, Score.session_id == Session.id)
+        .filter(Session.song_id.isnot(None), Score.created_at.isnot(None))
+        .all()
+    )
+
+    SongNeighbor.query.delete()
+    if not rows:
+        db.session.commit()
+        return 0
+
+    user_ids, song_ids, scores, created_at = zip(*rows)
+    now = _now_like(created_at[0])
+    weights = _interaction_weights(scores, created_at, now, half_life_days)
+
+    user_index, users = np.unique(np.asarray(user_ids), return_inverse=True)
+    song_index, songs = np.unique(np.asarray(song_ids), return_inverse=True)
+
+    # Repeat performances of a song by the same user are summed by tocsc()
+    interactions = sparse.coo_matrix(
+        (weights, (users, songs)), shape=(len(user_index), len(song_index))
+    ).tocsc()
+
+    norms = np.sqrt(np.asarray(interactions.multiply(interactions).sum(axis=0))).ravel()
+    norms[norms == 0] = 1.0
+    normalized = interactions @ sparse.diags(1.0 / norms)
+    similarity = (normalized.T @ normalized).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    mappings = []
+    for row in range(similarity.shape[0]):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        if start == end:
+            continue
+        values = similarity.data[start:end]
+        columns = similarity.indices[start:end]
+        if len(values) > top_k:
+            keep = np.argpartition(values, -top_k)[-top_k:]
+            values, columns = values[keep], columns[keep]
+        song_id = int(song_index[row])
+        mappings.extend(
+            {"song_id": song_id, "neighbor_id": int(song_index[column]), "similarity": float(value)}
+            for column, value in zip(columns, values)
+        )
+
+    for i in range(0, len(mappings), 5000):
+        db.session.bulk_insert_mappings(SongNeighbor, mappings[i:i + 5000])
+    db.session.commit()
+    return len(mappings)
+
+
+def recommend_songs(user_id, limit=5, exclude_ids=()):
+    """Top-N unsung songs by neighbour similarity to the user's recent performances"""
+    history = (
+        db.session.query(Session.song_id, Score.score, Score.created_at)
+        .join(Session, Score.session_id == Session.id)
+        .filter(Score.user_id == user_id, Session.song_id.isnot(None))
+        .order_by(Score.created_at.desc())
+        .limit(HISTORY_LIMIT)
+        .all()
+    )
+    if not history:
+        return []
+
+    song_ids, scores, created_at = zip(*history)
+    now = _now_like(created_at[0])
+    user_weights = {}
+    for song_id, weight in zip(song_ids, _interaction_weights(scores, created_at, now)):
+        user_weights[song_id] = user_weights.get(song_id, 0.0) + float(weight)
+
+    stats = db.session.get(UserKaraokeStats, user_id)
+    excluded = set(stats.sung_song_ids if stats else user_weights) | set(exclude_ids)
+
+    candidates = {}
+    neighbors = SongNeighbor.query.filter(SongNeighbor.song_id.in_(list(user_weights))).with_entities(
+        SongNeighbor.song_id, SongNeighbor.neighbor_id, SongNeighbor.similarity
+    )
+    for song_id, neighbor_id, similarity in neighbors:
+        if neighbor_id in excluded:
+            continue
+        candidates[neighbor_id] = candidates.get(neighbor_id, 0.0) + user_weights[song_id] * similarity
+
+    top = heapq.nlargest(limit, candidates.items(), key=lambda item: item[1])
+    if not top:
+        return []
+    songs = {song.id: song for song in Song.query.filter(Song.id.in_([song_id for song_id, _ in top]))}
+    return [songs[song_id] for song_id, _ in top if song_id in songs]
@@ -0,0 +1,424 @@
+"""
+Opt-in recording of karaoke session audio for replay and re-scoring.
+
+Each connection's Int16 PCM frames are appended to chunked raw files under
+<recording dir>/<session_id>/ (one track per recording id the caller picks), next to a fixed-size binary index that maps
+frame sequence numbers to (chunk, offset). Writes happen on a background
+thread with buffered files, so the relay path only pays for a queue put.
+
+RecordingReader memory-maps the index and chunk files, so any time range can
+be read (or analysed) without loading the whole recording.
+"""
+
+import atexit
+import bisect
+import json
+import mmap
+import os
+import queue
+import re
+import shutil
+import struct
+import threading
+import time
+
+import numpy as np
+
+CHUNK_BYTES = 16 * 1024 * 1024
+WRITE_BUFFER_BYTES = 256 * 1024
+SAMPLE_WIDTH = 2  # Int16 mono
+
+# seq, chunk, chunk_offset, length, stream_offset, wall_ms
+INDEX_RECORD = struct.Struct("<IIIIQQ")
+
+_FRAME = "frame"
+_TAG = "tag"
+_FINISH = "finish"
+
+_SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,100}$")
+
+
+def _chunk_name(participant, chunk):
+    return f"{participant}-{chunk:04d}.pcm"
+
+
+def _index_name(participant):
+    return f"{participant}.idx"
+
+
+class _TrackWriter:
+    """Append-only writer for one participant's track"""
+
+    def __init__(self, session_dir, participant):
+        self.session_dir = session_dir
+        self.participant = participant
+        self.seq = 0
+        self.chunk = 0
+        self.chunk_offset = 0
+        self.stream_offset = 0
+        self._resume()
+        self.index = open(
+            os.path.join(session_dir, _index_name(participant)), "ab", buffering=WRITE_BUFFER_BYTES
+        )
+        self.data = self._open_chunk()
+
+    def _resume(self):
+        """Continue an existing track (e.g. after a recorder restart) instead of restarting it"""
+        path = os.path.join(self.session_dir, _index_name(self.participant))
+        if not os.path.exists(path) or os.path.getsize(path) < INDEX_RECORD.size:
+            return
+        with open(path, "rb") as f:
+            f.seek(-INDEX_RECORD.size, os.SEEK_END)
+            seq, chunk, chunk_offset, length, stream_offset, _ = INDEX_RECORD.unpack(f.read())
+        self.seq = seq + 1
+        self.chunk = chunk
+        self.chunk_offset = chunk_offset + length
+        self.stream_offset = stream_offset + length
+
+    def _open_chunk(self):
+        path = os.path.join(self.session_dir, _chunk_name(self.participant, self.chunk))
+        return open(path, "ab", buffering=WRITE_BUFFER_BYTES)
+
+    def append(self, frame, wall_ms):
+        if self.chunk_offset and self.chunk_offset + len(frame) > CHUNK_BYTES:
+            self.data.close()
+            self.chunk += 1
+            self.chunk_offset = 0
+            self.data = self._open_chunk()
+
+        self.data.write(frame)
+        self.index.write(
+            INDEX_RECORD.pack(
+                self.seq, self.chunk, self.chunk_offset, len(frame), self.stream_offset, wall_ms
+            )
+        )
+        self.seq += 1
+        self.chunk_offset += len(frame)
+        self.stream_offset += len(frame)
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+
+class SessionRecorder:
+    """Background recorder; does nothing until init_app sees KARAOKE_RECORDING_DIR"""
+
+    def __init__(self):
+        self.root = None
+        self.sample_rate = 48000
+        self.max_total_bytes = None
+        self.max_age_seconds = None
+        self.sweep_interval = 300
+        self._queue = queue.Queue()
+        self._tracks = {}  # Map of (session_id, participant) to _TrackWriter
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._finish_listeners = []
+
+    @property
+    def enabled(self):
+        return self.root is not None
+
+    def init_app(self, app):
+        root = app.config.get("KARAOKE_RECORDING_DIR")
+        if not root:
+            return
+        self.root = root
+        self.sample_rate = app.config.get("KARAOKE_RECORDING_SAMPLE_RATE", self.sample_rate)
+        self.max_total_bytes = app.config.get("KARAOKE_RECORDING_MAX_BYTES")
+        max_age_days = app.config.get("KARAOKE_RECORDING_MAX_AGE_DAYS")
+        self.max_age_seconds = max_age_days * 86400 if max_age_days else None
+        os.makedirs(self.root, exist_ok=True)
+        app.extensions["karaoke_recorder"] = self
+        atexit.register(self.stop)
+
+    # ------------------------------------------------------------------
+    # Producer API (relay path)
+    # ------------------------------------------------------------------
+
+    def record(self, session_id, participant, frame):
+        if self.root is None or not _SESSION_ID_RE.match(session_id):
+            return
+        self._queue.put((_FRAME, session_id, participant, bytes(frame), int(time.time() * 1000)))
+        self._ensure_started()
+
+    def tag_participant(self, session_id, participant, username):
+        """Remember which user a participant track belongs to (stored in meta.json)"""
+        if self.root is None or not _SESSION_ID_RE.match(session_id):
+            return
+        self._queue.put((_TAG, session_id, participant, username, None))
+        self._ensure_started()
+
+    def finish(self, session_id, participant):
+        if self.root is None or not _SESSION_ID_RE.match(session_id):
+            return
+        self._queue.put((_FINISH, session_id, participant, None, None))
+        self._ensure_started()
+
+    def add_finish_listener(self, callback):
+        """Call callback(session_id, participant) on the recorder thread once a track is closed"""
+        self._finish_listeners.append(callback)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="karaoke-recorder", daemon=True
+            )
+            self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                item = None
+
+            if item is None:
+                self._maybe_sweep()
+                continue
+            if item[0] == "stop":
+                break
+            try:
+                self._handle(item)
+            except OSError as e:
+                print(f"[Recorder] Failed to write {item[0]} for session {item[1]}: {e}")
+            self._maybe_sweep()
+
+    def _handle(self, item):
+        kind, session_id, participant, payload, wall_ms = item
+        key = (session_id, participant)
+
+        if kind == _FRAME:
+            track = self._tracks.get(key)
+            if track is None:
+                session_dir = self.session_dir(session_id)
+                os.makedirs(session_dir, exist_ok=True)
+                track = self._tracks[key] = _TrackWriter(session_dir, participant)
+                self._update_meta(session_id, participant, None)
+            track.append(payload, wall_ms)
+        elif kind == _TAG:
+            os.makedirs(self.session_dir(session_id), exist_ok=True)
+            self._update_meta(session_id, participant, payload)
+        elif kind == _FINISH:
+            track = self._tracks.pop(key, None)
+            if track is not None:
+                track.close()
+                for callback in self._finish_listeners:
+                    callback(session_id, participant)
+
+    def _update_meta(self, session_id, participant, username):
+        path = os.path.join(self.session_dir(session_id), "meta.json")
+        meta = {"sample_rate": self.sample_rate, "sample_width": SAMPLE_WIDTH, "participants": {}}
+        if os.path.exists(path):
+            with open(path) as f:
+                meta = json.load(f)
+        entry = meta["participants"].setdefault(str(participant), {})
+        if username:
+            entry["username"] = username
+        with open(path, "w") as f:
+            json.dump(meta, f)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stop(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(("stop", None, None, None, None))
+            self._thread.join(5)
+        for track in self._tracks.values():
+            track.close()
+        self._tracks.clear()
+
+    # ------------------------------------------------------------------
+    # Retention
+    # ------------------------------------------------------------------
+
+    def session_dir(self, session_id):
+        return os.path.join(self.root, session_id)
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        try:
+            self.sweep()
+        except OSError as e:
+            print(f"[Recorder] Retention sweep failed: {e}")
+
+    def sweep(self):
+        """Delete finished recordings older than the age limit, then oldest-first over the size cap"""
+        if self.root is None:
+            return []
+        live = {session_id for session_id, _ in self._tracks}
+        recordings = []
+        for session_id in os.listdir(self.root):
+            path = os.path.join(self.root, session_id)
+            if session_id in live or not os.path.isdir(path):
+                continue
+            files = [os.path.join(path, name) for name in os.listdir(path)]
+            size = sum(os.path.getsize(f) for f in files)
+            mtime = max((os.path.getmtime(f) for f in files), default=os.path.getmtime(path))
+            recordings.append((mtime, size, session_id, path))
+        recordings.sort()
+
+        removed = []
+        if self.max_age_seconds:
+            cutoff = time.time() - self.max_age_seconds
+            while recordings and recordings[0][0] < cutoff:
+                _, _, session_id, path = recordings.pop(0)
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(session_id)
+
+        if self.max_total_bytes:
+            total = sum(size for _, size, _, _ in recordings)
+            while recordings and total > self.max_total_bytes:
+                _, size, session_id, path = recordings.pop(0)
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                removed.append(session_id)
+
+        return removed
+
+
+class RecordingReader:
+    """Random-access, memory-mapped reader for one participant's recorded track"""
+
+    def __init__(self, session_dir, participant):
+        self.session_dir = session_dir
+        self.participant = participant
+
+        with open(os.path.join(session_dir, "meta.json")) as f:
+            meta = json.load(f)
+        self.sample_rate = meta["sample_rate"]
+        self.sample_width = meta.get("sample_width", SAMPLE_WIDTH)
+        self.username = meta["participants"].get(str(participant), {}).get("username")
+
+        self._index = self._map(os.path.join(session_dir, _index_name(participant)))
+        self.frame_count = len(self._index) // INDEX_RECORD.size if self._index is not None else 0
+        self._chunks = {}
+        self._offsets = _RecordField(self._index, self.frame_count, 4)
+
+    @staticmethod
+    def _map(path):
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        for chunk in self._chunks.values():
+            if chunk is not None:
+                chunk.close()
+        if self._index is not None:
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, seq):
+        """Return (seq, chunk, chunk_offset, length, stream_offset, wall_ms) for a frame"""
+        return INDEX_RECORD.unpack_from(self._index, seq * INDEX_RECORD.size)
+
+    @property
+    def total_bytes(self):
+        if not self.frame_count:
+            return 0
+        last = self.record(self.frame_count - 1)
+        return last[4] + last[3]
+
+    @property
+    def duration(self):
+        return self.total_bytes / (self.sample_rate * self.sample_width)
+
+    def _chunk(self, chunk):
+        if chunk not in self._chunks:
+            self._chunks[chunk] = self._map(
+                os.path.join(self.session_dir, _chunk_name(self.participant, chunk))
+            )
+        return self._chunks[chunk]
+
+    def read_bytes(self, start_byte, end_byte):
+        """Read a contiguous stream byte range by walking only the index records it covers"""
+        end_byte = min(end_byte, self.total_bytes)
+        if start_byte >= end_byte:
+            return b""
+
+        seq = max(bisect.bisect_right(self._offsets, start_byte) - 1, 0)
+        out = bytearray()
+        while seq < self.frame_count:
+            _, chunk, chunk_offset, length, stream_offset, _ = self.record(seq)
+            if stream_offset >= end_byte:
+                break
+            lo = max(start_byte - stream_offset, 0)
+            hi = min(end_byte - stream_offset, length)
+            data = self._chunk(chunk)
+            out += data[chunk_offset + lo:chunk_offset + hi]
+            seq += 1
+        return bytes(out)
+
+    def read_range(self, start_seconds, end_seconds):
+        """Read raw Int16 PCM between two offsets (seconds from the start of the track)"""
+        bytes_per_second = self.sample_rate * self.sample_width
+        start = int(start_seconds * self.sample_rate) * self.sample_width
+        end = int(end_seconds * bytes_per_second) // self.sample_width * self.sample_width
+        return self.read_bytes(start, end)
+
+    def read_frames(self, first_seq, last_seq):
+        """Read frames first_seq..last_seq inclusive, exactly as they were received"""
+        first_seq = max(first_seq, 0)
+        last_seq = min(last_seq, self.frame_count - 1)
+        if first_seq > last_seq:
+            return b""
+        start = self.record(first_seq)[4]
+        last = self.record(last_seq)
+        return self.read_bytes(start, last[4] + last[3])
+
+    def samples(self, start_seconds, end_seconds):
+        return np.frombuffer(self.read_range(start_seconds, end_seconds), dtype="<i2")
+
+    def rms_levels(self, start_seconds, end_seconds, window_ms=50):
+        """Windowed RMS level (0..1) over a time range, for re-scoring and waveforms"""
+        samples = self.samples(start_seconds, end_seconds).astype(np.float32) / 32768.0
+        window = max(int(self.sample_rate * window_ms / 1000), 1)
+        usable = len(samples) - len(samples) % window
+        if usable == 0:
+            return np.zeros(0, dtype=np.float32)
+        frames = samples[:usable].reshape(-1, window)
+        return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+class _RecordField:
+    """Sequence view over one uint64 field of the mmapped index, for bisect"""
+
+    def __init__(self, buf, count, field):
+        self._buf = buf
+        self._count = count
+        self._field = field
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        return INDEX_RECORD.unpack_from(self._buf, i * INDEX_RECORD.size)[self._field]
+
+
+def list_participants(session_dir):
+    with open(os.path.join(session_dir, "meta.json")) as f:
+        return list(json.load(f)["participants"].keys())
+
+
+session_recorder = SessionRecorder()
@@ -0,0 +1,174 @@
+"""
+Karaoke session lifecycle: live-session registry and stale-session sweeper.
+
+LiveSessionRegistry keeps, per web worker, the ids of users who take part in
+a waiting or active session. The queue endpoints consult it first and skip
+the database entirely for users without a live session, which is most
+requests. Any commit that adds, changes or deletes a Session or
+SessionParticipant bumps a marker file shared by all workers (the same
+mechanism as song_catalog.CatalogVersion); the registry reloads itself with
+one indexed query on its next read after the marker changes.
+
+SessionSweeper completes sessions left in waiting/active because a client
+never connected or crashed before audio_ws's finally block ran. It runs on a
+background thread every KARAOKE_SESSION_SWEEP_INTERVAL seconds and updates
+stale rows in batches, using the sessions(status, created_at) index.
+"""
+
+import atexit
+import threading
+from datetime import timedelta
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session as OrmSession
+
+from models import db, get_sgt_now_naive, Session, SessionParticipant
+from song_catalog import CatalogVersion
+
+LIVE_STATUSES = ("waiting", "active")
+SWEEP_BATCH_SIZE = 500
+
+live_sessions_version = CatalogVersion("live_sessions.version", "KARAOKE_LIVE_SESSIONS_VERSION_FILE")
+
+
+def live_sessions_changed():
+    """Record that sessions or their participants changed (other workers reload)"""
+    live_sessions_version.bump()
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _track_session_changes(orm_session, flush_context):
+    for instance in (*orm_session.new, *orm_session.dirty, *orm_session.deleted):
+        if isinstance(instance, (Session, SessionParticipant)):
+            orm_session.info["live_sessions_changed"] = True
+            return
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _bump_after_commit(orm_session):
+    if orm_session.info.pop("live_sessions_changed", False):
+        live_sessions_changed()
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_after_rollback(orm_session):
+    orm_session.info.pop("live_sessions_changed", None)
+
+
+class LiveSessionRegistry:
+    """Per-worker set of users with a waiting or active session"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = None  # Set of user ids
+        self._version = None
+
+    def init_app(self, app):
+        live_sessions_version.init_app(app)
+        app.extensions["karaoke_live_sessions"] = self
+
+    def _load(self):
+        version = live_sessions_version.current()
+        with self._lock:
+            if self._users is not None and self._version == version:
+                return self._users
+
+        users = {
+            user_id
+            for (user_id,) in db.session.query(SessionParticipant.user_id)
+            .join(Session, SessionParticipant.session_id == Session.id)
+            .filter(Session.status.in_(LIVE_STATUSES))
+            .distinct()
+        }
+        with self._lock:
+            self._users = users
+            self._version = version
+        return users
+
+    def has_live_session(self, user_id):
+        return user_id in self._load()
+
+    def count(self):
+        return len(self._load())
+
+
+class SessionSweeper:
+    """Background thread that completes stale waiting/active sessions"""
+
+    def __init__(self, batch_size=SWEEP_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.interval = 300
+        self.waiting_ttl = timedelta(hours=2)
+        self.active_ttl = timedelta(hours=6)
+        self._app = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._stopping = False
+
+    def init_app(self, app):
+        self._app = app
+        self.interval = app.config.get("KARAOKE_SESSION_SWEEP_INTERVAL", self.interval)
+        self.waiting_ttl = timedelta(seconds=app.config.get("KARAOKE_SESSION_WAITING_TTL", 2 * 3600))
+        self.active_ttl = timedelta(seconds=app.config.get("KARAOKE_SESSION_ACTIVE_TTL", 6 * 3600))
+        app.extensions["karaoke_session_sweeper"] = self
+        atexit.register(self.stop)
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="karaoke-session-sweeper", daemon=True)
+            self._thread.start()
+
+    def _stale_ids(self, status, cutoff):
+        query = db.session.query(Session.id).filter(
+            Session.status == status, Session.created_at < cutoff
+        )
+        if status == "active":
+            # A session queued long ago may only just have started
+            # (created_at, started_at and completed_at are all naive SGT)
+            query = query.filter(func.coalesce(Session.started_at, Session.created_at) < cutoff)
+        return [session_id for (session_id,) in query.order_by(Session.created_at).limit(self.batch_size)]
+
+    def sweep(self):
+        """Complete stale sessions in batches; returns how many were expired"""
+        now = get_sgt_now_naive()
+        expired = 0
+        for status, ttl in (("waiting", self.waiting_ttl), ("active", self.active_ttl)):
+            cutoff = now - ttl
+            while True:
+                ids = self._stale_ids(status, cutoff)
+                if not ids:
+                    break
+                expired += (
+                    Session.query.filter(Session.id.in_(ids), Session.status == status)
+                    .update({"status": "completed", "completed_at": now}, synchronize_session=False)
+                )
+                db.session.commit()
+                if len(ids) < self.batch_size:
+                    break
+        if expired:
+            live_sessions_changed()
+        return expired
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            if self._stopping:
+                return
+            with self._app.app_context():
+                try:
+                    expired = self.sweep()
+                    if expired:
+                        print(f"[SessionSweeper] Completed {expired} stale sessions")
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[SessionSweeper] Sweep failed: {e}")
+                finally:
+                    db.session.remove()
+
+    def stop(self, timeout=2.0):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+
+
+live_sessions = LiveSessionRegistry()
+session_sweeper = SessionSweeper()
@@ -0,0 +1,60 @@
+"""
+Downsampling for karaoke score time series.
+
+lttb_indices() implements Largest-Triangle-Three-Buckets for several series
+sharing one x axis: the point kept from each bucket is the one whose
+triangle with the previously kept point and the next bucket's average spans
+the largest area summed over the series. Bucket bounds and next-bucket
+averages are computed with NumPy up front, so the per-bucket step is a single
+vectorized argmax.
+"""
+
+import numpy as np
+
+
+def lttb_indices(x, ys, threshold):
+    """Indices of the points to keep (always including the first and last)
+
+    x is a 1-D array of increasing positions, ys a 2-D array with one row per
+    series (NaN marks a missing value) and threshold the number of points
+    wanted; fewer points than that are returned unchanged.
+    """
+    x = np.asarray(x, dtype=float)
+    ys = np.atleast_2d(np.asarray(ys, dtype=float))
+    n = x.shape[0]
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Missing metrics contribute no area but must not poison the averages
+    # (mean of the present values; an all-missing series is all zeros)
+    missing = np.isnan(ys)
+    present = np.maximum((~missing).sum(axis=1, keepdims=True), 1)
+    means = np.where(missing, 0.0, ys).sum(axis=1, keepdims=True) / present
+    filled = np.nan_to_num(np.where(missing, means, ys))
+
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(int)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Average of the following bucket (the last point for the final bucket)
+    next_starts = np.append(starts[1:], n - 1)
+    next_ends = np.append(ends[1:], n)
+    sums_x = np.concatenate(([0.0], np.cumsum(x)))
+    sums_y = np.concatenate((np.zeros((filled.shape[0], 1)), np.cumsum(filled, axis=1)), axis=1)
+    counts = next_ends - next_starts
+    avg_x = (sums_x[next_ends] - sums_x[next_starts]) / counts
+    avg_y = (sums_y[:, next_ends] - sums_y[:, next_starts]) / counts
+
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        bx = x[start:end]
+        by = filled[:, start:end]
+        area = np.abs(
+            (x[previous] - avg_x[bucket]) * (by - filled[:, [previous]])
+            - (x[previous] - bx) * (avg_y[:, [bucket]] - filled[:, [previous]])
+        ).sum(axis=0)
+        previous = start + int(np.argmax(area))
+        keep[bucket + 1] = previous
+    return keep
@@ -0,0 +1,311 @@
+"""
+Vocal range profiling from recorded karaoke audio.
+
+When session recording is enabled (see karaoke_recorder.py), every closed
+participant track is queued here. A background thread runs a vectorized
+autocorrelation pitch tracker over the new part of the track, converts
+voiced frames to semitones (MIDI note numbers) and adds them to the user's
+semitone histogram in vocal_range_profiles. The robust range (5th-95th
+percentile) and tessitura (25th-75th) are read off the cumulative
+histogram, so updates are incremental and profile reads never touch audio.
+
+vocal_range_tracks records how many bytes of each track have been analysed,
+so reconnects (which extend a track) and re-runs only process new audio.
+`flask analyze-vocal-range` backfills every stored recording.
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+
+from models import db, get_sgt_now, User, VocalRangeProfile, VocalRangeTrack
+
+ANALYSIS_RATE = 16000  # Tracks are decimated to roughly this rate before analysis
+FRAME_SIZE = 1024  # 64 ms at 16 kHz
+HOP_SIZE = 512
+MIN_HZ = 70.0
+MAX_HZ = 1100.0
+SILENCE_RMS = 0.01  # Frames quieter than this (full scale = 1.0) are unvoiced
+VOICING_THRESHOLD = 0.6  # Minimum normalized autocorrelation at the chosen period
+BLOCK_SECONDS = 30  # Audio read per step, bounding memory on long tracks
+
+HISTOGRAM_LOW_NOTE = 24  # C1
+HISTOGRAM_HIGH_NOTE = 96  # C7
+MIN_VOICED_SECONDS = 2.0  # Evidence needed before a range is published
+FULL_RANGE_SEMITONES = 36  # Three octaves counts as 100% on the profile page
+
+_NOTE_NAMES = ("C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B")
+
+
+def note_name(midi_note):
+    """Scientific pitch name of a MIDI note number (60 -> C4)"""
+    if midi_note is None:
+        return None
+    return f"{_NOTE_NAMES[midi_note % 12]}{midi_note // 12 - 1}"
+
+
+def _decimate(samples, sample_rate):
+    """Box-filter and downsample to about ANALYSIS_RATE; returns (samples, rate)"""
+    factor = max(int(sample_rate // ANALYSIS_RATE), 1)
+    if factor == 1:
+        return samples, float(sample_rate)
+    usable = len(samples) - len(samples) % factor
+    return samples[:usable].reshape(-1, factor).mean(axis=1), sample_rate / factor
+
+
+def _window_autocorrelation():
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    spectrum = np.fft.rfft(window, n=2 * FRAME_SIZE)
+    return window, np.fft.irfft(np.abs(spectrum) ** 2)[:FRAME_SIZE]
+
+
+_WINDOW, _WINDOW_AC = _window_autocorrelation()
+
+
+def track_pitch(samples, sample_rate):
+    """MIDI note numbers (floats) of the voiced frames in Int16 or float samples
+
+    All frames are analysed at once: windowed autocorrelation via FFT,
+    corrected for the window's own autocorrelation, searched between the
+    first zero crossing and the MIN_HZ period. The smallest lag within 10% of
+    the best peak is kept to avoid octave-down errors.
+    """
+    x = np.asarray(samples)
+    if x.dtype.kind == "i":
+        x = x.astype(np.float32) / 32768.0
+    x, rate = _decimate(x.astype(np.float32, copy=False), sample_rate)
+    if len(x) < FRAME_SIZE:
+        return np.zeros(0)
+
+    frames = np.lib.stride_tricks.sliding_window_view(x, FRAME_SIZE)[::HOP_SIZE]
+    frames = frames - frames.mean(axis=1, keepdims=True)
+    loud = np.sqrt(np.mean(frames * frames, axis=1)) > SILENCE_RMS
+    frames = frames[loud]
+    if not len(frames):
+        return np.zeros(0)
+
+    spectrum = np.fft.rfft(frames * _WINDOW, n=2 * FRAME_SIZE, axis=1)
+    ac = np.fft.irfft(np.abs(spectrum) ** 2, axis=1)[:, :FRAME_SIZE]
+    ac = ac / (ac[:, :1] + 1e-12) * (_WINDOW_AC[0] / np.maximum(_WINDOW_AC, 1e-12))
+
+    min_lag = max(int(rate / MAX_HZ), 2)
+    max_lag = min(int(rate / MIN_HZ), FRAME_SIZE // 2)
+    lags = np.arange(FRAME_SIZE)
+
+    # Ignore the main lobe around lag 0: start after the first negative value
+    first_negative = np.argmax(ac < 0, axis=1)
+    first_negative[first_negative == 0] = FRAME_SIZE
+    search = (lags >= np.maximum(first_negative, min_lag)[:, None]) & (lags <= max_lag)
+    masked = np.where(search, ac, -np.inf)
+
+    best = masked.max(axis=1)
+    candidate = np.argmax(masked >= 0.9 * best[:, None], axis=1)
+    # Refine to the local peak just after the first lag that came close to the best
+    near = search & (lags >= candidate[:, None]) & (lags <= (candidate * 1.25 + 1)[:, None])
+    lag = np.argmax(np.where(near, ac, -np.inf), axis=1)
+
+    rows = np.arange(len(frames))
+    strength = ac[rows, lag]
+    voiced = np.isfinite(best) & (strength >= VOICING_THRESHOLD) & (lag > 0) & (lag < FRAME_SIZE - 1)
+    rows, lag = rows[voiced], lag[voiced]
+
+    # Parabolic interpolation around the peak for sub-sample periods
+    left, centre, right = ac[rows, lag - 1], ac[rows, lag], ac[rows, lag + 1]
+    denominator = left - 2 * centre + right
+    shift = np.where(np.abs(denominator) > 1e-12, 0.5 * (left - right) / denominator, 0.0)
+    period = lag + np.clip(shift, -0.5, 0.5)
+
+    frequency = rate / period
+    in_range = (frequency >= MIN_HZ) & (frequency <= MAX_HZ)
+    return 69 + 12 * np.log2(frequency[in_range] / 440.0)
+
+
+def note_histogram(notes):
+    """Counts of rounded MIDI notes from HISTOGRAM_LOW_NOTE to HISTOGRAM_HIGH_NOTE"""
+    size = HISTOGRAM_HIGH_NOTE - HISTOGRAM_LOW_NOTE + 1
+    if not len(notes):
+        return np.zeros(size, dtype=np.int64)
+    bins = np.clip(np.rint(notes).astype(int) - HISTOGRAM_LOW_NOTE, 0, size - 1)
+    return np.bincount(bins, minlength=size)
+
+
+def histogram_percentile(histogram, fraction):
+    """MIDI note at a cumulative fraction of a note histogram (None when empty)"""
+    counts = np.asarray(histogram)
+    total = counts.sum()
+    if not total:
+        return None
+    return HISTOGRAM_LOW_NOTE + int(np.searchsorted(np.cumsum(counts), fraction * total))
+
+
+def profile_summary(profile):
+    """Range, tessitura and a 0-100 width score for a VocalRangeProfile (or None)"""
+    if profile is None or profile.low_note is None or profile.high_note is None:
+        return None
+    histogram = json.loads(profile.histogram or "[]")
+    tessitura_low = histogram_percentile(histogram, 0.25)
+    tessitura_high = histogram_percentile(histogram, 0.75)
+    semitones = profile.high_note - profile.low_note
+    return {
+        "low": note_name(profile.low_note),
+        "high": note_name(profile.high_note),
+        "lowNote": profile.low_note,
+        "highNote": profile.high_note,
+        "semitones": semitones,
+        "tessitura": {"low": note_name(tessitura_low), "high": note_name(tessitura_high)},
+        "percent": min(round(semitones / FULL_RANGE_SEMITONES * 100), 100),
+    }
+
+
+def _fold_into_profile(user_id, histogram, voiced_seconds, new_track):
+    profile = db.session.get(VocalRangeProfile, user_id)
+    if profile is None:
+        profile = VocalRangeProfile(user_id=user_id, histogram="[]", voiced_seconds=0.0, tracks_analyzed=0)
+        db.session.add(profile)
+
+    previous = np.array(json.loads(profile.histogram or "[]"), dtype=np.int64)
+    combined = histogram.copy()
+    combined[: len(previous)] += previous[: len(combined)]
+    profile.histogram = json.dumps(combined.tolist(), separators=(",", ":"))
+    profile.voiced_seconds = (profile.voiced_seconds or 0.0) + voiced_seconds
+    if new_track:
+        profile.tracks_analyzed = (profile.tracks_analyzed or 0) + 1
+    if profile.voiced_seconds >= MIN_VOICED_SECONDS:
+        profile.low_note = histogram_percentile(combined, 0.05)
+        profile.high_note = histogram_percentile(combined, 0.95)
+
+
+def analyze_track(session_dir, participant):
+    """Fold the unanalysed part of one recorded track into its user's profile
+
+    Returns the number of voiced seconds added (0 when there was nothing new
+    or the track cannot be attributed to a user). Caller handles the app context.
+    """
+    from karaoke_recorder import RecordingReader
+
+    session_id = os.path.basename(os.path.normpath(session_dir))
+    with RecordingReader(session_dir, participant) as reader:
+        if not reader.username:
+            return 0.0
+        user = User.query.filter_by(username=str(reader.username)).first()
+        if user is None:
+            return 0.0
+
+        track = db.session.get(VocalRangeTrack, (session_id, participant))
+        start = track.analyzed_bytes if track is not None else 0
+        end = reader.total_bytes
+        if end <= start:
+            return 0.0
+
+        histogram = note_histogram(())
+        block = BLOCK_SECONDS * reader.sample_rate * reader.sample_width
+        for offset in range(start, end, block):
+            pcm = reader.read_bytes(offset, min(offset + block, end))
+            histogram += note_histogram(track_pitch(np.frombuffer(pcm, dtype="<i2"), reader.sample_rate))
+
+    analysis_rate = reader.sample_rate / max(int(reader.sample_rate // ANALYSIS_RATE), 1)
+    voiced_seconds = float(histogram.sum()) * HOP_SIZE / analysis_rate
+    if track is None:
+        track = VocalRangeTrack(session_id=session_id, participant=participant, user_id=user.id)
+        db.session.add(track)
+    track.analyzed_bytes = end
+    track.analyzed_at = get_sgt_now()
+    _fold_into_profile(user.id, histogram, voiced_seconds, new_track=start == 0)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker analysed this track at the same time
+        db.session.rollback()
+        return 0.0
+
+    from karaoke_profile import profile_cache
+
+    profile_cache.invalidate(user.id)
+    return voiced_seconds
+
+
+def analyze_recordings(root):
+    """Analyse every stored recording under root (flask analyze-vocal-range)"""
+    from karaoke_recorder import list_participants
+
+    analyzed = 0
+    for session_id in sorted(os.listdir(root)):
+        session_dir = os.path.join(root, session_id)
+        if not os.path.exists(os.path.join(session_dir, "meta.json")):
+            continue
+        for participant in list_participants(session_dir):
+            try:
+                if analyze_track(session_dir, participant):
+                    analyzed += 1
+            except (OSError, ValueError) as e:
+                db.session.rollback()
+                print(f"[VocalRange] Skipped {session_id}/{participant}: {e}")
+    return analyzed
+
+
+class VocalRangeAnalyzer:
+    """Background worker that analyses recorded tracks as they are closed"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._app = None
+        self._recorder = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def init_app(self, app, recorder):
+        if not recorder.enabled:
+            return
+        self._app = app
+        self._recorder = recorder
+        recorder.add_finish_listener(self.enqueue)
+        app.extensions["karaoke_vocal_range"] = self
+        atexit.register(self.stop)
+
+    def enqueue(self, session_id, participant):
+        if self._app is None:
+            return
+        self._queue.put((session_id, participant))
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="karaoke-vocal-range", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            session_id, participant = item
+            with self._app.app_context():
+                try:
+                    analyze_track(self._recorder.session_dir(session_id), participant)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[VocalRange] Failed for {session_id}/{participant}: {e}")
+                finally:
+                    db.session.remove()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stop(self, timeout=2.0):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+
+vocal_range_analyzer = VocalRangeAnalyzer()
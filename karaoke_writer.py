@@ -0,0 +1,230 @@
+"""
+Background writer for karaoke session lifecycle changes.
+
+The audio WebSocket handler must never block on the database, so join,
+activate and complete events are queued here and applied by a single
+background worker. Events are drained in batches and written in one
+transaction; every write is an idempotent upsert so replays and duplicate
+events are harmless.
+"""
+
+import atexit
+import queue
+import threading
+import time
+
+from models import Session as SessionModel
+from models import SessionParticipant, User, db, get_sgt_now_naive
+
+EVENT_USER_JOIN = "user_join"
+EVENT_SESSION_ACTIVE = "session_active"
+EVENT_SESSION_COMPLETED = "session_completed"
+
+
+class SessionWriter:
+    """Queue-backed writer that applies session lifecycle events in batches"""
+
+    def __init__(self, max_batch=100, max_wait=0.25):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._app = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stopping = False
+
+    def init_app(self, app):
+        """Bind the writer to a Flask app (needed for the worker's app context)"""
+        self._app = app
+        app.extensions["karaoke_session_writer"] = self
+        atexit.register(self.stop)
+
+    # ------------------------------------------------------------------
+    # Producer API (called from the audio path; never touches the DB)
+    # ------------------------------------------------------------------
+
+    def user_joined(self, session_id, username, display_name=None, role="singer"):
+        self._put(
+            {
+                "kind": EVENT_USER_JOIN,
+                "session_id": session_id,
+                "username": username,
+                "display_name": display_name,
+                "role": role,
+            }
+        )
+
+    def session_activated(self, session_id):
+        self._put({"kind": EVENT_SESSION_ACTIVE, "session_id": session_id})
+
+    def session_completed(self, session_id):
+        self._put({"kind": EVENT_SESSION_COMPLETED, "session_id": session_id})
+
+    def _put(self, event):
+        event["at"] = get_sgt_now_naive()  # Same clock as Session.created_at and the sweeper
+        self._queue.put(event)
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name="karaoke-session-writer", daemon=True
+            )
+            self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while not self._stopping:
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def _next_batch(self):
+        """Block for the first event, then drain until the batch is full or max_wait passes"""
+        try:
+            first = self._queue.get(timeout=1.0)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        if self._app is None:
+            print(f"[SessionWriter] No app bound, dropping {len(batch)} events")
+            return
+
+        with self._app.app_context():
+            try:
+                apply_events(batch)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"[SessionWriter] Batch of {len(batch)} failed ({e}), retrying one by one")
+                for event in batch:
+                    try:
+                        apply_events([event])
+                        db.session.commit()
+                    except Exception as item_error:
+                        db.session.rollback()
+                        print(f"[SessionWriter] Dropped {event['kind']} for {event['session_id']}: {item_error}")
+            finally:
+                db.session.remove()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def flush(self, timeout=5.0):
+        """Wait until the worker has picked up every queued event"""
+        deadline = time.monotonic() + timeout
+        while not self._queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def stop(self, timeout=5.0):
+        """Drain outstanding events synchronously and stop the worker"""
+        self._stopping = True
+        if self._thread is not None:
+            self._thread.join(timeout)
+        pending = []
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if pending:
+            self._write(pending)
+
+
+def apply_events(events):
+    """Apply a batch of lifecycle events inside the current transaction (no commit)"""
+    sessions = _load_sessions({e["session_id"] for e in events})
+    users = _load_users({e["username"] for e in events if e["kind"] == EVENT_USER_JOIN})
+    seen_joins = set()
+
+    for event in events:
+        karaoke_session = sessions.get(event["session_id"])
+        if karaoke_session is None:
+            continue
+
+        if event["kind"] == EVENT_SESSION_ACTIVE:
+            if karaoke_session.status == "waiting":
+                karaoke_session.status = "active"
+                karaoke_session.started_at = event["at"]
+
+        elif event["kind"] == EVENT_SESSION_COMPLETED:
+            if karaoke_session.status != "completed":
+                karaoke_session.status = "completed"
+                karaoke_session.completed_at = event["at"]
+
+        elif event["kind"] == EVENT_USER_JOIN:
+            user = _upsert_user(users, event["username"], event["display_name"])
+            key = (karaoke_session.id, user.username)
+            if key in seen_joins:
+                continue
+            seen_joins.add(key)
+            _upsert_participant(karaoke_session, user, event["role"])
+
+
+def _load_sessions(session_ids):
+    if not session_ids:
+        return {}
+    rows = SessionModel.query.filter(SessionModel.session_id.in_(session_ids)).all()
+    return {row.session_id: row for row in rows}
+
+
+def _load_users(usernames):
+    if not usernames:
+        return {}
+    rows = User.query.filter(User.username.in_(usernames)).all()
+    return {row.username: row for row in rows}
+
+
+def _upsert_user(users, username, display_name):
+    """Same semantics as database.get_or_create_user, without committing"""
+    user = users.get(username)
+    if user is None:
+        user = User(
+            username=username,
+            display_name=display_name or username,
+            email=f"{username}@example.com",
+        )
+        user.set_password("password123")  # Default password for auto-created users
+        db.session.add(user)
+        db.session.flush()
+        users[username] = user
+    elif display_name and user.display_name != display_name:
+        user.display_name = display_name
+    return user
+
+
+def _upsert_participant(karaoke_session, user, role):
+    exists = (
+        db.session.query(SessionParticipant.id)
+        .filter_by(session_id=karaoke_session.id, user_id=user.id)
+        .first()
+    )
+    if not exists:
+        db.session.add(
+            SessionParticipant(session_id=karaoke_session.id, user_id=user.id, role=role)
+        )
+        db.session.flush()
+
+
+session_writer = SessionWriter()
@@ -0,0 +1,344 @@
+"""
+Load generator and latency benchmark for the karaoke audio relay.
+
+Starts the app the same way entrypoint.sh does (gunicorn + eventlet), opens
+M sessions with N simulated singers each against /karaoke/ws/<session_id>,
+and has every client send paced Int16 PCM frames. Each frame carries its
+send timestamp, so receivers measure end-to-end fan-out latency.
+
+    python karaoke_ws_benchmark.py --sessions 20 --clients 4 --duration 30 \\
+        --output bench.json --compare previous-bench.json
+
+Results (latency percentiles, throughput, server CPU, dropped frames) are
+written as JSON so runs can be compared between commits; --compare exits
+non-zero when p99 latency or drops regress past --tolerance.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import time
+import urllib.request
+import uuid
+
+import numpy as np
+import websockets
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# sender id, sequence number, monotonic send time (ns)
+FRAME_HEADER = struct.Struct("<IIQ")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_health(base_url, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/healthz", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError(f"Server at {base_url} did not become healthy")
+
+
+def start_server(port, workers):
+    """Start gunicorn with the eventlet worker, as entrypoint.sh does"""
+    command = [
+        sys.executable, "-m", "gunicorn",
+        "-k", "eventlet",
+        "-w", str(workers),
+        "-b", f"127.0.0.1:{port}",
+        "app:app",
+    ]
+    return subprocess.Popen(command, cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+
+
+def _process_tree(root_pid):
+    """PIDs of root_pid and all its descendants (Linux /proc only)"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def _cpu_seconds(root_pid):
+    """User + system CPU seconds used by a process tree, or None when /proc is unavailable"""
+    if root_pid is None or not os.path.isdir("/proc"):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    total = 0
+    for pid in _process_tree(root_pid):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        total += int(fields[11]) + int(fields[12])
+    return total / ticks
+
+
+class ClientResult:
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latencies_ns = []
+        self.errors = 0
+
+
+async def run_client(url, sender_id, frame_bytes, interval, start_at, stop_at, drain, result, ready):
+    payload = bytes(random.getrandbits(8) for _ in range(frame_bytes - FRAME_HEADER.size))
+    try:
+        async with websockets.connect(url, max_size=None, ping_interval=None) as ws:
+            ready.set()
+
+            async def receive():
+                async for message in ws:
+                    if isinstance(message, str):
+                        continue  # connected:/PARTICIPANT_UPDATE control messages
+                    _, _, sent_ns = FRAME_HEADER.unpack_from(message)
+                    result.latencies_ns.append(time.monotonic_ns() - sent_ns)
+                    result.received += 1
+                    result.bytes_received += len(message)
+
+            receiver = asyncio.create_task(receive())
+
+            # Wait for the whole session to connect so no frame is relayed to a partial room
+            await asyncio.sleep(max(0.0, start_at - time.monotonic()))
+
+            seq = 0
+            next_send = time.monotonic()
+            while next_send < stop_at:
+                frame = FRAME_HEADER.pack(sender_id, seq, time.monotonic_ns()) + payload
+                await ws.send(frame)
+                result.sent += 1
+                result.bytes_sent += len(frame)
+                seq += 1
+                next_send += interval
+                await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+
+            # Let in-flight frames arrive before closing
+            await asyncio.sleep(drain)
+            receiver.cancel()
+    except (OSError, websockets.WebSocketException):
+        result.errors += 1
+        ready.set()
+
+
+async def run_load(base_ws_url, sessions, clients, duration, frame_samples, sample_rate, ramp):
+    frame_bytes = frame_samples * 2  # Int16 mono
+    interval = frame_samples / sample_rate
+    drain = max(1.0, interval * 10)
+
+    results = []
+    tasks = []
+    ready_events = []
+    start = time.monotonic() + ramp
+    stop_at = start + duration
+    sender_id = 0
+    for _ in range(sessions):
+        session_url = f"{base_ws_url}/karaoke/ws/bench-{uuid.uuid4().hex[:12]}"
+        session_results = []
+        for _ in range(clients):
+            result = ClientResult()
+            ready = asyncio.Event()
+            session_results.append(result)
+            ready_events.append(ready)
+            tasks.append(
+                asyncio.create_task(
+                    run_client(
+                        session_url, sender_id, frame_bytes, interval, start, stop_at, drain, result, ready
+                    )
+                )
+            )
+            sender_id += 1
+        results.append(session_results)
+
+    await asyncio.gather(*(event.wait() for event in ready_events))
+    await asyncio.gather(*tasks)
+    return results, frame_bytes, interval
+
+
+def summarize(results, clients, duration, cpu_seconds, wall_seconds, client_cpu_seconds):
+    flat = [r for session in results for r in session]
+    latencies = np.array([ns for r in flat for ns in r.latencies_ns], dtype=np.float64) / 1e6
+
+    expected = 0
+    for session in results:
+        sent = sum(r.sent for r in session)
+        # Every frame should reach the other clients of its session
+        expected += sent * (clients - 1)
+    received = sum(r.received for r in flat)
+
+    def pct(q):
+        return round(float(np.percentile(latencies, q)), 3) if latencies.size else None
+
+    return {
+        "frames_sent": sum(r.sent for r in flat),
+        "frames_expected": expected,
+        "frames_received": received,
+        "dropped_frames": max(expected - received, 0),
+        "drop_rate": round((expected - received) / expected, 6) if expected else 0.0,
+        "connection_errors": sum(r.errors for r in flat),
+        "latency_ms": {
+            "p50": pct(50),
+            "p95": pct(95),
+            "p99": pct(99),
+            "max": round(float(latencies.max()), 3) if latencies.size else None,
+            "mean": round(float(latencies.mean()), 3) if latencies.size else None,
+        },
+        "throughput": {
+            "frames_in_per_second": round(sum(r.sent for r in flat) / duration, 1),
+            "frames_out_per_second": round(received / duration, 1),
+            "bytes_out_per_second": round(sum(r.bytes_received for r in flat) / duration, 1),
+        },
+        "server_cpu_percent": round(100 * cpu_seconds / wall_seconds, 1) if cpu_seconds is not None else None,
+        "loadgen_cpu_percent": round(100 * client_cpu_seconds / wall_seconds, 1),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path, tolerance):
+    """Print a comparison with a previous run; returns False on regression"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    ok = True
+    print(f"Comparing against {baseline_path} (commit {baseline.get('commit')})")
+    for key in ("p50", "p95", "p99"):
+        old = baseline["results"]["latency_ms"][key]
+        new = current["results"]["latency_ms"][key]
+        if old is None or new is None:
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        print(f"  latency {key}: {old:.3f} -> {new:.3f} ms ({change:+.1f}%)")
+        if key == "p99" and change > tolerance:
+            ok = False
+
+    old_drop = baseline["results"]["drop_rate"]
+    new_drop = current["results"]["drop_rate"]
+    print(f"  drop rate: {old_drop:.4%} -> {new_drop:.4%}")
+    if new_drop > old_drop + tolerance / 1000:
+        ok = False
+
+    old_cpu = baseline["results"].get("server_cpu_percent")
+    new_cpu = current["results"].get("server_cpu_percent")
+    if old_cpu is not None and new_cpu is not None:
+        print(f"  server CPU: {old_cpu}% -> {new_cpu}%")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Karaoke WebSocket relay benchmark")
+    parser.add_argument("--sessions", "-m", type=int, default=10, help="Concurrent sessions (M)")
+    parser.add_argument("--clients", "-n", type=int, default=3, help="Clients per session (N)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of sending per client")
+    parser.add_argument("--frame-samples", type=int, default=2048, help="Int16 samples per frame")
+    parser.add_argument("--sample-rate", type=int, default=48000)
+    parser.add_argument("--ramp", type=float, default=2.0, help="Seconds to wait after connecting")
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn workers when starting the app")
+    parser.add_argument("--url", help="Benchmark an already running server instead (e.g. http://localhost:5000)")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="Allowed p99 regression in percent")
+    args = parser.parse_args()
+
+    server = None
+    server_pid = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(port, args.workers)
+        server_pid = server.pid
+
+    try:
+        _wait_for_health(base_url)
+        base_ws_url = "ws" + base_url[len("http"):]
+
+        cpu_before = _cpu_seconds(server_pid)
+        client_cpu_before = time.process_time()
+        wall_before = time.monotonic()
+
+        results, frame_bytes, interval = asyncio.run(
+            run_load(
+                base_ws_url, args.sessions, args.clients, args.duration,
+                args.frame_samples, args.sample_rate, args.ramp,
+            )
+        )
+
+        wall = time.monotonic() - wall_before
+        cpu_after = _cpu_seconds(server_pid)
+        cpu_seconds = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+        summary = summarize(
+            results, args.clients, args.duration, cpu_seconds, wall, time.process_time() - client_cpu_before
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(10)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "sessions": args.sessions,
+            "clients_per_session": args.clients,
+            "duration_seconds": args.duration,
+            "frame_bytes": frame_bytes,
+            "frame_interval_ms": round(interval * 1000, 3),
+            "sample_rate": args.sample_rate,
+            "workers": args.workers if server is not None else None,
+            "url": base_url,
+        },
+        "results": summary,
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare and not compare(report, args.compare, args.tolerance):
+        print("Regression detected")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
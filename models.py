@@ -1,6 +1,8 @@
 import json
+import re
 import secrets
 import hashlib
+import unicodedata
 from datetime import datetime, timedelta
 import pytz
 from flask_sqlalchemy import SQLAlchemy
@@ -89,6 +91,12 @@ class User(db.Model):
     scores = db.relationship(
         "Score", back_populates="user", cascade="all, delete-orphan"
     )
+    leaderboard_rollups = db.relationship(
+        "LeaderboardRollup", back_populates="user", cascade="all, delete-orphan"
+    )
+    karaoke_stats = db.relationship(
+        "UserKaraokeStats", back_populates="user", uselist=False, cascade="all, delete-orphan"
+    )
 
     # Methods
     def set_password(self, password):
@@ -317,21 +325,37 @@ class Song(db.Model):
     """Song library model"""
 
     __tablename__ = "songs"
+    __table_args__ = (
+        # Dedupe key for imports; NULL for rows that duplicated an older song
+        # when the column was added
+        db.Index("uq_songs_normalized_key", "normalized_key", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(200), nullable=False)
+    title = db.Column(db.String(200), nullable=False, index=True)
     artist = db.Column(db.String(200), nullable=False)
-    genre = db.Column(db.String(50))
+    genre = db.Column(db.String(50), index=True)
     duration = db.Column(db.Integer)  # Duration in seconds
-    difficulty = db.Column(db.String(20))  # easy, medium, hard
+    difficulty = db.Column(db.String(20), index=True)  # easy, medium, hard
+    difficulty_score = db.Column(db.Float, index=True)  # 0-100, see karaoke_difficulty.py
     youtube_url = db.Column(db.String(500))
     audio_url = db.Column(db.String(500))  # Direct audio file URL (fallback)
     lyrics_url = db.Column(db.String(500))
+    normalized_key = db.Column(db.String(420))  # See Song.normalize_key
     created_at = db.Column(db.DateTime, default=get_sgt_now)
 
     # Relationships
     sessions = db.relationship("Session", back_populates="song")
 
+    @staticmethod
+    def normalize_key(title, artist):
+        """Case-, width- and punctuation-insensitive (title, artist) key"""
+        def fold(text):
+            text = unicodedata.normalize("NFKC", text or "").casefold()
+            return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+        return f"{fold(title)}|{fold(artist)}"
+
     def __repr__(self):
         return f"<Song {self.title} by {self.artist}>"
 
@@ -343,6 +367,7 @@ class Song(db.Model):
             "genre": self.genre,
             "duration": self.duration,
             "difficulty": self.difficulty,
+            "difficulty_score": self.difficulty_score,
             "youtube_url": self.youtube_url,
             "lyrics_url": self.lyrics_url,
             "created_at": self.created_at.isoformat(),
@@ -353,6 +378,10 @@ class Session(db.Model):
     """Karaoke session model"""
 
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Live-session lookups and the stale-session sweeper
+        db.Index("ix_sessions_status_created", "status", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.String(100), unique=True, nullable=False)
@@ -393,6 +422,10 @@ class SessionParticipant(db.Model):
     """Join table for session participants"""
 
     __tablename__ = "session_participants"
+    __table_args__ = (
+        # A user's sessions (queue, active sessions, duplicate-queue check)
+        db.Index("ix_session_participants_user_session", "user_id", "session_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.Integer, db.ForeignKey("sessions.id"), nullable=False)
@@ -421,6 +454,10 @@ class Score(db.Model):
     """Score/Leaderboard model"""
 
     __tablename__ = "scores"
+    __table_args__ = (
+        # Per-user score history in time order (improvement chart, stats windows)
+        db.Index("ix_scores_user_created", "user_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.Integer, db.ForeignKey("sessions.id"), nullable=False)
@@ -456,3 +493,147 @@ class Score(db.Model):
             "notes": self.notes,
             "created_at": self.created_at.isoformat(),
         }
+
+
+class LeaderboardRollup(db.Model):
+    """Per-user karaoke totals for one leaderboard period (maintained by save_score)"""
+
+    __tablename__ = "leaderboard_rollups"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "period_kind", "period_start", "user_id", name="uq_leaderboard_rollup_period_user"
+        ),
+        # Top-N by mic time (leaderboard) and by sessions (monthly top players)
+        db.Index("ix_leaderboard_rollup_mic_time", "period_kind", "period_start", "total_mic_time"),
+        db.Index("ix_leaderboard_rollup_sessions", "period_kind", "period_start", "session_count", "score_sum"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    period_kind = db.Column(db.String(10), nullable=False)  # week, month, year, all
+    period_start = db.Column(db.Date, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    total_mic_time = db.Column(db.Integer, nullable=False, default=0)
+    session_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    max_score = db.Column(db.Integer, nullable=False, default=0)
+
+    user = db.relationship("User", back_populates="leaderboard_rollups")
+
+    def __repr__(self):
+        return f"<LeaderboardRollup {self.period_kind} {self.period_start} user={self.user_id}>"
+
+
+class UserKaraokeStats(db.Model):
+    """Per-user karaoke summary (maintained by save_score/delete_score)"""
+
+    __tablename__ = "user_karaoke_stats"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_sessions = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    best_score = db.Column(db.Integer, nullable=False, default=0)
+    total_mic_time = db.Column(db.Integer, nullable=False, default=0)
+    first_scores = db.Column(db.Text, nullable=False, default="[]")  # JSON [[created_at, score_id, score], ...] oldest 3
+    last_scores = db.Column(db.Text, nullable=False, default="[]")  # JSON, newest 3
+    genre_totals = db.Column(db.Text, nullable=False, default="{}")  # JSON {genre: [score_sum, count]}
+    difficulty_totals = db.Column(db.Text, nullable=False, default="{}")  # JSON {difficulty: [score_sum, count]}
+    song_counts = db.Column(db.Text, nullable=False, default="{}")  # JSON {song_id: times sung}
+    updated_at = db.Column(db.DateTime, default=get_sgt_now, onupdate=get_sgt_now)
+
+    user = db.relationship("User", back_populates="karaoke_stats")
+
+    def __repr__(self):
+        return f"<UserKaraokeStats user={self.user_id} sessions={self.total_sessions}>"
+
+    def load(self, column):
+        return json.loads(getattr(self, column) or ("[]" if column.endswith("_scores") else "{}"))
+
+    def store(self, column, value):
+        setattr(self, column, json.dumps(value))
+
+    @property
+    def average_score(self):
+        return self.score_sum / self.total_sessions if self.total_sessions else 0
+
+    @property
+    def sung_song_ids(self):
+        return {int(song_id) for song_id in self.load("song_counts")}
+
+
+class SongNeighbor(db.Model):
+    """Top-K most similar songs per song (written by karaoke_recommender.build_song_neighbors)"""
+
+    __tablename__ = "song_neighbors"
+
+    song_id = db.Column(db.Integer, db.ForeignKey("songs.id", ondelete="CASCADE"), primary_key=True)
+    neighbor_id = db.Column(db.Integer, db.ForeignKey("songs.id", ondelete="CASCADE"), primary_key=True)
+    similarity = db.Column(db.Float, nullable=False)
+    built_at = db.Column(db.DateTime, default=get_sgt_now)
+
+    def __repr__(self):
+        return f"<SongNeighbor {self.song_id} -> {self.neighbor_id} ({self.similarity:.3f})>"
+
+
+class SongLyrics(db.Model):
+    """Cached lyrics lookup for a song (see karaoke_lyrics.py); found=False is a negative entry"""
+
+    __tablename__ = "song_lyrics"
+
+    song_id = db.Column(db.Integer, db.ForeignKey("songs.id", ondelete="CASCADE"), primary_key=True)
+    found = db.Column(db.Boolean, nullable=False, default=False)
+    raw_lrc = db.Column(db.Text)  # Synced LRC (or plain text when no synced version exists)
+    plain_text = db.Column(db.Text)
+    timeline = db.Column(db.Text)  # JSON [[ms offset, line], ...] parsed from raw_lrc
+    instrumental = db.Column(db.Boolean, default=False)
+    source = db.Column(db.String(20))  # lrclib
+    fetched_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<SongLyrics song={self.song_id} found={self.found}>"
+
+
+class CommunityStatsSnapshot(db.Model):
+    """Precomputed community statistics (see community_stats.py), one row per snapshot name"""
+
+    __tablename__ = "community_stats_snapshots"
+
+    name = db.Column(db.String(40), primary_key=True)
+    payload = db.Column(db.Text, nullable=False)  # JSON stats document
+    computed_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<CommunityStatsSnapshot {self.name} at {self.computed_at}>"
+
+
+class VocalRangeProfile(db.Model):
+    """Per-user vocal range built from recorded karaoke audio (see karaoke_vocal_range.py)"""
+
+    __tablename__ = "vocal_range_profiles"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Semitone histogram of voiced frames: JSON list of counts from HISTOGRAM_LOW_NOTE up
+    histogram = db.Column(db.Text, nullable=False, default="[]")
+    low_note = db.Column(db.Integer, index=True)  # MIDI note at the 5th percentile
+    high_note = db.Column(db.Integer, index=True)  # MIDI note at the 95th percentile
+    voiced_seconds = db.Column(db.Float, nullable=False, default=0.0)
+    tracks_analyzed = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=get_sgt_now, onupdate=get_sgt_now)
+
+    def __repr__(self):
+        return f"<VocalRangeProfile user={self.user_id} {self.low_note}-{self.high_note}>"
+
+
+class VocalRangeTrack(db.Model):
+    """How much of a recorded participant track has been folded into a vocal range profile"""
+
+    __tablename__ = "vocal_range_tracks"
+
+    session_id = db.Column(db.String(100), primary_key=True)  # Session.session_id
+    participant = db.Column(db.String(32), primary_key=True)  # Recording id of the connection
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    analyzed_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    analyzed_at = db.Column(db.DateTime, default=get_sgt_now)
+
+    def __repr__(self):
+        return f"<VocalRangeTrack {self.session_id}/{self.participant} user={self.user_id}>"
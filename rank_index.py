@@ -0,0 +1,274 @@
+"""
+In-memory rank index for karaoke rankings.
+
+"What's my rank" used to be a GROUP BY over every score. Instead, each user's
+all-time total mic time and best score are kept in a Fenwick tree over value
+buckets, so counting the users ahead of a value is O(log n) and updating a
+user is two O(log n) point updates.
+
+The index is built from the all-time leaderboard rollups at startup and
+updated by save_score/delete_score. Other web workers' writes are picked up
+by sync(), which applies scores with ids above the last one seen; a periodic
+full rebuild covers deletes made by other processes. That rebuild runs on a
+background thread (one at a time) and reads into new trees, so lookups keep
+answering from the current index until the new one is swapped in.
+"""
+
+import bisect
+import threading
+import time
+
+
+class FenwickRankIndex:
+    """Multiset of non-negative ints supporting O(log n) "how many are greater" queries"""
+
+    def __init__(self, bucket_width=1, capacity=1024):
+        self.bucket_width = bucket_width
+        self._size = capacity
+        self._tree = [0] * (capacity + 1)
+        self._buckets = {}  # Map of bucket to sorted list of exact values in it
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _bucket(self, value):
+        return max(int(value), 0) // self.bucket_width
+
+    def _grow(self, bucket):
+        size = self._size
+        while size <= bucket:
+            size *= 2
+        counts = {b: len(values) for b, values in self._buckets.items()}
+        self._size = size
+        self._tree = [0] * (size + 1)
+        for b, n in counts.items():
+            self._tree_add(b, n)
+
+    def _tree_add(self, bucket, delta):
+        i = bucket + 1
+        while i <= self._size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, bucket):
+        """Number of values in buckets 0..bucket inclusive"""
+        i = min(bucket + 1, self._size)
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def add(self, value):
+        value = max(int(value), 0)
+        bucket = self._bucket(value)
+        if bucket >= self._size:
+            self._grow(bucket)
+        bisect.insort(self._buckets.setdefault(bucket, []), value)
+        self._tree_add(bucket, 1)
+        self._count += 1
+
+    def remove(self, value):
+        value = max(int(value), 0)
+        bucket = self._bucket(value)
+        values = self._buckets.get(bucket)
+        if not values:
+            return False
+        i = bisect.bisect_left(values, value)
+        if i == len(values) or values[i] != value:
+            return False
+        values.pop(i)
+        if not values:
+            del self._buckets[bucket]
+        self._tree_add(bucket, -1)
+        self._count -= 1
+        return True
+
+    def count_greater(self, value):
+        value = max(int(value), 0)
+        bucket = self._bucket(value)
+        if bucket >= self._size:
+            return 0
+        in_higher_buckets = self._count - self._prefix(bucket)
+        values = self._buckets.get(bucket, [])
+        return in_higher_buckets + len(values) - bisect.bisect_right(values, value)
+
+    def rank(self, value):
+        """1-based competition rank of a value (ties share a rank)"""
+        return self.count_greater(value) + 1
+
+
+class KaraokeRankIndex:
+    """Per-user total mic time and best score, kept rankable in memory"""
+
+    def __init__(self, full_rebuild_interval=600):
+        self.full_rebuild_interval = full_rebuild_interval
+        self._lock = threading.Lock()
+        self._app = None
+        self._rebuilding = False
+        self._pending = None  # Users refreshed while a build is reading, re-applied after the swap
+        self._reset()
+
+    def init_app(self, app):
+        """Run periodic rebuilds on a background thread in app's context"""
+        self._app = app
+
+    def _reset(self):
+        self.mic_time = FenwickRankIndex(bucket_width=60)
+        self.best_score = FenwickRankIndex(bucket_width=1, capacity=128)
+        self._users = {}  # Map of user_id to (total_mic_time, best_score)
+        self._last_score_id = 0
+        self._built_at = None
+
+    # Maintenance ------------------------------------------------------------
+
+    def build(self):
+        """Rebuild from the all-time leaderboard rollups
+
+        The rows are read into new trees without holding the lock; only the
+        swap is done under it.
+        """
+        from models import LeaderboardRollup, Score, db
+
+        with self._lock:
+            self._pending = set()
+        try:
+            last_score_id = db.session.query(db.func.max(Score.id)).scalar() or 0
+            rows = (
+                db.session.query(
+                    LeaderboardRollup.user_id,
+                    LeaderboardRollup.total_mic_time,
+                    LeaderboardRollup.max_score,
+                )
+                .filter(LeaderboardRollup.period_kind == "all")
+                .execution_options(yield_per=10000)
+            )
+            mic_time = FenwickRankIndex(bucket_width=60)
+            best_score = FenwickRankIndex(bucket_width=1, capacity=128)
+            users = {}
+            for user_id, total_mic_time, max_score in rows:
+                if total_mic_time is None:
+                    continue
+                users[user_id] = (total_mic_time, max_score)
+                mic_time.add(total_mic_time)
+                best_score.add(max_score)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self.mic_time, self.best_score, self._users = mic_time, best_score, users
+            self._last_score_id = last_score_id
+            self._built_at = time.monotonic()
+            pending, self._pending = self._pending, None
+        # Users saved or deleted in this process while the rows were being read
+        self._refresh(pending)
+
+    def _start_rebuild(self):
+        """Start a background rebuild unless one is already running"""
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        if self._app is None:
+            # No app registered (scripts, tests): rebuild in the caller's context
+            self._rebuild()
+            return
+        threading.Thread(target=self._rebuild, name="rank-index-rebuild", daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            if self._app is None:
+                self.build()
+            else:
+                with self._app.app_context():
+                    self.build()
+        except Exception as e:
+            print(f"[RankIndex] Rebuild failed: {e}")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    def _set(self, user_id, total_mic_time, best_score):
+        previous = self._users.pop(user_id, None)
+        if previous is not None:
+            self.mic_time.remove(previous[0])
+            self.best_score.remove(previous[1])
+        if total_mic_time is None:
+            return
+        self._users[user_id] = (total_mic_time, best_score)
+        self.mic_time.add(total_mic_time)
+        self.best_score.add(best_score)
+
+    def refresh_users(self, user_ids):
+        """Reload the given users' all-time rollups (after their scores changed)"""
+        self._refresh(user_ids)
+
+    def _refresh(self, user_ids, last_score_id=None):
+        # Only sync() passes last_score_id: a writer's own score id says
+        # nothing about lower ids other workers have yet to commit
+        from models import LeaderboardRollup, db
+
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        rows = dict(
+            (user_id, (total_mic_time, best_score))
+            for user_id, total_mic_time, best_score in db.session.query(
+                LeaderboardRollup.user_id,
+                LeaderboardRollup.total_mic_time,
+                LeaderboardRollup.max_score,
+            ).filter(
+                LeaderboardRollup.period_kind == "all",
+                LeaderboardRollup.user_id.in_(user_ids),
+            )
+        )
+        with self._lock:
+            if self._pending is not None:
+                self._pending |= user_ids
+            if self._built_at is None:
+                return
+            for user_id in user_ids:
+                self._set(user_id, *rows.get(user_id, (None, None)))
+            if last_score_id is not None:
+                self._last_score_id = max(self._last_score_id, last_score_id)
+
+    def sync(self):
+        """Catch up with scores written by other processes"""
+        from models import Score, db
+
+        if self._built_at is None:
+            self.build()
+            return
+        if time.monotonic() - self._built_at > self.full_rebuild_interval:
+            self._start_rebuild()
+
+        rows = (
+            db.session.query(Score.id, Score.user_id)
+            .filter(Score.id > self._last_score_id)
+            .all()
+        )
+        if rows:
+            self._refresh(
+                {user_id for _, user_id in rows}, max(score_id for score_id, _ in rows)
+            )
+
+    # Lookups ----------------------------------------------------------------
+
+    def mic_time_rank(self, total_mic_time):
+        self.sync()
+        with self._lock:
+            return self.mic_time.rank(total_mic_time)
+
+    def best_score_rank(self, best_score):
+        self.sync()
+        with self._lock:
+            return self.best_score.rank(best_score)
+
+    def __len__(self):
+        return len(self._users)
+
+
+rank_index = KaraokeRankIndex()
@@ -13,8 +13,10 @@ from events import (
     db_helper, ai_agent, kw_model, SEED_KEYWORDS, BLOCKED_KEYWORDS,
     parse_date_filters, compute_end_time, format_date, format_date_range,
     format_time_12hr, format_date_simple, build_image_url,
-    _update_user_interest_weights, _get_user_interests_dict, calculate_match_score
+    _update_user_interest_weights, _get_user_interests_dict,
+    discover_events
 )
+from EventDBHelper import DiscoveryQuery
 
 event_bp = Blueprint('events', __name__)
 
@@ -56,7 +58,6 @@ def events_edit(event_id):
     cur = conn.cursor()
     cur.execute("SELECT host_id FROM events WHERE event_id = ?", (event_id,))
     row = cur.fetchone()
-    conn.close()
     
     if not row or row[0] != session["user_id"]:
         flash("You are not authorized to edit this event.")
@@ -139,7 +140,6 @@ def events_delete(event_id):
     cur = conn.cursor()
     cur.execute("SELECT host_id FROM events WHERE event_id = ?", (event_id,))
     row = cur.fetchone()
-    conn.close()
     
     if not row or row[0] != session["user_id"]:
         flash("You are not authorized to delete this event.")
@@ -218,58 +218,25 @@ def events():
     current_user_row = db_helper.get_user_by_id(current_user_id)
     
     all_users = db_helper.get_all_users()
-    rows = db_helper.get_all_events()
-    events_list = []
-    
     user_interests_dict = _get_user_interests_dict(current_user_id) if current_user_id else {}
 
-    for row in rows:
+    query = DiscoveryQuery(event_type=type_filter, start=filter_start, end=filter_end, text=q)
+    rows, match_scores, next_cursor = discover_events(
+        current_user_id, user_interests_dict, query, cursor=request.args.get("cursor")
+    )
+    events_list = []
+
+    for row, match_score in zip(rows, match_scores):
         (
             event_id, event_name, start_date, end_date, start_time, end_time,
             location, description, visibility, event_type,
             image_source, image_path, ai_theme, event_code,
             created_at, updated_at, enable_group_chat, enable_minigames,
-            interest_tags, host_id
+            interest_tags, host_id, user_status
         ) = row
 
-        if type_filter == "online" and event_type != "online":
-            continue
-        if type_filter == "physical" and event_type != "physical":
-            continue
-
-        if filter_start or filter_end:
-            try:
-                e_start = datetime.strptime(start_date, "%Y-%m-%d").date()
-                e_end = datetime.strptime(end_date, "%Y-%m-%d").date()
-                
-                if filter_start and e_end < filter_start:
-                    continue
-                if filter_end and e_start > filter_end:
-                    continue
-            except (ValueError, TypeError):
-                continue
-            
-        if q:
-            search_term = q.lower()
-            fields = [
-                event_name, description, location, ai_theme, interest_tags
-            ]
-            match_found = False
-            for field in fields:
-                if field and search_term in field.lower():
-                    match_found = True
-                    break
-            if not match_found:
-                continue
-
         final_image_url = build_image_url(image_source, image_path)
         
-        user_status = None
-        if current_user_id:
-            user_status = db_helper.get_participant_status(event_id, current_user_id)
-        
-        match_score = calculate_match_score(user_interests_dict, description, interest_tags)
-        
         events_list.append({
             "event_id": event_id,
             "event_code": event_code,
@@ -296,10 +263,10 @@ def events():
             "interest_tags": interest_tags,
             "host_id": host_id
         })
-    
-    events_list.sort(key=lambda x: x["created_at"], reverse=True)
-    events_list.sort(key=lambda x: x["start_date"])
-    events_list.sort(key=lambda x: x["match_score"], reverse=True)
+
+    next_page_url = None
+    if next_cursor:
+        next_page_url = url_for(".events", **{**request.args.to_dict(), "cursor": next_cursor})
 
     return render_template(
         "events/events_discover.html",
@@ -308,7 +275,8 @@ def events():
         date_filter=date_filter,
         type_filter=type_filter,
         current_user=session,
-        all_users=all_users
+        all_users=all_users,
+        next_page_url=next_page_url
     )
 
 @event_bp.route("/events/join/<int:event_id>")
@@ -1041,7 +1009,6 @@ def events_create_ai_session(session_id):
     cur = conn.cursor()
     cur.execute("SELECT message_id, role, content, created_at FROM ai_event_messages WHERE session_id = ? ORDER BY message_id ASC", (session_id,))
     rows = cur.fetchall()
-    conn.close()
     
     messages = [{"message_id": r[0], "role": r[1], "content": r[2], "created_at": r[3]} for r in rows]
     
@@ -1129,7 +1096,6 @@ def api_ai_agent_chat():
     cur = conn.cursor()
     cur.execute("SELECT COUNT(*) FROM ai_event_messages WHERE session_id = ?", (session_id,))
     msg_count = cur.fetchone()[0]
-    conn.close()
 
     current_draft = json.loads(ai_session["current_draft_json"])
     session[f"undo_{session_id}"] = current_draft
@@ -1159,17 +1125,14 @@ def api_ai_agent_undo():
     if not checkpoint:
         return jsonify({"error": "No checkpoint found"}), 404
         
-    db_helper.update_ai_session_draft(session_id, json.dumps(checkpoint))
-    
-    conn = db_helper._get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT message_id FROM ai_event_messages WHERE session_id = ? ORDER BY message_id DESC LIMIT 2", (session_id,))
-    rows = cur.fetchall()
-    for row in rows:
-        cur.execute("DELETE FROM ai_event_messages WHERE message_id = ?", (row[0],))
-        cur.execute("DELETE FROM ai_event_patches WHERE message_id = ?", (row[0],))
-    conn.commit()
-    conn.close()
+    with db_helper.transaction() as conn:
+        db_helper.update_ai_session_draft(session_id, json.dumps(checkpoint))
+        cur = conn.cursor()
+        cur.execute("SELECT message_id FROM ai_event_messages WHERE session_id = ? ORDER BY message_id DESC LIMIT 2", (session_id,))
+        rows = cur.fetchall()
+        for row in rows:
+            cur.execute("DELETE FROM ai_event_messages WHERE message_id = ?", (row[0],))
+            cur.execute("DELETE FROM ai_event_patches WHERE message_id = ?", (row[0],))
     
     ai_result = AIHelper.analyze_event_impact(checkpoint)
     
@@ -0,0 +1,224 @@
+"""
+Song catalog listing for /api/songs.
+
+CatalogVersion is a counter shared by all web workers through a marker file:
+create_song/update_song/delete_song (and seeding) call catalog_changed(),
+which bumps it, and reading it is one small file read. /api/songs derives a strong
+ETag from the version and the normalized query, so a client holding the
+current catalog gets a 304 before any database work.
+
+list_songs() adds keyset (cursor) pagination, sparse fieldsets and indexed
+sort keys. Without limit/cursor it returns the whole filtered catalog as
+before; paginated responses keep the JSON array body and advertise the next
+page in the X-Next-Cursor and Link headers.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+from sqlalchemy import and_, or_
+
+from models import Song
+
+SORT_KEYS = ("id", "title", "genre", "difficulty", "difficulty_score")
+# Fields of Song.to_dict() that fields= may select
+SONG_FIELDS = (
+    "id", "title", "artist", "genre", "duration", "difficulty", "difficulty_score",
+    "youtube_url", "lyrics_url", "created_at",
+)
+MAX_PAGE_SIZE = 200
+
+
+class CatalogVersion:
+    """Change counter kept in a marker file shared by all workers"""
+
+    def __init__(self, filename="song_catalog.version", config_key="SONG_CATALOG_VERSION_FILE"):
+        self.path = os.path.join(os.getcwd(), "instance", filename)
+        self.config_key = config_key
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.path = app.config.get(self.config_key) or self.path
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if not os.path.exists(self.path):
+            self.bump()
+
+    def current(self):
+        try:
+            with open(self.path) as f:
+                return f.read().strip() or "0"
+        except OSError:
+            return "0"
+
+    def bump(self):
+        # The random suffix keeps versions distinct when two workers bump
+        # from the same value at once
+        with self._lock:
+            try:
+                count = int(self.current().split(".")[0]) + 1
+            except ValueError:
+                count = 1
+            value = f"{count}.{uuid.uuid4().hex[:8]}"
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(value)
+            os.replace(tmp_path, self.path)
+        return value
+
+
+catalog_version = CatalogVersion()
+
+
+def catalog_changed():
+    """Record that songs were added, edited or removed"""
+    catalog_version.bump()
+
+
+class CatalogQueryError(ValueError):
+    pass
+
+
+def _encode_cursor(sort_value, song_id):
+    raw = json.dumps([sort_value, song_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, song_id = json.loads(base64.urlsafe_b64decode(padded))
+        return sort_value, int(song_id)
+    except (ValueError, TypeError):
+        raise CatalogQueryError("Invalid cursor")
+
+
+def parse_list_args(args):
+    """Validate /api/songs query arguments into a normalized dict"""
+    sort = args.get("sort") or "id"
+    descending = sort.startswith("-")
+    sort_key = sort.lstrip("-")
+    if sort_key not in SORT_KEYS:
+        raise CatalogQueryError(f"sort must be one of: {', '.join(SORT_KEYS)} (prefix with - for descending)")
+
+    fields = None
+    if args.get("fields"):
+        fields = [field.strip() for field in args["fields"].split(",") if field.strip()]
+        unknown = [field for field in fields if field not in SONG_FIELDS]
+        if unknown:
+            raise CatalogQueryError(f"Unknown fields: {', '.join(unknown)}")
+        if "id" not in fields:
+            fields.insert(0, "id")
+
+    limit = None
+    if args.get("limit") or args.get("cursor"):
+        try:
+            limit = int(args.get("limit") or 50)
+        except ValueError:
+            raise CatalogQueryError("limit must be an integer")
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    difficulty_range = []
+    for name in ("min_difficulty", "max_difficulty"):
+        try:
+            difficulty_range.append(float(args[name]) if args.get(name) else None)
+        except ValueError:
+            raise CatalogQueryError(f"{name} must be a number")
+
+    return {
+        "genre": args.get("genre") or None,
+        "min_difficulty": difficulty_range[0],
+        "max_difficulty": difficulty_range[1],
+        "difficulty": args.get("difficulty") or None,
+        "search": args.get("search") or None,
+        "sort_key": sort_key,
+        "descending": descending,
+        "fields": fields,
+        "limit": limit,
+        "cursor": _decode_cursor(args["cursor"]) if args.get("cursor") else None,
+    }
+
+
+def catalog_etag(params):
+    """Strong ETag for a listing: catalog version plus the normalized query"""
+    key = json.dumps([catalog_version.current(), params], sort_keys=True, default=str)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _after_cursor(column, descending, sort_value, song_id):
+    """Keyset condition for rows after (sort_value, song_id); NULLs sort first ascending"""
+    if column is Song.id:
+        return Song.id < song_id if descending else Song.id > song_id
+    if descending:
+        if sort_value is None:
+            return and_(column.is_(None), Song.id < song_id)
+        return or_(
+            column < sort_value,
+            and_(column == sort_value, Song.id < song_id),
+            column.is_(None),
+        )
+    if sort_value is None:
+        return or_(and_(column.is_(None), Song.id > song_id), column.isnot(None))
+    return or_(column > sort_value, and_(column == sort_value, Song.id > song_id))
+
+
+def list_songs(params):
+    """Return (rows, next_cursor) for parsed /api/songs arguments"""
+    query = Song.query
+    if params["genre"]:
+        query = query.filter_by(genre=params["genre"])
+    if params["difficulty"]:
+        query = query.filter_by(difficulty=params["difficulty"])
+    if params["min_difficulty"] is not None:
+        query = query.filter(Song.difficulty_score >= params["min_difficulty"])
+    if params["max_difficulty"] is not None:
+        query = query.filter(Song.difficulty_score <= params["max_difficulty"])
+    if params["search"]:
+        search = params["search"]
+        query = query.filter(
+            (Song.title.ilike(f"%{search}%")) | (Song.artist.ilike(f"%{search}%"))
+        )
+
+    column = getattr(Song, params["sort_key"])
+    descending = params["descending"]
+    if params["cursor"] is not None:
+        query = query.filter(_after_cursor(column, descending, *params["cursor"]))
+
+    if column is Song.id:
+        order = [Song.id.desc() if descending else Song.id]
+    elif descending:
+        order = [column.desc().nullslast(), Song.id.desc()]
+    else:
+        order = [column.asc().nullsfirst(), Song.id]
+    query = query.order_by(*order)
+
+    fields = params["fields"]
+    if fields:
+        # Select only the requested columns (plus the sort key for the cursor)
+        selected = fields + [params["sort_key"]] * (params["sort_key"] not in fields)
+        query = query.with_entities(*(getattr(Song, field) for field in selected))
+
+    limit = params["limit"]
+    next_cursor = None
+    if limit is None:
+        rows = query.all()
+    else:
+        rows = query.limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = _encode_cursor(getattr(last, params["sort_key"]), last.id)
+
+    if not fields:
+        return [song.to_dict() for song in rows], next_cursor
+
+    items = []
+    for row in rows:
+        item = {field: getattr(row, field) for field in fields}
+        if item.get("created_at") is not None:
+            item["created_at"] = item["created_at"].isoformat()
+        items.append(item)
+    return items, next_cursor
@@ -0,0 +1,167 @@
+"""
+Bulk song catalog import (flask import-songs and POST /api/songs/import).
+
+Rows are read one at a time from CSV, JSONL, an iTunes Search API response
+("itunes") or iTunes results one per line ("itunes-jsonl"). They are
+validated with the same rules as create_song and deduplicated on the
+normalized (title, artist) key backed by the unique songs.normalized_key
+index. Valid rows are inserted in batches with one executemany per batch;
+invalid and duplicate rows are reported per row and never abort the run.
+"""
+
+import csv
+import json
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Song
+
+BATCH_SIZE = 500
+FORMATS = ("csv", "jsonl", "itunes", "itunes-jsonl")
+
+
+def _itunes_row(item):
+    """Map an iTunes Search API result to create_song fields"""
+    from api_integrations import get_song_difficulty
+
+    title = item.get("trackName") or ""
+    artist = item.get("artistName") or ""
+    duration_ms = item.get("trackTimeMillis") or 0
+    duration = int(duration_ms / 1000) if duration_ms else 180
+    return {
+        "title": title,
+        "artist": artist,
+        "genre": item.get("primaryGenreName") or "Pop",
+        "duration": duration,
+        "difficulty": item.get("difficulty") or get_song_difficulty(duration),
+        # iTunes has no video; leave it unset until someone picks one
+        "youtube_url": item.get("youtube_url") or None,
+    }
+
+
+def read_rows(stream, fmt):
+    """Yield (row number, dict or parse error message) from a text stream"""
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, {key.strip(): (value or "").strip() for key, value in row.items() if key}
+        return
+
+    if fmt == "itunes":
+        # A saved search response ({"results": [...]}, at most 200 results)
+        try:
+            results = json.load(stream).get("results", [])
+        except (ValueError, AttributeError) as e:
+            yield 1, f"Invalid iTunes export: {e}"
+            return
+        for number, item in enumerate(results, start=1):
+            yield number, _itunes_row(item) if isinstance(item, dict) else "Expected a JSON object"
+        return
+
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            yield number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(item, dict):
+            yield number, "Expected a JSON object"
+            continue
+        yield number, _itunes_row(item) if fmt == "itunes-jsonl" else item
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.duplicate_rows = []
+        self.errors = []  # [{"row": n, "error": message}]
+        self.song_ids = []
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "duplicates": len(self.duplicate_rows),
+            "duplicate_rows": self.duplicate_rows,
+            "failed": len(self.errors),
+            "errors": self.errors,
+        }
+
+
+def _insert_batch(batch, report):
+    """Insert validated rows whose keys are not in the catalog yet, in one executemany"""
+    keys = [fields["normalized_key"] for _, fields in batch]
+    existing = {
+        key for (key,) in db.session.query(Song.normalized_key).filter(Song.normalized_key.in_(keys))
+    }
+    new_rows = []
+    for number, fields in batch:
+        if fields["normalized_key"] in existing:
+            report.duplicate_rows.append(number)
+            continue
+        existing.add(fields["normalized_key"])
+        new_rows.append((number, fields))
+    if not new_rows:
+        return
+
+    try:
+        db.session.execute(insert(Song), [fields for _, fields in new_rows])
+        db.session.commit()
+        inserted = new_rows
+    except IntegrityError:
+        # Another import added some of these keys meanwhile; insert one by one
+        db.session.rollback()
+        inserted = []
+        for number, fields in new_rows:
+            try:
+                db.session.execute(insert(Song), fields)
+                db.session.commit()
+                inserted.append((number, fields))
+            except IntegrityError:
+                db.session.rollback()
+                report.duplicate_rows.append(number)
+
+    report.imported += len(inserted)
+    report.song_ids.extend(
+        song_id
+        for (song_id,) in db.session.query(Song.id).filter(
+            Song.normalized_key.in_([fields["normalized_key"] for _, fields in inserted])
+        )
+    )
+
+
+def import_songs(stream, fmt, batch_size=BATCH_SIZE):
+    """Import songs from a text stream; returns an ImportReport"""
+    from karaoke import validate_song
+    from song_catalog import catalog_changed
+
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+
+    report = ImportReport()
+    batch = []
+    for number, row in read_rows(stream, fmt):
+        report.rows += 1
+        if isinstance(row, str):
+            report.errors.append({"row": number, "error": row})
+            continue
+        try:
+            fields, error = validate_song(row, require_video=fmt not in ("itunes", "itunes-jsonl"))
+        except (TypeError, AttributeError):
+            fields, error = None, "Fields must be text (duration may be a number)"
+        if error:
+            report.errors.append({"row": number, "error": error})
+            continue
+        batch.append((number, fields))
+        if len(batch) >= batch_size:
+            _insert_batch(batch, report)
+            batch = []
+    if batch:
+        _insert_batch(batch, report)
+
+    if report.imported:
+        catalog_changed()
+    return report
@@ -0,0 +1,95 @@
+"""
+Random song sampling without ORDER BY random().
+
+The song catalog's ids are cached in memory, bucketed by (genre, difficulty).
+Drawing k songs picks random positions across the matching buckets and
+rejects excluded or repeated ids, so a draw costs O(k) regardless of catalog
+size; only heavily excluded draws fall back to scanning the buckets.
+
+The arrays are rebuilt lazily on the next draw after the song catalog version
+(see song_catalog.py) changes, including changes made by other workers.
+"""
+
+import bisect
+import random
+import threading
+
+from models import db, Song
+from song_catalog import catalog_version
+
+
+class SongSampler:
+    """Cached candidate-id arrays per (genre, difficulty) bucket"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = None  # Map of (genre, difficulty) to list of song ids
+        self._version = None
+
+    def _load(self):
+        version = catalog_version.current()
+        with self._lock:
+            if self._buckets is not None and self._version == version:
+                return self._buckets
+
+        buckets = {}
+        for song_id, genre, difficulty in db.session.query(Song.id, Song.genre, Song.difficulty):
+            buckets.setdefault((genre, difficulty), []).append(song_id)
+
+        with self._lock:
+            self._buckets = buckets
+            self._version = version
+        return buckets
+
+    def sample_ids(self, k, genres=None, difficulties=None, exclude=()):
+        """Up to k distinct random song ids matching the filters"""
+        buckets = self._load()
+        candidates = [
+            ids
+            for (genre, difficulty), ids in buckets.items()
+            if (genres is None or genre in genres)
+            and (difficulties is None or difficulty in difficulties)
+        ]
+        offsets = []
+        total = 0
+        for ids in candidates:
+            offsets.append(total)
+            total += len(ids)
+        if not total or k <= 0:
+            return []
+
+        exclude = set(exclude)
+        chosen = []
+        seen = set()
+        for _ in range(4 * k + 16):
+            if len(chosen) == k:
+                return chosen
+            position = random.randrange(total)
+            bucket = bisect.bisect_right(offsets, position) - 1
+            song_id = candidates[bucket][position - offsets[bucket]]
+            if song_id in seen or song_id in exclude:
+                continue
+            seen.add(song_id)
+            chosen.append(song_id)
+
+        # Most candidates are excluded; pick from what is left
+        remaining = [
+            song_id
+            for ids in candidates
+            for song_id in ids
+            if song_id not in exclude and song_id not in seen
+        ]
+        chosen.extend(random.sample(remaining, min(k - len(chosen), len(remaining))))
+        return chosen
+
+    def sample(self, k, genres=None, difficulties=None, exclude=()):
+        """Up to k random Song rows matching the filters, in random order"""
+        song_ids = self.sample_ids(k, genres, difficulties, exclude)
+        if not song_ids:
+            return []
+        songs = {song.id: song for song in Song.query.filter(Song.id.in_(song_ids))}
+        # Ids deleted by another worker since the arrays were loaded are skipped
+        return [songs[song_id] for song_id in song_ids if song_id in songs]
+
+
+song_sampler = SongSampler()
@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EventDBHelper import DatabaseHelper
+from event_matching import InterestMatcher
+
+
+def _reference_score(interests, description, tags_str):
+    # Same rule as events.calculate_match_score
+    desc = description.lower() if description else ""
+    score = sum(weight for interest, weight in interests.items() if interest in desc)
+    for tag in [t.strip().lower() for t in tags_str.split(",")] if tags_str else []:
+        score += interests.get(tag, 0) * 2
+    return score
+
+
+def _event(description, tags):
+    return {
+        "event_name": "Event", "start_date": "2026-03-01", "end_date": "2026-03-01",
+        "start_time": "10:00", "end_time": "11:00", "location": "CC", "description": description,
+        "visibility": "public", "event_type": "physical", "image_source": "ai",
+        "interest_tags": tags, "host_id": 1,
+    }
+
+
+def _assert_matches(db, matcher, interests):
+    rows, scores = matcher.scores(1, interests)
+    fields = db.get_event_match_fields()
+    assert set(rows) == {event_id for event_id, _, _ in fields}
+    for event_id, description, tags in fields:
+        assert scores[rows[event_id]] == _reference_score(interests, description, tags), event_id
+
+
+def test_scores_follow_event_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseHelper(os.path.join(tmp, "events.db"))
+        matcher = InterestMatcher(db)
+        db.insert_event(_event("Karaoke and Music night", "music,karaoke"))
+        db.insert_event(_event("Technology for beginners", "tech, Music"))
+        gardening = db.insert_event(_event("Gardening morning", "gardening"))
+
+        interests = {"music": 2, "tech": 1}
+        _assert_matches(db, matcher, interests)
+
+        # Cached until the events change
+        generation = matcher._generation
+        _assert_matches(db, matcher, interests)
+        assert matcher._generation == generation
+
+        db.insert_event(_event("Music quiz", "games,music,music"))
+        db.delete_event(gardening)
+        _assert_matches(db, matcher, interests)
+        assert gardening not in matcher.scores(1, interests)[0]
+
+        # Terms no event has seen yet get their own column
+        _assert_matches(db, matcher, {"music": 1, "quiz": 3, "nology": 1})
+        db.close()
+
+
+if __name__ == "__main__":
+    test_scores_follow_event_changes()
+    print("SUCCESS: event matching tests passed.")
@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EventDBHelper import DatabaseHelper, DiscoveryQuery
+
+# Tables the hot queries must reach through an index
+INDEXED_TABLES = ("events", "event_participants")
+
+
+def _traced_statements(db, call):
+    """Runs call() and returns the expanded SQL of every SELECT it executed"""
+    statements = []
+    conn = db._get_conn()
+    conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        conn.set_trace_callback(None)
+    return [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+
+
+def _table_scans(db, sql):
+    conn = db._get_conn()
+    aliases = {"e": "events", "ep": "event_participants"}
+    scans = []
+    for _, _, _, detail in conn.execute("EXPLAIN QUERY PLAN " + sql):
+        if detail.startswith("SCAN "):
+            name = detail.split()[1]
+            if aliases.get(name, name) in INDEXED_TABLES:
+                scans.append(detail)
+    return scans
+
+
+def test_hot_queries_use_indexes():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseHelper(os.path.join(tmp, "events.db"))
+        hot_queries = {
+            "discovery page": lambda: db.get_discovery_page(DiscoveryQuery(), 1),
+            "discovery page (filtered)": lambda: db.get_discovery_page(
+                DiscoveryQuery(event_type="online", start=date(2026, 3, 1), end=date(2026, 3, 31)),
+                1,
+                after=("2026-03-02", "2026-01-01 00:00:00", 10),
+            ),
+            "discovery events": lambda: db.get_discovery_events([1, 2, 3], 1),
+            "participant status": lambda: db.get_participant_status(1, 1),
+            "is user joined": lambda: db.is_user_joined(1, 1),
+            "participant counts": lambda: db.get_event_participant_counts(1),
+            "host stats": lambda: db.get_host_stats(1),
+            "signups over time": lambda: db.get_signups_over_time(1),
+            "type/visibility breakdown": lambda: db.get_events_type_visibility_breakdown(1),
+            "smart suggestions": lambda: db.get_smart_suggestions(1),
+            "pending join requests": lambda: db.get_pending_join_requests(1),
+            "host action items": lambda: db.get_host_action_items(1),
+        }
+        for name, call in hot_queries.items():
+            statements = _traced_statements(db, call)
+            assert statements, name
+            for sql in statements:
+                scans = _table_scans(db, sql)
+                assert not scans, f"{name}: {scans}\n{sql}"
+        db.close()
+
+
+if __name__ == "__main__":
+    test_hot_queries_use_indexes()
+    print("SUCCESS: event query plan tests passed.")
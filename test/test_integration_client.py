@@ -0,0 +1,151 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from integration_client import IntegrationClient
+
+
+class StubServer:
+    """Local HTTP server that counts requests, connections and concurrency"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = 0
+        self.ports = set()
+        self.active = 0
+        self.peak_active = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests += 1
+                    stub.ports.add(self.client_address[1])
+                    stub.active += 1
+                    stub.peak_active = max(stub.peak_active, stub.active)
+                try:
+                    time.sleep(stub.delay)
+                    url = urlsplit(self.path)
+                    if url.path == "/missing":
+                        body, status = b"[]", 404
+                    else:
+                        body = json.dumps({"path": url.path, "query": parse_qs(url.query)}).encode()
+                        status = 200
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stub.lock:
+                        stub.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_responses_are_cached_on_normalized_query():
+    with StubServer() as stub:
+        client = IntegrationClient()
+        first = client.get_json(f"{stub.base_url}/search", {"term": "Let It Be", "limit": 5})
+        second = client.get_json(f"{stub.base_url}/search", {"limit": 5, "term": "  let   it be "})
+        assert first == second
+        assert stub.requests == 1
+
+        client.get_json(f"{stub.base_url}/search", {"term": "yesterday", "limit": 5})
+        assert stub.requests == 2
+
+
+def test_cache_entries_expire_and_are_evicted():
+    with StubServer() as stub:
+        client = IntegrationClient(cache_size=2, cache_ttl=0.2)
+        client.get_json(f"{stub.base_url}/a")
+        time.sleep(0.3)
+        client.get_json(f"{stub.base_url}/a")
+        assert stub.requests == 2
+
+        client.get_json(f"{stub.base_url}/b")
+        client.get_json(f"{stub.base_url}/c")  # evicts /a
+        client.get_json(f"{stub.base_url}/a")
+        assert stub.requests == 5
+
+
+def test_identical_in_flight_queries_are_coalesced():
+    with StubServer(delay=0.3) as stub:
+        client = IntegrationClient()
+        results = []
+
+        def search():
+            results.append(client.get_json(f"{stub.base_url}/search", {"term": "queen"}))
+
+        threads = [threading.Thread(target=search) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert stub.requests == 1
+        assert len(results) == 10
+        assert all(result == results[0] for result in results)
+
+
+def test_concurrency_per_host_is_limited_and_connections_reused():
+    with StubServer(delay=0.1) as stub:
+        client = IntegrationClient(max_per_host=2)
+        threads = [
+            threading.Thread(target=client.get_json, args=(f"{stub.base_url}/search", {"term": f"q{i}"}))
+            for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert stub.requests == 8
+        assert stub.peak_active <= 2
+        # Keep-alive: eight requests over at most two pooled connections
+        assert len(stub.ports) <= 2
+
+
+def test_404_and_errors():
+    with StubServer() as stub:
+        client = IntegrationClient(retries=0)
+        assert client.get_json(f"{stub.base_url}/missing", allow_404=True) is None
+        try:
+            client.get_json(f"{stub.base_url}/missing", {"x": 1})
+        except requests.exceptions.HTTPError:
+            pass
+        else:
+            raise AssertionError("Expected an HTTPError for a 404")
+
+
+if __name__ == "__main__":
+    test_responses_are_cached_on_normalized_query()
+    test_cache_entries_expire_and_are_evicted()
+    test_identical_in_flight_queries_are_coalesced()
+    test_concurrency_per_host_is_limited_and_connections_reused()
+    test_404_and_errors()
+    print("SUCCESS: integration client tests passed.")
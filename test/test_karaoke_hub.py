@@ -0,0 +1,96 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from karaoke_hub import RelayRouter, socket_path, start_hub
+
+WORKERS = 3
+SESSIONS = 8
+CLIENTS_PER_SESSION = 3
+
+
+def _wait_for_sockets(socket_dir, workers, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(os.path.exists(socket_path(socket_dir, i)) for i in range(workers)):
+            return
+        time.sleep(0.05)
+    raise RuntimeError("Relay workers did not start")
+
+
+def _collector(received):
+    def deliver(data):
+        received.append(data)
+    return deliver
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_sessions_are_sharded_and_relayed_across_processes():
+    with tempfile.TemporaryDirectory() as socket_dir:
+        processes = start_hub(socket_dir, WORKERS)
+        try:
+            _wait_for_sockets(socket_dir, WORKERS)
+            router = RelayRouter(socket_dir, WORKERS)
+
+            session_ids = [f"session-{i}" for i in range(SESSIONS)]
+            used_workers = set()
+
+            for session_id in session_ids:
+                connections = []
+                inboxes = []
+                for expected_index in range(CLIENTS_PER_SESSION):
+                    connection = router.connect(session_id)
+                    assert connection.worker == router.worker_for(session_id)
+                    assert connection.client_index == expected_index
+                    assert connection.participant_count == expected_index + 1
+                    inbox = []
+                    connection.start_reader(_collector(inbox))
+                    connections.append(connection)
+                    inboxes.append(inbox)
+                used_workers.add(connections[0].worker)
+
+                frame = f"{session_id}-pcm".encode() * 64
+                connections[0].send_binary(frame)
+
+                for inbox in inboxes[1:]:
+                    assert _wait_until(lambda inbox=inbox: frame in inbox)
+                assert frame not in inboxes[0]
+
+                # Control messages are relayed as text
+                connections[1].send_text('{"type": "PLAY"}')
+                assert _wait_until(lambda: '{"type": "PLAY"}' in inboxes[0])
+
+                remaining = [connection.leave() for connection in connections]
+                assert remaining == [2, 1, 0]
+
+            # Sessions spread over more than one relay process
+            assert len(used_workers) > 1
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join(5)
+
+
+def test_router_is_stable_across_instances():
+    first = RelayRouter("/tmp/a", 4)
+    second = RelayRouter("/tmp/b", 4)
+    for i in range(100):
+        assert first.worker_for(f"s-{i}") == second.worker_for(f"s-{i}")
+
+
+if __name__ == "__main__":
+    test_router_is_stable_across_instances()
+    test_sessions_are_sharded_and_relayed_across_processes()
+    print("SUCCESS: karaoke relay hub integration test passed.")
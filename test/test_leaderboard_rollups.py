@@ -0,0 +1,171 @@
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import event, func
+
+from database import (
+    _rollup_period_end,
+    _rollup_period_starts,
+    create_session,
+    delete_score,
+    get_or_create_user,
+    rebuild_user_karaoke_stats,
+    save_score,
+    save_scores_batch,
+    seed_default_songs,
+)
+from karaoke_sessions import live_sessions_version
+from models import LeaderboardRollup, Score, User, UserKaraokeStats, db, get_sgt_now
+from rank_index import rank_index
+from song_catalog import catalog_version
+
+
+def _make_app(marker_dir):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SONG_CATALOG_VERSION_FILE"] = os.path.join(marker_dir, "song_catalog.version")
+    app.config["KARAOKE_LIVE_SESSIONS_VERSION_FILE"] = os.path.join(marker_dir, "live_sessions.version")
+    db.init_app(app)
+    catalog_version.init_app(app)
+    live_sessions_version.init_app(app)
+    with app.app_context():
+        # Deletes must also succeed once SQLite enforces foreign keys
+        event.listen(db.engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys = ON"))
+        db.create_all()
+        seed_default_songs()
+        rank_index.build()
+    return app
+
+
+def _expected_rollups():
+    """The rollups of the current periods, recomputed with a GROUP BY over scores"""
+    expected = {}
+    for period_kind, period_start in _rollup_period_starts(get_sgt_now()):
+        query = db.session.query(
+            Score.user_id,
+            func.sum(Score.mic_time),
+            func.count(Score.id),
+            func.sum(Score.score),
+            func.max(Score.score),
+        ).group_by(Score.user_id)
+        period_end = _rollup_period_end(period_kind, period_start)
+        if period_end is not None:
+            query = query.filter(
+                Score.created_at >= datetime.combine(period_start, datetime.min.time()),
+                Score.created_at < datetime.combine(period_end, datetime.min.time()),
+            )
+        for user_id, mic_time, count, score_sum, max_score in query:
+            expected[(period_kind, period_start, user_id)] = (mic_time, count, score_sum, max_score)
+    return expected
+
+
+def _assert_rollups_match_scores():
+    actual = {
+        (r.period_kind, r.period_start, r.user_id): (r.total_mic_time, r.session_count, r.score_sum, r.max_score)
+        for r in LeaderboardRollup.query
+    }
+    assert actual == _expected_rollups()
+
+
+def _check_rollup_maintenance(app):
+    rng = random.Random(7)
+    with app.app_context():
+        users = [get_or_create_user(f"singer{i}") for i in range(12)]
+        create_session("s1", 1)
+        for _ in range(150):
+            save_score("s1", rng.choice(users).id, rng.randint(0, 100), rng.randint(0, 400))
+        save_scores_batch([
+            {"session_id": "s1", "username": rng.choice(users).username,
+             "score": rng.randint(0, 100), "mic_time": rng.randint(0, 400)}
+            for _ in range(50)
+        ])
+        _assert_rollups_match_scores()
+
+        # Deleting each user's best score forces the max to be recomputed
+        for user in users[:6]:
+            best = Score.query.filter_by(user_id=user.id).order_by(Score.score.desc()).first()
+            if best is not None:
+                delete_score(best)
+        for score_entry in rng.sample(Score.query.all(), 60):
+            delete_score(score_entry)
+        _assert_rollups_match_scores()
+
+        # A user whose last score goes has no rollups left
+        for score_entry in Score.query.filter_by(user_id=users[-1].id).all():
+            delete_score(score_entry)
+        assert LeaderboardRollup.query.filter_by(user_id=users[-1].id).count() == 0
+        _assert_rollups_match_scores()
+
+
+def test_rollups_follow_saves_and_deletes():
+    with tempfile.TemporaryDirectory() as marker_dir:
+        _check_rollup_maintenance(_make_app(marker_dir))
+
+
+def _check_user_stats_windows(app):
+    with app.app_context():
+        users = [get_or_create_user(f"window{i}") for i in range(3)]
+        create_session("w1", 1)
+        for i in range(20):
+            save_score("w1", users[i % 3].id, 50 + i, 60)
+        for score_entry in Score.query.filter_by(user_id=users[0].id).limit(2).all():
+            delete_score(score_entry)
+
+        incremental = {
+            stats.user_id: (stats.load("first_scores"), stats.load("last_scores"))
+            for stats in UserKaraokeStats.query
+        }
+        rebuild_user_karaoke_stats()
+        rebuilt = {
+            stats.user_id: (stats.load("first_scores"), stats.load("last_scores"))
+            for stats in UserKaraokeStats.query
+        }
+        assert incremental == rebuilt
+
+
+def test_user_stats_windows_match_rebuild():
+    with tempfile.TemporaryDirectory() as marker_dir:
+        _check_user_stats_windows(_make_app(marker_dir))
+
+
+def _check_account_deletion(app):
+    with app.app_context():
+        alice, bob = get_or_create_user("alice"), get_or_create_user("bob")
+        create_session("s1", 1)
+        save_score("s1", alice.id, 90, 300)
+        save_score("s1", bob.id, 70, 120)
+        assert LeaderboardRollup.query.filter_by(user_id=alice.id).count() == 4  # week, month, year, all
+        assert rank_index.mic_time_rank(120) == 2
+
+        alice_id = alice.id
+        db.session.delete(alice)
+        db.session.commit()
+        rank_index.refresh_users([alice_id])  # as the delete-account route does
+        assert rank_index.mic_time_rank(120) == 1
+        rank_index.build()
+        assert rank_index.mic_time_rank(120) == 1
+
+        assert LeaderboardRollup.query.filter_by(user_id=alice_id).count() == 0
+        assert db.session.get(UserKaraokeStats, alice_id) is None
+        assert {score.user_id for score in Score.query} == {bob.id}
+        assert LeaderboardRollup.query.filter_by(user_id=bob.id).count() == 4
+        assert User.query.filter_by(username="alice").first() is None
+
+
+def test_account_deletion_removes_rollups_and_stats():
+    with tempfile.TemporaryDirectory() as marker_dir:
+        _check_account_deletion(_make_app(marker_dir))
+
+
+if __name__ == "__main__":
+    test_rollups_follow_saves_and_deletes()
+    test_user_stats_windows_match_rebuild()
+    test_account_deletion_removes_rollups_and_stats()
+    print("SUCCESS: leaderboard rollup tests passed.")
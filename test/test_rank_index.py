@@ -0,0 +1,112 @@
+import os
+import random
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import func
+
+from database import create_session, delete_score, get_or_create_user, save_score, seed_default_songs
+from karaoke_sessions import live_sessions_version
+from models import Score, db
+from rank_index import FenwickRankIndex, rank_index
+from song_catalog import catalog_version
+
+
+def _make_app(marker_dir):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SONG_CATALOG_VERSION_FILE"] = os.path.join(marker_dir, "song_catalog.version")
+    app.config["KARAOKE_LIVE_SESSIONS_VERSION_FILE"] = os.path.join(marker_dir, "live_sessions.version")
+    db.init_app(app)
+    catalog_version.init_app(app)
+    live_sessions_version.init_app(app)
+    return app
+
+
+def _sql_mic_time_rank(total_mic_time):
+    # The GROUP BY that get_user_ranking used before the rank index
+    better = (
+        db.session.query(Score.user_id)
+        .group_by(Score.user_id)
+        .having(func.sum(Score.mic_time) > total_mic_time)
+        .count()
+    )
+    return better + 1
+
+
+def _sql_best_score_rank(best_score):
+    # The query get_user_stats used before the rank index
+    better = Score.query.filter(Score.score > best_score).with_entities(Score.user_id).distinct().count()
+    return better + 1
+
+
+def _assert_ranks_match_sql(users):
+    for user in users:
+        total_mic_time, best_score = db.session.query(
+            func.sum(Score.mic_time), func.max(Score.score)
+        ).filter(Score.user_id == user.id).one()
+        if total_mic_time is None:
+            continue
+        assert rank_index.mic_time_rank(total_mic_time) == _sql_mic_time_rank(total_mic_time), user.username
+        assert rank_index.best_score_rank(best_score) == _sql_best_score_rank(best_score), user.username
+
+
+def test_fenwick_counts_greater_values():
+    rng = random.Random(3)
+    index = FenwickRankIndex(bucket_width=60, capacity=4)
+    values = [rng.randint(0, 100000) for _ in range(2000)]
+    for value in values:
+        index.add(value)
+    for value in values[:500]:
+        index.remove(value)
+    rest = values[500:]
+    assert len(index) == len(rest)
+    for query in [0, 59, 60, 61, 50000, 100000, 200000] + rest[:50]:
+        # Exact, even within a 60-wide bucket
+        expected = sum(1 for value in rest if value > query)
+        assert index.count_greater(query) == expected, query
+
+
+def _check_ranks(app):
+    rng = random.Random(11)
+    with app.app_context():
+        db.create_all()
+        seed_default_songs()
+        rank_index.build()
+        users = [get_or_create_user(f"singer{i}") for i in range(25)]
+        create_session("s1", 1)
+        for _ in range(250):
+            save_score("s1", rng.choice(users).id, rng.randint(0, 100), rng.randint(0, 3600))
+        _assert_ranks_match_sql(users)
+
+        for score_entry in rng.sample(Score.query.all(), 80):
+            delete_score(score_entry)
+        _assert_ranks_match_sql(users)
+
+        # Scores written by another worker are picked up by sync(): start from
+        # an empty index that has seen no score ids yet
+        with rank_index._lock:
+            rank_index._reset()
+            rank_index._built_at = 0.0
+        rank_index.full_rebuild_interval = 10 ** 9
+        try:
+            rank_index.sync()
+            _assert_ranks_match_sql(users)
+        finally:
+            rank_index.full_rebuild_interval = 600
+            rank_index.build()
+
+
+def test_ranks_match_sql():
+    with tempfile.TemporaryDirectory() as marker_dir:
+        _check_ranks(_make_app(marker_dir))
+
+
+if __name__ == "__main__":
+    test_fenwick_counts_greater_values()
+    test_ranks_match_sql()
+    print("SUCCESS: rank index tests passed.")
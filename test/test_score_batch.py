@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, g, request
+
+import karaoke
+from database import add_participant_to_session, create_session, get_or_create_user, seed_default_songs
+from models import Score, User, db
+from karaoke_sessions import live_sessions_version
+from rank_index import rank_index
+from song_catalog import catalog_version
+
+
+def _make_app(marker_dir):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SONG_CATALOG_VERSION_FILE"] = os.path.join(marker_dir, "song_catalog.version")
+    app.config["KARAOKE_LIVE_SESSIONS_VERSION_FILE"] = os.path.join(marker_dir, "live_sessions.version")
+    db.init_app(app)
+    catalog_version.init_app(app)
+    live_sessions_version.init_app(app)
+
+    @app.route("/api/scores/batch", methods=["POST"])
+    def batch():
+        g.current_user = User.query.filter_by(username=request.headers["X-User"]).first()
+        return karaoke.submit_scores_batch(request.get_json(silent=True))
+
+    return app
+
+
+def _check_batch_authorization(app):
+    with app.app_context():
+        db.create_all()
+        seed_default_songs()
+        rank_index.build()
+        alice, bob, carol = (get_or_create_user(name) for name in ("alice", "bob", "carol"))
+        create_session("duet", 1)
+        create_session("solo", 1)
+        add_participant_to_session("duet", alice.id)
+        add_participant_to_session("duet", bob.id)
+        add_participant_to_session("solo", carol.id)
+
+    response = app.test_client().post(
+        "/api/scores/batch",
+        headers={"X-User": "alice"},
+        json={"scores": [
+            {"session_id": "duet", "score": 90},
+            {"session_id": "duet", "username": "bob", "display_name": "Hacked", "score": 80},
+            {"session_id": "duet", "username": "carol", "score": 100},
+            {"session_id": "solo", "username": "carol", "score": 100},
+            {"session_id": "duet", "username": "mallory", "score": 100},
+        ]},
+    )
+
+    assert response.status_code == 200
+    statuses = [result["status"] for result in response.json["results"]]
+    assert statuses == ["created", "created", "error", "error", "error"]
+    with app.app_context():
+        assert {score.user.username for score in Score.query} == {"alice", "bob"}
+        assert User.query.filter_by(username="mallory").first() is None
+        assert User.query.filter_by(username="bob").first().display_name != "Hacked"
+
+
+def test_batch_refuses_scores_for_other_users():
+    with tempfile.TemporaryDirectory() as marker_dir:
+        _check_batch_authorization(_make_app(marker_dir))
+
+
+if __name__ == "__main__":
+    test_batch_refuses_scores_for_other_users()
+    print("SUCCESS: score batch tests passed.")
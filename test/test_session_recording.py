@@ -0,0 +1,92 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, g, request
+
+import karaoke
+from database import add_participant_to_session, create_session, get_or_create_user
+from karaoke_recorder import SessionRecorder
+from karaoke_sessions import live_sessions_version
+from models import User, db
+from song_catalog import catalog_version
+
+
+def _make_app(tmp):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["KARAOKE_RECORDING_DIR"] = os.path.join(tmp, "recordings")
+    app.config["SONG_CATALOG_VERSION_FILE"] = os.path.join(tmp, "song_catalog.version")
+    app.config["KARAOKE_LIVE_SESSIONS_VERSION_FILE"] = os.path.join(tmp, "live_sessions.version")
+    db.init_app(app)
+    catalog_version.init_app(app)
+    live_sessions_version.init_app(app)
+
+    @app.route("/api/sessions/<session_id>/recording")
+    def recording(session_id):
+        g.current_user = User.query.filter_by(username=request.headers["X-User"]).first()
+        return karaoke.get_session_recording(session_id)
+
+    return app
+
+
+def _wait_for(recorder):
+    deadline = time.time() + 5
+    while (recorder.queue_depth() or recorder._tracks) and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def _check_recording(app, recorder):
+    with app.app_context():
+        db.create_all()
+        alice, bob, carol = (get_or_create_user(name) for name in ("alice", "bob", "carol"))
+        admin = get_or_create_user("admin")
+        admin.is_admin = True
+        db.session.commit()
+        create_session("duet", alice.id)
+        add_participant_to_session("duet", alice.id)
+        add_participant_to_session("duet", bob.id)
+
+    # Both connections held the same client_index at different times
+    for recording_id, username, frame in (("a1", "alice", b"\x01\x00" * 480), ("b2", "bob", b"\x02\x00" * 480)):
+        recorder.tag_participant("duet", recording_id, username)
+        recorder.record("duet", recording_id, frame)
+        recorder.finish("duet", recording_id)
+    _wait_for(recorder)
+
+    client = app.test_client()
+    response = client.get("/api/sessions/duet/recording", headers={"X-User": "bob"})
+    assert response.status_code == 200
+    assert sorted(response.json["participants"]) == ["a1", "b2"]
+
+    response = client.get("/api/sessions/duet/recording?participant=b2", headers={"X-User": "admin"})
+    assert response.status_code == 200
+    assert response.data.endswith(b"\x02\x00" * 480)
+
+    response = client.get("/api/sessions/duet/recording?participant=../duet", headers={"X-User": "alice"})
+    assert response.status_code == 404
+
+    response = client.get("/api/sessions/duet/recording?participant=a1", headers={"X-User": "carol"})
+    assert response.status_code == 403
+
+
+def test_recording_tracks_and_access():
+    original = karaoke.session_recorder
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _make_app(tmp)
+        recorder = karaoke.session_recorder = SessionRecorder()
+        recorder.init_app(app)
+        try:
+            _check_recording(app, recorder)
+        finally:
+            recorder.stop()
+            karaoke.session_recorder = original
+
+
+if __name__ == "__main__":
+    test_recording_tracks_and_access()
+    print("SUCCESS: session recording tests passed.")
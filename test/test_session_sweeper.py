@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from database import create_session, seed_default_songs
+from karaoke_sessions import SessionSweeper, live_sessions_version
+from karaoke_writer import SessionWriter
+from models import Session, db, get_sgt_now_naive
+from song_catalog import catalog_version
+
+
+def _make_app(marker_dir):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SONG_CATALOG_VERSION_FILE"] = os.path.join(marker_dir, "song_catalog.version")
+    app.config["KARAOKE_LIVE_SESSIONS_VERSION_FILE"] = os.path.join(marker_dir, "live_sessions.version")
+    app.config["KARAOKE_SESSION_SWEEP_INTERVAL"] = 0  # Sweep by hand
+    db.init_app(app)
+    catalog_version.init_app(app)
+    live_sessions_version.init_app(app)
+    return app
+
+
+def _check_sweep(app):
+    now = get_sgt_now_naive()
+    with app.app_context():
+        db.create_all()
+        seed_default_songs()
+        for session_id in ("queued-long-ago", "sung-long-ago", "abandoned"):
+            create_session(session_id, 1)
+        Session.query.update({"created_at": now - timedelta(hours=7)})
+        sung = Session.query.filter_by(session_id="sung-long-ago").first()
+        sung.status, sung.started_at = "active", now - timedelta(hours=7)
+        db.session.commit()
+
+    # The long-queued session only starts now, through the audio path's writer
+    writer = SessionWriter()
+    writer.init_app(app)
+    writer.session_activated("queued-long-ago")
+    writer.stop()
+
+    sweeper = SessionSweeper()
+    sweeper.init_app(app)
+    with app.app_context():
+        assert sweeper.sweep() == 2
+        statuses = {s.session_id: s for s in Session.query}
+        assert statuses["queued-long-ago"].status == "active"
+        assert statuses["sung-long-ago"].status == "completed"
+        assert statuses["abandoned"].status == "completed"
+        assert abs(statuses["abandoned"].completed_at - now) < timedelta(minutes=5)
+
+    writer.session_completed("queued-long-ago")
+    writer.stop()
+    with app.app_context():
+        queued = Session.query.filter_by(session_id="queued-long-ago").first()
+        assert timedelta(0) <= queued.completed_at - queued.started_at < timedelta(minutes=5)
+
+
+def test_sweep_keeps_sessions_that_just_started():
+    with tempfile.TemporaryDirectory() as marker_dir:
+        _check_sweep(_make_app(marker_dir))
+
+
+if __name__ == "__main__":
+    test_sweep_keeps_sessions_that_just_started()
+    print("SUCCESS: session sweeper tests passed.")
@@ -0,0 +1,76 @@
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+import karaoke
+from models import Song, db
+from song_catalog import catalog_version
+
+
+def _make_app(marker_dir):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SONG_CATALOG_VERSION_FILE"] = os.path.join(marker_dir, "song_catalog.version")
+    db.init_app(app)
+    catalog_version.init_app(app)
+    app.add_url_rule("/api/songs", view_func=karaoke.get_songs)
+    return app
+
+
+def _add_songs():
+    # Ties and NULLs on difficulty_score, interleaved by id
+    scores = [None, 3.5, 1.0, None, 3.5, 2.0, None, 1.0, 3.5, 5.0, None, 2.0, 1.0]
+    for i, score in enumerate(scores):
+        title, artist = f"Song {i}", f"Artist {i}"
+        db.session.add(Song(
+            title=title, artist=artist, genre="Pop", difficulty="easy", duration=180,
+            youtube_url=f"https://youtu.be/{i}", difficulty_score=score,
+            normalized_key=Song.normalize_key(title, artist),
+        ))
+    db.session.commit()
+
+
+def _pages(client, query):
+    ids, url = [], f"/api/songs?{query}&limit=3"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert len(response.json) <= 3
+        ids.extend(song["id"] for song in response.json)
+        cursor = response.headers.get("X-Next-Cursor")
+        url = f"/api/songs?{query}&limit=3&cursor={cursor}" if cursor else None
+    return ids
+
+
+def _check_keyset_paging(app):
+    with app.app_context():
+        db.create_all()
+        _add_songs()
+
+    client = app.test_client()
+    for query in ("sort=difficulty_score", "sort=-difficulty_score", "sort=-difficulty_score&fields=title"):
+        full = [song["id"] for song in client.get(f"/api/songs?{query}").json]
+        paged = _pages(client, query)
+        assert paged == full, query
+        assert len(set(paged)) == len(paged) == 13, query
+
+    # NULLs first ascending, last descending
+    with app.app_context():
+        nulls = {song.id for song in Song.query.filter(Song.difficulty_score.is_(None))}
+    assert set(_pages(client, "sort=difficulty_score")[:4]) == nulls
+    assert set(_pages(client, "sort=-difficulty_score")[-4:]) == nulls
+
+
+def test_keyset_pages_concatenate_to_full_listing():
+    with tempfile.TemporaryDirectory() as marker_dir:
+        _check_keyset_paging(_make_app(marker_dir))
+
+
+if __name__ == "__main__":
+    test_keyset_pages_concatenate_to_full_listing()
+    print("SUCCESS: song catalog tests passed.")
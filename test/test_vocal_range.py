@@ -0,0 +1,51 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from karaoke_vocal_range import histogram_percentile, note_histogram, note_name, track_pitch
+
+SAMPLE_RATE = 48000
+
+
+def _sung_note(frequency, seconds=0.5, sample_rate=SAMPLE_RATE):
+    """Int16 harmonic tone with a little noise, roughly like a sung vowel"""
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    x = sum((0.6 / k) * np.sin(2 * np.pi * frequency * k * t + k) for k in range(1, 8))
+    x = x + 0.02 * np.random.default_rng(0).standard_normal(len(t))
+    return (x / np.abs(x).max() * 12000).astype(np.int16)
+
+
+def test_pitch_is_tracked_without_octave_errors():
+    for frequency in (82.4, 110.0, 196.0, 261.6, 440.0, 880.0):
+        notes = track_pitch(_sung_note(frequency), SAMPLE_RATE)
+        expected = 69 + 12 * np.log2(frequency / 440.0)
+        assert len(notes) > 0
+        assert abs(np.median(notes) - expected) < 0.25, (frequency, np.median(notes))
+
+
+def test_silence_and_noise_are_unvoiced():
+    assert len(track_pitch(np.zeros(SAMPLE_RATE, dtype=np.int16), SAMPLE_RATE)) == 0
+    noise = (np.random.default_rng(1).standard_normal(SAMPLE_RATE) * 3000).astype(np.int16)
+    assert len(track_pitch(noise, SAMPLE_RATE)) < 5
+
+
+def test_range_percentiles_from_histogram():
+    # A glide from A2 to A4 sung evenly
+    audio = np.concatenate([_sung_note(f, 0.25) for f in np.geomspace(110.0, 440.0, 25)])
+    histogram = note_histogram(track_pitch(audio, SAMPLE_RATE))
+    low = histogram_percentile(histogram, 0.05)
+    high = histogram_percentile(histogram, 0.95)
+    assert 45 <= low <= 47
+    assert 67 <= high <= 69
+    assert note_name(60) == "C4"
+    assert histogram_percentile(note_histogram(()), 0.5) is None
+
+
+if __name__ == "__main__":
+    test_pitch_is_tracked_without_octave_errors()
+    test_silence_and_noise_are_unvoiced()
+    test_range_percentiles_from_histogram()
+    print("SUCCESS: vocal range tests passed.")